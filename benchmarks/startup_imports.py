@@ -0,0 +1,83 @@
+"""
+Measure the import cost of starting every `conda env` subcommand using
+``python -X importtime`` (Python 3.7+).
+
+usage:
+    python benchmarks/startup_imports.py [--max-ms N] [--top N] [COMMAND ...]
+
+Each subcommand is started with ``--help`` so nothing is executed beyond
+building the parser; the cumulative import time of ``conda_env.cli.main``
+and of the modules imported while running the command is reported.  With
+``--max-ms`` the script exits non-zero if any subcommand is slower, which
+makes it usable as a regression check.
+"""
+from __future__ import absolute_import, print_function
+import argparse
+import os
+import re
+import subprocess
+import sys
+from os.path import abspath, dirname
+
+ROOT = dirname(dirname(abspath(__file__)))
+COMMANDS = ['attach', 'create', 'export', 'list', 'lock', 'remove', 'scan', 'upload',
+            'update']
+LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+
+SCRIPT = """
+import sys
+sys.argv = ['conda-env'] + sys.argv[1:]
+from conda_env.cli.main import main
+try:
+    main()
+except SystemExit:
+    pass
+"""
+
+
+def import_times(argv):
+    """Return ``[(cumulative_us, self_us, module)]`` for top level imports"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', SCRIPT] + argv,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               env=env, universal_newlines=True)
+    _, stderr = process.communicate()
+    times = []
+    for line in stderr.splitlines():
+        m = LINE.match(line)
+        if m is None:
+            continue
+        self_us, cumulative_us, indent, module = m.groups()
+        times.append((int(cumulative_us), int(self_us), len(indent), module))
+    return times
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument('commands', nargs='*', default=COMMANDS)
+    p.add_argument('--max-ms', type=float, default=None)
+    p.add_argument('--top', type=int, default=5,
+                   help='show the N most expensive imports of each command')
+    args = p.parse_args()
+
+    if sys.version_info < (3, 7):
+        sys.exit("-X importtime needs Python 3.7 or later")
+
+    failed = []
+    for command in args.commands:
+        times = import_times([command, '--help'])
+        total = sum(cumulative for cumulative, _, indent, _ in times if indent == 1)
+        print("%-8s %8.1f ms" % (command, total / 1000.0))
+        top = sorted((t for t in times if t[3].startswith('conda')), reverse=True)
+        for cumulative, _, _, module in top[:args.top]:
+            print("    %8.1f ms  %s" % (cumulative / 1000.0, module))
+        if args.max_ms is not None and total / 1000.0 > args.max_ms:
+            failed.append(command)
+
+    if failed:
+        sys.exit("slower than %s ms: %s" % (args.max_ms, ', '.join(failed)))
+
+
+if __name__ == '__main__':
+    main()
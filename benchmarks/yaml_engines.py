@@ -0,0 +1,70 @@
+"""
+Compare the libyaml backed and pure-Python YAML engines used by
+``conda_env.yaml`` on large synthetic environment files.
+
+usage:
+    python benchmarks/yaml_engines.py [--packages N] [--repeat N]
+"""
+from __future__ import absolute_import, print_function
+import argparse
+import sys
+import timeit
+from os.path import abspath, dirname
+
+sys.path.insert(0, dirname(dirname(abspath(__file__))))
+
+import yaml  # noqa
+
+from conda_env import yaml as env_yaml  # noqa
+
+
+def synthetic_environment(packages):
+    conda = ['package-%d=%d.%d.%d=py27_%d' % (i, i % 7, i % 11, i % 13, i % 3)
+             for i in range(packages)]
+    pip = ['pip-package-%d==%d.%d' % (i, i % 5, i % 9)
+           for i in range(packages // 4)]
+    return env_yaml.dict([
+        ('name', 'synthetic-%d' % packages),
+        ('channels', ['defaults', 'conda-forge', 'bioconda']),
+        ('dependencies', conda + [{'pip': pip}]),
+        ('prefix', '/opt/anaconda/envs/synthetic-%d' % packages),
+    ])
+
+
+def engines():
+    yield 'python', yaml.SafeLoader, yaml.SafeDumper
+    if env_yaml.has_libyaml:
+        yield 'libyaml', yaml.CSafeLoader, yaml.CSafeDumper
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument('--packages', type=int, nargs='+', default=[100, 1000, 5000])
+    p.add_argument('--repeat', type=int, default=5)
+    args = p.parse_args()
+
+    if not env_yaml.has_libyaml:
+        print("# libyaml is not available, only the pure-Python engine is timed")
+
+    for packages in args.packages:
+        data = synthetic_environment(packages)
+        # yaml.Dumper is what conda_env.yaml used before picking an engine
+        reference = env_yaml.dump(data, Dumper=yaml.Dumper,
+                                  default_flow_style=False)
+        print("%d packages (%d bytes)" % (packages, len(reference)))
+        for name, loader, dumper in engines():
+            out = env_yaml.dump(data, Dumper=dumper, default_flow_style=False)
+            if out != reference:
+                sys.exit("%s engine output differs from the reference" % name)
+            load = min(timeit.repeat(
+                lambda: env_yaml.load(reference, Loader=loader),
+                number=1, repeat=args.repeat))
+            dump = min(timeit.repeat(
+                lambda: env_yaml.dump(data, Dumper=dumper, default_flow_style=False),
+                number=1, repeat=args.repeat))
+            print("    %-8s load %8.2f ms    dump %8.2f ms"
+                  % (name, load * 1000, dump * 1000))
+
+
+if __name__ == '__main__':
+    main()
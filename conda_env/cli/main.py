@@ -29,11 +29,16 @@ environment, please open a bug report at:
 
 from conda.cli.conda_argparse import ArgumentParser
 
+# Subcommand modules only import what configure_parser needs at the top
+# level.  Everything else is imported inside their execute function, so the
+# cost is only paid by the subcommand that actually runs.
 from . import main_attach
 from . import main_create
 from . import main_export
 from . import main_list
+from . import main_lock
 from . import main_remove
+from . import main_scan
 from . import main_upload
 from . import main_update
 
@@ -54,7 +59,9 @@ def create_parser():
     main_create.configure_parser(sub_parsers)
     main_export.configure_parser(sub_parsers)
     main_list.configure_parser(sub_parsers)
+    main_lock.configure_parser(sub_parsers)
     main_remove.configure_parser(sub_parsers)
+    main_scan.configure_parser(sub_parsers)
     main_upload.configure_parser(sub_parsers)
     main_update.configure_parser(sub_parsers)
 
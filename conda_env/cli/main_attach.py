@@ -1,7 +1,5 @@
 from argparse import RawDescriptionHelpFormatter
-from ..utils.notebooks import Notebook
 from conda.cli import common
-from ..env import from_environment
 
 
 description = """
@@ -68,6 +66,8 @@ def configure_parser(sub_parsers):
 
 
 def execute(args, parser):
+    from ..env import from_environment
+    from ..utils.notebooks import Notebook
 
     if args.prefix is None:
         prefix = common.get_prefix(args)
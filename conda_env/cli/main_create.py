@@ -1,18 +1,20 @@
 from __future__ import print_function
 from argparse import RawDescriptionHelpFormatter
+from collections import OrderedDict
+import copy
 import os
+import shutil
 import sys
+import tempfile
 import textwrap
+import time
 
 from conda.cli import common
-from conda.cli import install as cli_install
-from conda.install import rm_rf
-from conda.misc import touch_nonadmin
-from conda.plan import is_root_prefix
 
-from ..installers.base import get_installer, InvalidInstaller
 from .. import exceptions
-from .. import specs
+
+# Seconds between checks that batch workers are still alive
+WORKER_POLL_INTERVAL = 1
 
 description = """
 Create an environment based on an environment file
@@ -23,7 +25,11 @@ examples:
     conda env create
     conda env create -n name
     conda env create vader/deathstar
+    conda env create vader/deathstar vader/tie-fighter
+    conda env create --manifest=environments.txt
+    conda env create --lock=environment.lock.yml
     conda env create -f=/path/to/environment.yml
+    conda env create -f=web.yml -f=worker.yml --jobs=4
     conda env create -f=/path/to/requirements.txt -n deathstar
     conda env create -f=/path/to/requirements.txt -p /home/user/software/deathstar
 """
@@ -38,9 +44,10 @@ def configure_parser(sub_parsers):
     )
     p.add_argument(
         '-f', '--file',
-        action='store',
-        help='environment definition file (default: environment.yml)',
-        default='environment.yml',
+        action='append',
+        help='environment definition file (default: environment.yml); repeat to '
+             'create several environments at once',
+        default=None,
     )
 
     # Add name and prefix args
@@ -53,10 +60,26 @@ def configure_parser(sub_parsers):
     )
     p.add_argument(
         'remote_definition',
-        help='remote environment definition / IPython notebook',
+        help='remote environment definition(s) / IPython notebook',
+        action='store',
+        default=[],
+        nargs='*'
+    )
+    p.add_argument(
+        '--manifest',
+        action='store',
+        metavar='FILE',
+        default=None,
+        help='file listing environment files or remote environment definitions to '
+             'create, one per line',
+    )
+    p.add_argument(
+        '--lock',
         action='store',
+        metavar='FILE',
         default=None,
-        nargs='?'
+        help='create the environment from a lock file written by `conda env lock`, '
+             'without downloading the index or solving',
     )
     p.add_argument(
         '--force',
@@ -64,52 +87,399 @@ def configure_parser(sub_parsers):
         action='store_true',
         default=False,
     )
+    p.add_argument(
+        '--workers',
+        action='store',
+        type=int,
+        default=None,
+        help='number of remote environments to fetch at once',
+    )
+    p.add_argument(
+        '-j', '--jobs',
+        action='store',
+        type=int,
+        default=None,
+        help='number of environments to create at once (default: number of CPUs)',
+    )
+    p.add_argument(
+        '--dry-run',
+        action='store_true',
+        default=False,
+        help='only show what would be installed',
+    )
+    p.add_argument(
+        '--timings',
+        action='store_true',
+        default=False,
+        help='show how long each installer spent planning, fetching and linking',
+    )
     common.add_parser_json(p)
+    common.add_parser_offline(p)
+    p.add_argument(
+        '--no-plan-cache',
+        action='store_true',
+        default=False,
+        help='always run the solver, even if an identical solve is cached',
+    )
     p.set_defaults(func=execute)
 
 
-def execute(args, parser):
-    name = args.remote_definition or args.name
-
-    try:
-        spec = specs.detect(name=name, filename=args.file,
-                            directory=os.getcwd())
-        env = spec.environment
-
-        # FIXME conda code currently requires args to have a name or prefix
-        # don't overwrite name if it's given. gh-254
-        if args.prefix is None and args.name is None:
-            args.name = env.name
+def read_manifest(filename):
+    """Return the handles listed in filename, skipping blank lines and comments"""
+    with open(filename) as fp:
+        lines = [line.split('#', 1)[0].strip() for line in fp]
+    return [line for line in lines if line]
 
-    except exceptions.SpecNotFound as e:
-        common.error_and_exit(str(e), json=args.json)
 
-    prefix = common.get_prefix(args, search=False)
+def prepare_prefix(prefix, args):
+    from conda.cli import install as cli_install
+    from conda.install import rm_rf
+    from conda.plan import is_root_prefix
 
     if args.force and not is_root_prefix(prefix) and os.path.exists(prefix):
         rm_rf(prefix)
     cli_install.check_prefix(prefix, json=args.json)
 
+
+def show_report(report, args):
+    """Print the plans of a dry run, or how long each phase took if asked to"""
+    if args.dry_run:
+        if args.json:
+            common.stdout_json(report.to_dict())
+        else:
+            print(report.format_plans())
+    elif args.timings and not args.json:
+        print(report.format_timings())
+
+
+def install(prefix, env, args):
+    """
+    Install env into prefix and return the InstallReport, or -1 if there's
+    no installer for some of the dependencies
+    """
+    from conda.misc import touch_nonadmin
+
+    from ..installers.base import install_all, InvalidInstaller
+
+    dry_run = getattr(args, 'dry_run', False)
+    if not dry_run:
+        prepare_prefix(prefix, args)
+
     # TODO, add capability
     # common.ensure_override_channels_requires_channel(args)
     # channel_urls = args.channel or ()
 
-    for installer_type, pkg_specs in env.dependencies.items():
+    try:
+        report = install_all(prefix, env, args, dry_run=dry_run)
+    except InvalidInstaller as e:
+        sys.stderr.write(textwrap.dedent("""
+            Unable to install package for {0}.
+
+            Please double check and ensure you dependencies file has
+            the correct spelling.  You might also try installing the
+            conda-env-{0} package to see if provides the required
+            installer.
+            """).lstrip().format(e.name)
+        )
+        return -1
+
+    if not dry_run:
+        touch_nonadmin(prefix)
+    return report
+
+
+def read_sources(args):
+    """
+    Return ``(kind, value)`` for every environment to create, where kind is
+    ``'file'`` or ``'remote'``.  Manifest lines naming a file, relative to
+    the manifest, are environment files and the others remote definitions.
+    """
+    sources = [('remote', handle) for handle in args.remote_definition]
+    sources.extend(('file', filename) for filename in args.file or [])
+    if args.manifest:
+        directory = os.path.dirname(os.path.abspath(args.manifest))
+        for line in read_manifest(args.manifest):
+            path = os.path.join(directory, line)
+            sources.append(('file', path) if os.path.isfile(path) else ('remote', line))
+    return sources
+
+
+def load_environments(sources, args):
+    """
+    Return an OrderedDict mapping each source to its Environment, or to the
+    exception loading it raised.  Sources ``specs.detect`` would first ask
+    anaconda.org about are fetched from it all at once.
+    """
+    from .. import specs
+    from ..specs.binstar import fetch_environments
+
+    found = OrderedDict()
+    remote = []
+    for kind, value in sources:
+        if kind == 'remote':
+            kwargs = dict(name=value, offline=args.offline)
+        else:
+            kwargs = dict(filename=value, directory=os.getcwd(), offline=args.offline)
+        if specs.candidates(**kwargs)[0] is specs.BinstarSpec:
+            remote.append(value)
+            found[value] = None
+            continue
         try:
-            installer = get_installer(installer_type)
-            installer.install(prefix, pkg_specs, args, env)
-        except InvalidInstaller:
-            sys.stderr.write(textwrap.dedent("""
-                Unable to install package for {0}.
-
-                Please double check and ensure you dependencies file has
-                the correct spelling.  You might also try installing the
-                conda-env-{0} package to see if provides the required
-                installer.
-                """).lstrip().format(installer_type)
-            )
-            return -1
+            found[value] = specs.detect(**kwargs).environment
+        except (exceptions.SpecNotFound, exceptions.InvalidRequirementsFile) as e:
+            found[value] = e
+    if remote:
+        found.update(fetch_environments(remote, workers=args.workers, offline=args.offline))
+    return found
+
+
+def create_job(job):
+    """
+    Create one environment of a batch and return its result.  Output goes to
+    the job's log file, if it has one.  Runs in a worker process when several
+    environments are created at once.
+    """
+    from ..utils.files import redirect_output
+
+    prefix, env, args, log = job
+    start = time.time()
+    result = {'prefix': prefix}
+    try:
+        if log is None:
+            status = install(prefix, env, args)
+        else:
+            with redirect_output(log):
+                status = install(prefix, env, args)
+        if status == -1:
+            result['error'] = 'unable to install some packages'
+        else:
+            result['phases'] = status.to_dict()
+    except (Exception, SystemExit) as e:
+        result['error'] = str(e) or e.__class__.__name__
+    result['seconds'] = round(time.time() - start, 2)
+    return result
+
+
+def run_job(queue, label, job):
+    """Put the result of create_job in queue; the target of worker processes"""
+    queue.put((label, create_job(job)))
+
+
+def run_jobs(jobs, workers, offline=False):
+    """
+    Run create_job for every job in the OrderedDict ``jobs``, ``workers`` at a
+    time, each in its own process, and return their results in the same
+    order.  A process that dies without a result fails its job.
+    """
+    import multiprocessing
+    try:
+        from queue import Empty
+    except ImportError:
+        from Queue import Empty
+
+    from ..index_cache import get_index
+
+    # Load each index here, once, so workers forked afterwards start with it
+    for channels in set(tuple(env.channels) for _, env, _ in jobs.values()
+                        if env.dependencies.get('conda')):
+        try:
+            get_index(list(channels), offline=offline)
+        except (Exception, SystemExit):
+            # Reported by the workers which need it
+            pass
+
+    log_dir = tempfile.mkdtemp(prefix='conda-env-create-')
+    queue = multiprocessing.Queue()
+    waiting = list(jobs.items())
+    running = OrderedDict()
+    finished = {}
+    try:
+        while waiting or running:
+            while waiting and len(running) < workers:
+                label, (prefix, env, env_args) = waiting.pop(0)
+                log = os.path.join(log_dir, '%s.log' % os.path.basename(prefix))
+                process = multiprocessing.Process(
+                    target=run_job, args=(queue, label, (prefix, env, env_args, log)))
+                process.start()
+                running[label] = (process, log, time.time())
+
+            try:
+                label, result = queue.get(timeout=WORKER_POLL_INTERVAL)
+                finished[label] = result
+            except Empty:
+                pass
+
+            for label, (process, log, start) in list(running.items()):
+                if label not in finished and process.is_alive():
+                    continue
+                if label not in finished:
+                    # A worker puts its result before exiting; drain what
+                    # others left before giving up on this one
+                    try:
+                        while label not in finished:
+                            other, result = queue.get(timeout=WORKER_POLL_INTERVAL)
+                            finished[other] = result
+                    except Empty:
+                        finished[label] = {
+                            'prefix': jobs[label][0],
+                            'error': 'the worker process exited with code %s'
+                                     % process.exitcode,
+                            'seconds': round(time.time() - start, 2),
+                        }
+                process.join()
+                del running[label]
+                if 'error' in finished[label]:
+                    finished[label]['log'] = log
+                elif os.path.exists(log):
+                    os.remove(log)
+    finally:
+        for process, _, _ in running.values():
+            process.terminate()
+            process.join()
+    if not any('log' in result for result in finished.values()):
+        shutil.rmtree(log_dir, ignore_errors=True)
+    return OrderedDict((label, finished[label]) for label in jobs)
+
+
+def execute_batch(args, sources):
+    """
+    Load every environment, then create them ``--jobs`` at a time, each in
+    its own process.  A failing environment doesn't stop the others.
+    """
+    from ..utils.concurrency import cpu_count
+
+    if args.name or args.prefix:
+        common.error_and_exit("--name and --prefix can't be used with more than one "
+                              "environment", json=args.json)
+
+    results = OrderedDict()
+    jobs = OrderedDict()
+    prefixes = {}
+    for label, env in load_environments(sources, args).items():
+        if isinstance(env, BaseException):
+            results[label] = {'error': str(env) or env.__class__.__name__}
+            continue
+        if not env.name:
+            results[label] = {'error': 'the environment has no name'}
+            continue
+        env_args = copy.copy(args)
+        env_args.name = env.name
+        try:
+            prefix = common.get_prefix(env_args, search=False)
+        except (Exception, SystemExit) as e:
+            results[label] = {'error': str(e) or e.__class__.__name__}
+            continue
+        if prefix in prefixes:
+            results[label] = {'error': 'same environment as %s' % prefixes[prefix]}
+            continue
+        prefixes[prefix] = label
+        # Keeps the order of the report
+        results[label] = None
+        jobs[label] = (prefix, env, env_args)
+
+    workers = min(args.jobs or cpu_count(), len(jobs))
+    if workers > 1:
+        results.update(run_jobs(jobs, workers, offline=args.offline))
+    else:
+        for label, (prefix, env, env_args) in jobs.items():
+            results[label] = create_job((prefix, env, env_args, None))
+
+    failed = [label for label, result in results.items() if 'error' in result]
+    if args.json:
+        common.stdout_json(results)
+    else:
+        from ..installers.base import InstallReport
+
+        for label, result in results.items():
+            if 'error' in result:
+                continue
+            report = InstallReport.from_dict(result['phases'])
+            if args.dry_run:
+                print("# Would create %s in %s" % (label, result['prefix']))
+                print(report.format_plans())
+            else:
+                print("# Created %s in %s (%.1fs)" % (label, result['prefix'],
+                                                      result['seconds']))
+                if args.timings:
+                    print(report.format_timings())
+        if failed:
+            sys.stderr.write("\nFailed to %s %d of %d environments:\n" %
+                             ('plan' if args.dry_run else 'create', len(failed), len(results)))
+            for label in failed:
+                result = results[label]
+                details = []
+                if 'seconds' in result:
+                    details.append('%.1fs' % result['seconds'])
+                if 'log' in result:
+                    details.append('log: %s' % result['log'])
+                sys.stderr.write("    %s: %s%s\n" % (
+                    label, result['error'], ' (%s)' % ', '.join(details) if details else ''))
+    return 1 if failed else None
+
+
+def execute_lock(args):
+    """Create the environment from a lock file, without solving"""
+    from conda.cli import install as cli_install
+    from conda.misc import touch_nonadmin
+
+    from ..lock import Lock
+
+    try:
+        lock = Lock.load(args.lock)
+        lock.check_platform()
+    except exceptions.InvalidLockFile as e:
+        common.error_and_exit(str(e), json=args.json)
+
+    if args.prefix is None and args.name is None:
+        args.name = lock.name
+    prefix = common.get_prefix(args, search=False)
+    prepare_prefix(prefix, args)
+    lock.install(prefix, args)
 
     touch_nonadmin(prefix)
     if not args.json:
         cli_install.print_activate(args.name if args.name else prefix)
+
+
+def execute(args, parser):
+    from conda.cli import install as cli_install
+
+    from .. import specs
+
+    if args.lock:
+        return execute_lock(args)
+
+    try:
+        sources = read_sources(args)
+    except (IOError, OSError) as e:
+        common.error_and_exit(str(e), json=args.json)
+    if len(sources) > 1:
+        return execute_batch(args, sources)
+
+    name, filename = args.name, 'environment.yml'
+    if sources and sources[0][0] == 'remote':
+        name = sources[0][1]
+    elif sources:
+        filename = sources[0][1]
+
+    try:
+        spec = specs.detect(name=name, filename=filename,
+                            directory=os.getcwd(), offline=args.offline)
+        env = spec.environment
+
+        # FIXME conda code currently requires args to have a name or prefix
+        # don't overwrite name if it's given. gh-254
+        if args.prefix is None and args.name is None:
+            args.name = env.name
+
+    except (exceptions.SpecNotFound, exceptions.InvalidRequirementsFile) as e:
+        common.error_and_exit(str(e), json=args.json)
+
+    prefix = common.get_prefix(args, search=False)
+    report = install(prefix, env, args)
+    if report == -1:
+        return -1
+
+    show_report(report, args)
+    if not args.json and not args.dry_run:
+        cli_install.print_activate(args.name if args.name else prefix)
@@ -7,8 +7,6 @@ from argparse import RawDescriptionHelpFormatter
 from conda import config
 from conda.cli import common
 
-from ..env import from_environment
-
 description = """
 Export a given environment
 """
@@ -62,11 +60,22 @@ def configure_parser(sub_parsers):
         help='Remove build specification from dependencies'
     )
 
+    p.add_argument(
+        '--pip-timeout',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help='Leave out pip packages if pip takes longer than this to list them'
+    )
+
     p.set_defaults(func=execute)
 
 
 # TODO Make this aware of channels that were used to install packages
 def execute(args, parser):
+    from ..env import from_environment
+    from ..utils.files import atomic_open
+
     if not args.name:
         # Note, this is a hack fofr get_prefix that assumes argparse results
         # TODO Refactor common.get_prefix
@@ -84,7 +93,8 @@ def execute(args, parser):
     else:
         name = args.name
     prefix = common.get_prefix(args)
-    env = from_environment(name, prefix, no_builds=args.no_builds)
+    env = from_environment(name, prefix, no_builds=args.no_builds,
+                           pip_timeout=args.pip_timeout)
 
     if args.override_channels:
         env.remove_channels()
@@ -95,5 +105,5 @@ def execute(args, parser):
     if args.file is None:
         print(env.to_yaml())
     else:
-        fp = open(args.file, 'wb')
-        env.to_yaml(stream=fp)
+        with atomic_open(args.file) as fp:
+            env.to_yaml(stream=fp)
@@ -0,0 +1,78 @@
+from __future__ import absolute_import, print_function
+
+import os
+from argparse import RawDescriptionHelpFormatter
+
+from conda.cli import common
+
+from .. import exceptions
+
+description = """
+Resolve an environment file to the exact packages it needs and save them
+in a lock file for `conda env create --lock`
+"""
+
+example = """
+examples:
+    conda env lock
+    conda env lock -f environment.yml -o environment.lock.yml
+    conda env lock vader/deathstar -o deathstar.lock.yml
+"""
+
+
+def configure_parser(sub_parsers):
+    p = sub_parsers.add_parser(
+        'lock',
+        formatter_class=RawDescriptionHelpFormatter,
+        description=description,
+        help=description,
+        epilog=example,
+    )
+    p.add_argument(
+        '-f', '--file',
+        action='store',
+        help='environment definition file (default: environment.yml)',
+        default='environment.yml',
+    )
+    p.add_argument(
+        '-o', '--output',
+        action='store',
+        metavar='FILE',
+        default=None,
+        help='lock file to write (default: the environment file with a .lock.yml extension)',
+    )
+    p.add_argument(
+        'remote_definition',
+        help='remote environment definition',
+        action='store',
+        default=None,
+        nargs='?'
+    )
+    common.add_parser_json(p)
+    p.set_defaults(func=execute)
+
+
+def execute(args, parser):
+    from ..lock import default_filename, resolve
+    from .. import specs
+
+    try:
+        spec = specs.detect(name=args.remote_definition, filename=args.file,
+                            directory=os.getcwd())
+        env = spec.environment
+    except (exceptions.SpecNotFound, exceptions.InvalidRequirementsFile) as e:
+        common.error_and_exit(str(e), json=args.json)
+
+    try:
+        lock = resolve(env)
+    except exceptions.UnresolvablePipRequirements as e:
+        common.error_and_exit(str(e), json=args.json, error_type='UnresolvablePipRequirements')
+    output = args.output or default_filename(
+        'environment.yml' if args.remote_definition else args.file)
+    lock.save(output)
+
+    if args.json:
+        common.stdout_json({'lock_file': output, 'packages': len(lock.packages),
+                            'pip': len(lock.pip)})
+    else:
+        print("Locked {} packages to {}".format(len(lock.packages) + len(lock.pip), output))
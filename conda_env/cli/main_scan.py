@@ -0,0 +1,78 @@
+from __future__ import absolute_import, print_function
+
+import os
+from argparse import RawDescriptionHelpFormatter
+
+from conda.cli import common
+
+description = """
+Find every environment file below a directory
+"""
+
+example = """
+examples:
+    conda env scan
+    conda env scan /path/to/monorepo --ignore build --ignore 'vendor/*'
+    conda env scan --index .conda-env-index.json --json
+"""
+
+
+def configure_parser(sub_parsers):
+    p = sub_parsers.add_parser(
+        'scan',
+        formatter_class=RawDescriptionHelpFormatter,
+        description=description,
+        help=description,
+        epilog=example,
+    )
+    p.add_argument(
+        'directory',
+        help='directory to scan (default: current directory)',
+        action='store',
+        default=None,
+        nargs='?'
+    )
+    p.add_argument(
+        '--ignore',
+        action='append',
+        metavar='PATTERN',
+        help='also skip files and directories matching this glob pattern '
+             '(version control and build tool directories are always skipped)',
+    )
+    p.add_argument(
+        '--index',
+        action='store',
+        metavar='FILE',
+        default=None,
+        help='reuse and update an index saved by a previous scan',
+    )
+    p.add_argument(
+        '--workers',
+        action='store',
+        type=int,
+        default=None,
+        help='number of files and directories to read at once',
+    )
+    common.add_parser_json(p)
+    p.set_defaults(func=execute)
+
+
+def execute(args, parser):
+    from ..workspace import DEFAULT_IGNORE, WorkspaceIndex, scan
+
+    directory = args.directory or os.getcwd()
+    previous = WorkspaceIndex.load(args.index) if args.index else None
+    index = scan(directory, ignore=DEFAULT_IGNORE + (args.ignore or []),
+                 workers=args.workers, index=previous)
+    if args.index:
+        index.save(args.index)
+
+    if args.json:
+        common.stdout_json({'environments': index.by_name(), 'errors': index.errors})
+        return
+
+    for name, files in sorted(index.by_name().items(), key=lambda item: str(item[0])):
+        for path in sorted(files):
+            print("%-30s %s" % (name, path))
+    for path, error in sorted(index.errors.items()):
+        print("# Unable to read %s: %s" % (path, error))
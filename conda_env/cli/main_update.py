@@ -5,11 +5,7 @@ import sys
 
 from conda import config
 from conda.cli import common
-from conda.cli import install as cli_install
-from conda.misc import touch_nonadmin
 
-from ..installers.base import get_installer, InvalidInstaller
-from .. import specs as install_specs
 from .. import exceptions
 
 description = """
@@ -64,18 +60,44 @@ def configure_parser(sub_parsers):
         default=None,
         nargs='?'
     )
+    p.add_argument(
+        '--dry-run',
+        action='store_true',
+        default=False,
+        help='only show what would be installed',
+    )
+    p.add_argument(
+        '--timings',
+        action='store_true',
+        default=False,
+        help='show how long each installer spent planning, fetching and linking',
+    )
     common.add_parser_json(p)
+    common.add_parser_offline(p)
+    p.add_argument(
+        '--no-plan-cache',
+        action='store_true',
+        default=False,
+        help='always run the solver, even if an identical solve is cached',
+    )
     p.set_defaults(func=execute)
 
 
 def execute(args, parser):
+    from conda.cli import install as cli_install
+    from conda.misc import touch_nonadmin
+
+    from ..installers.base import install_all, InvalidInstaller
+    from .. import specs as install_specs
+    from .main_create import show_report
+
     name = args.remote_definition or args.name
 
     try:
         spec = install_specs.detect(name=name, filename=args.file,
-                                    directory=os.getcwd())
+                                    directory=os.getcwd(), offline=args.offline)
         env = spec.environment
-    except exceptions.SpecNotFound as e:
+    except (exceptions.SpecNotFound, exceptions.InvalidRequirementsFile) as e:
         common.error_and_exit(str(e), json=args.json)
 
     if not args.name:
@@ -106,22 +128,23 @@ def execute(args, parser):
     # common.ensure_override_channels_requires_channel(args)
     # channel_urls = args.channel or ()
 
-    for installer_type, specs in env.dependencies.items():
-        try:
-            installer = get_installer(installer_type)
-            installer.install(prefix, specs, args, env, prune=args.prune)
-        except InvalidInstaller:
-            sys.stderr.write(textwrap.dedent("""
-                Unable to install package for {0}.
-
-                Please double check and ensure you dependencies file has
-                the correct spelling.  You might also try installing the
-                conda-env-{0} package to see if provides the required
-                installer.
-                """).lstrip().format(installer_type)
-            )
-            return -1
-
+    try:
+        report = install_all(prefix, env, args, prune=args.prune, dry_run=args.dry_run)
+    except InvalidInstaller as e:
+        sys.stderr.write(textwrap.dedent("""
+            Unable to install package for {0}.
+
+            Please double check and ensure you dependencies file has
+            the correct spelling.  You might also try installing the
+            conda-env-{0} package to see if provides the required
+            installer.
+            """).lstrip().format(e.name)
+        )
+        return -1
+
+    show_report(report, args)
+    if args.dry_run:
+        return
     touch_nonadmin(prefix)
     if not args.json:
         cli_install.print_activate(args.name if args.name else prefix)
@@ -2,8 +2,6 @@ import textwrap
 from argparse import RawDescriptionHelpFormatter
 from conda.cli import common
 from .. import exceptions
-from ..env import from_file
-from ..utils.uploader import is_installed, Uploader
 
 
 description = """
@@ -62,6 +60,8 @@ def configure_parser(sub_parsers):
 
 
 def execute(args, parser):
+    from ..env import from_file
+    from ..utils.uploader import is_installed, Uploader
 
     if not is_installed():
         raise exceptions.NoBinstar()
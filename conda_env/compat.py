@@ -1,3 +1,4 @@
+import os
 import sys
 
 PY3 = sys.version_info[0] == 3
@@ -15,3 +16,64 @@ def b(some_str, encoding="utf-8"):
         return bytes(some_str, encoding=encoding)
     except TypeError:
         return some_str
+
+
+def with_metaclass(meta, *bases):
+    """A base class made by ``meta``, for Python 2 and 3 alike"""
+    return meta('%sBase' % meta.__name__, bases or (object,), {})
+
+
+def replace(src, dst):
+    """Atomically move ``src`` over ``dst``, even if ``dst`` exists"""
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2 has no os.replace and os.rename refuses to overwrite
+        # on Windows
+        if sys.platform == 'win32' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+try:
+    intern = intern
+except NameError:
+    from sys import intern
+
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        class _DirEntry(object):
+            def __init__(self, directory, name):
+                self.name = name
+                self.path = os.path.join(directory, name)
+
+            def is_dir(self, follow_symlinks=True):
+                if not follow_symlinks and os.path.islink(self.path):
+                    return False
+                return os.path.isdir(self.path)
+
+            def is_file(self, follow_symlinks=True):
+                if not follow_symlinks and os.path.islink(self.path):
+                    return False
+                return os.path.isfile(self.path)
+
+        def scandir(directory):
+            return [_DirEntry(directory, name) for name in os.listdir(directory)]
+
+
+try:
+    from packaging.markers import Marker
+    from packaging.version import InvalidVersion, Version
+except ImportError:
+    try:
+        # Every pip new enough to install wheels vendors packaging
+        from pip._vendor.packaging.markers import Marker
+        from pip._vendor.packaging.version import InvalidVersion, Version
+    except ImportError:
+        Marker = Version = None
+        InvalidVersion = ValueError
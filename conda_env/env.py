@@ -12,15 +12,28 @@ from conda.cli import common
 from conda import install
 from conda import config
 
+from . import __version__
 from . import compat
 from . import exceptions
 from . import yaml
-from conda_env.pip_util import add_pip_installed
+from .package_spec import PackageSpec
+from .utils.cache import DiskCache, cache_dir, hash_key
+from .utils.files import atomic_open
+from .utils.concurrency import Task
+from conda_env.pip_util import installed as pip_installed, merge_pip_installed
+
+
+# Names of the files conda env looks for in a directory, in order
+ENVIRONMENT_FILES = ['environment.yml', 'environment.yaml']
+
+# Bump whenever the attributes of a pickled Environment or Dependencies
+# change, so parse caches written by older code are never loaded
+PARSE_CACHE_FORMAT = 3
 
 
 def load_from_directory(directory):
     """Load and return an ``Environment`` from a given ``directory``"""
-    files = ['environment.yml', 'environment.yaml']
+    files = ENVIRONMENT_FILES
     while True:
         for f in files:
             try:
@@ -36,20 +49,30 @@ def load_from_directory(directory):
 
 # TODO This should lean more on conda instead of divining it from the outside
 # TODO tests!!!
-def from_environment(name, prefix, no_builds=False):
-    installed = install.linked(prefix)
-    conda_pkgs = copy(installed)
-    # json=True hides the output, data is added to installed
-    add_pip_installed(prefix, installed, json=True)
+def from_environment(name, prefix, no_builds=False, pip_timeout=None):
+    # Listing pip packages means running pip twice, so do it while conda-meta
+    # is read.  The generator only starts running inside the task's thread.
+    pip_task = Task(list, pip_installed(prefix, output=False))
+    conda_pkgs = install.linked(prefix)
+    try:
+        pip_pkgs = pip_task.result(timeout=pip_timeout)
+    except exceptions.TaskTimeout:
+        sys.stderr.write("# Warning: pip did not finish within %s seconds, "
+                         "pip packages are not included\n" % pip_timeout)
+        pip_pkgs = []
+
+    installed = copy(conda_pkgs)
+    merge_pip_installed(installed, pip_pkgs)
 
-    pip_pkgs = sorted(installed - conda_pkgs)
+    conda_specs = [PackageSpec.from_dist(dist) for dist in sorted(conda_pkgs)]
+    pip_specs = [PackageSpec.from_dist(dist, installer='pip').without_build()
+                 for dist in sorted(installed - conda_pkgs)]
 
     if no_builds:
-        dependencies = ['='.join(a.rsplit('-', 2)[0:2]) for a in sorted(conda_pkgs)]
-    else:
-        dependencies = ['='.join(a.rsplit('-', 2)) for a in sorted(conda_pkgs)]
-    if len(pip_pkgs) > 0:
-        dependencies.append({'pip': ['=='.join(a.rsplit('-', 2)[:2]) for a in pip_pkgs]})
+        conda_specs = [spec.without_build() for spec in conda_specs]
+    dependencies = [spec.to_yaml() for spec in conda_specs]
+    if len(pip_specs) > 0:
+        dependencies.append({'pip': [spec.to_yaml() for spec in pip_specs]})
 
     # conda uses ruamel_yaml which returns a ruamel_yaml.comments.CommentedSeq
     # this doesn't dump correctly using pyyaml
@@ -58,13 +81,36 @@ def from_environment(name, prefix, no_builds=False):
     return Environment(name=name, dependencies=dependencies, channels=channels, prefix=prefix)
 
 
+def parse_cache():
+    """Return the cache of parsed environments, or None if it's disabled"""
+    directory = cache_dir('environments')
+    if directory is None:
+        return None
+    return DiskCache(directory)
+
+
 def from_yaml(yamlstr, **kwargs):
     """Load and return a ``Environment`` from a given ``yaml string``"""
+    cache = parse_cache()
+    if cache is not None:
+        # The filename doesn't change what gets parsed, so identical files
+        # in different places share an entry
+        overrides = sorted((k, v) for k, v in kwargs.items() if k != 'filename')
+        cache_key = hash_key(__version__, PARSE_CACHE_FORMAT, repr(overrides), yamlstr)
+        environment = cache.get(cache_key)
+        if isinstance(environment, Environment):
+            environment.filename = kwargs.get('filename')
+            return environment
+
     data = yaml.load(yamlstr)
     if kwargs is not None:
         for key, value in kwargs.items():
             data[key] = value
-    return Environment(**data)
+    environment = Environment(**data)
+
+    if cache is not None:
+        cache.set(cache_key, environment)
+    return environment
 
 
 def from_file(filename):
@@ -75,29 +121,155 @@ def from_file(filename):
         return from_yaml(yamlstr, filename=filename)
 
 
-# TODO test explicitly
+def _collapse(lines, records):
+    """
+    Drop repeated packages from the parallel lists lines and records, in
+    place, the last spec of a package taking the place of the first
+    """
+    positions = {}
+    kept = []
+    for line, record in zip(lines, records):
+        if record.key in positions:
+            kept[positions[record.key]] = (line, record)
+        else:
+            positions[record.key] = len(kept)
+            kept.append((line, record))
+    lines[:] = [line for line, _ in kept]
+    records[:] = [record for _, record in kept]
+
+
 class Dependencies(OrderedDict):
-    def __init__(self, raw, *args, **kwargs):
+    """
+    Dependencies grouped by installer, e.g. ``{'conda': [...], 'pip': [...]}``
+
+    ``raw`` holds the dependencies as written in the environment file and
+    ``records()`` the same dependencies as ``PackageSpec`` objects.  All views
+    are kept in sync as packages are added, replaced or removed, and a
+    per-installer name index makes those lookups constant time.
+    """
+    def __init__(self, raw=None, *args, **kwargs):
         super(Dependencies, self).__init__(*args, **kwargs)
         self.raw = raw
         self.parse()
 
     def parse(self):
+        self.clear()
+        self._records = {}
+        self._index = {}
+        self._raw_positions = []
         if not self.raw:
             return
 
         self.update({'conda': []})
+        self._records['conda'] = []
 
+        # A package listed more than once keeps the place of its first spec
+        # and the last spec, just like add() does
+        raw = []
+        positions = {}
         for line in self.raw:
             if isinstance(line, dict):
-                self.update(line)
-            else:
+                for installer, specs in line.items():
+                    records = [PackageSpec.from_line(spec, installer) for spec in specs]
+                    _collapse(specs, records)
+                    self[installer] = specs
+                    self._records[installer] = records
+                raw.append(line)
+                continue
+
+            record = PackageSpec.from_line(line)
+            position = positions.get(record.key)
+            if position is None:
+                positions[record.key] = len(self['conda'])
                 self['conda'].append(common.arg2spec(line))
+                self._records['conda'].append(record)
+                self._raw_positions.append(len(raw))
+                raw.append(line)
+            else:
+                self['conda'][position] = common.arg2spec(line)
+                self._records['conda'][position] = record
+                raw[self._raw_positions[position]] = line
+        self.raw = raw
+        self._reindex()
 
-    # TODO only append when it's not already present
-    def add(self, package_name):
-        self.raw.append(package_name)
-        self.parse()
+    def _reindex(self):
+        self._index = dict(
+            (installer, dict((record.key, position)
+                             for position, record in enumerate(records)))
+            for installer, records in self._records.items())
+
+    def records(self, installer='conda'):
+        """Return the ``PackageSpec`` of every dependency for ``installer``"""
+        return self._records.get(installer, [])
+
+    def contains(self, package_name, installer='conda'):
+        """Return True if there is a spec for ``package_name``"""
+        key = PackageSpec.from_line(package_name, installer).key
+        return key in self._index.get(installer, ())
+
+    def add(self, package_name, installer='conda'):
+        """Add ``package_name``, replacing any spec for the same package"""
+        record = PackageSpec.from_line(package_name, installer)
+        if record.key in self._index.get(installer, ()):
+            self._set(record, package_name)
+            return
+
+        if self.raw is None:
+            self.raw = []
+        if installer not in self:
+            self[installer] = []
+            self._records[installer] = []
+            self._index[installer] = {}
+            if installer != 'conda':
+                # Shared with the parsed view, just like the ones in the file
+                self.raw.append({installer: self[installer]})
+
+        self._index[installer][record.key] = len(self[installer])
+        self._records[installer].append(record)
+        if installer == 'conda':
+            self['conda'].append(common.arg2spec(package_name))
+            self._raw_positions.append(len(self.raw))
+            self.raw.append(package_name)
+        else:
+            self[installer].append(package_name)
+
+    def replace(self, package_name, installer='conda'):
+        """
+        Replace the spec of an already present package
+        :raises: KeyError
+        """
+        record = PackageSpec.from_line(package_name, installer)
+        if record.key not in self._index.get(installer, ()):
+            raise KeyError(record.key)
+        self._set(record, package_name)
+
+    def remove(self, package_name, installer='conda'):
+        """
+        Remove the spec for ``package_name``
+        :raises: KeyError
+        """
+        key = PackageSpec.from_line(package_name, installer).key
+        index = self._index.get(installer, {})
+        position = index.pop(key)
+        del self[installer][position]
+        del self._records[installer][position]
+        # Only the packages after the removed one moved
+        for record in self._records[installer][position:]:
+            index[record.key] -= 1
+        if installer == 'conda':
+            del self.raw[self._raw_positions.pop(position)]
+            # Every conda line after the removed one moved up in raw
+            self._raw_positions[position:] = [p - 1 for p in self._raw_positions[position:]]
+
+    def _set(self, record, package_name):
+        installer = record.installer
+        position = self._index[installer][record.key]
+        self._records[installer][position] = record
+        if installer == 'conda':
+            self['conda'][position] = common.arg2spec(package_name)
+            self.raw[self._raw_positions[position]] = package_name
+        else:
+            self[installer][position] = package_name
 
 
 def unique(seq, key=None):
@@ -154,12 +326,12 @@ class Environment(object):
         return d
 
     def to_yaml(self, stream=None):
-        d = self.to_dict()
-        out = compat.u(yaml.dump(d, default_flow_style=False))
+        chunks = yaml.iterdump(self.to_dict())
         if stream is None:
-            return out
-        stream.write(compat.b(out, encoding="utf-8"))
+            return compat.u(''.join(chunks))
+        for chunk in chunks:
+            stream.write(compat.b(chunk, encoding="utf-8"))
 
     def save(self):
-        with open(self.filename, "wb") as fp:
+        with atomic_open(self.filename) as fp:
             self.to_yaml(stream=fp)
@@ -63,3 +63,41 @@ class NBFormatNotInstalled(CondaEnvRuntimeError):
         conda install nbformat
         """
         super(NBFormatNotInstalled, self).__init__(msg)
+
+
+class TaskTimeout(CondaEnvRuntimeError):
+    def __init__(self, timeout, *args, **kwargs):
+        self.timeout = timeout
+        msg = 'Task did not finish within {} seconds'.format(timeout)
+        super(TaskTimeout, self).__init__(msg, *args, **kwargs)
+
+
+class EnvironmentNotCached(CondaEnvRuntimeError):
+    def __init__(self, handle, *args, **kwargs):
+        self.handle = handle
+        msg = "{} is not in the local cache and can't be downloaded offline".format(handle)
+        super(EnvironmentNotCached, self).__init__(msg, *args, **kwargs)
+
+
+class InvalidRequirementsFile(CondaEnvRuntimeError):
+    def __init__(self, filename, reason, *args, **kwargs):
+        self.filename = filename
+        self.reason = reason
+        msg = '{}: {}'.format(filename, reason)
+        super(InvalidRequirementsFile, self).__init__(msg, *args, **kwargs)
+
+
+class InvalidLockFile(CondaEnvRuntimeError):
+    def __init__(self, filename, reason, *args, **kwargs):
+        self.filename = filename
+        self.reason = reason
+        msg = '{}: {}'.format(filename, reason)
+        super(InvalidLockFile, self).__init__(msg, *args, **kwargs)
+
+
+class UnresolvablePipRequirements(CondaEnvRuntimeError):
+    def __init__(self, requirements, reason, *args, **kwargs):
+        self.requirements = requirements
+        self.reason = reason
+        msg = 'unable to lock pip requirements {}: {}'.format(', '.join(requirements), reason)
+        super(UnresolvablePipRequirements, self).__init__(msg, *args, **kwargs)
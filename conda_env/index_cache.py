@@ -0,0 +1,146 @@
+"""
+A process-wide cache of channel indexes
+
+    index = get_index(['conda-forge', 'nodefaults'])
+
+Loading an index means reading and parsing the repodata of every channel,
+which takes seconds for the larger ones.  Indexes are kept in memory, keyed by
+the channel URLs they were built from, so creating or updating several
+environments from one process loads each set of channels once.  An index is
+reused until conda's on-disk repodata cache for one of its channels changes,
+or until ``invalidate`` or ``clear`` drops it.
+
+Every index loaded is kept unless ``CONDA_ENV_INDEX_CACHE_MB`` caps the total
+size, estimated by the size of the repodata behind each index.  The least
+recently used indexes are dropped first.
+"""
+from __future__ import absolute_import
+from collections import OrderedDict
+import os
+import threading
+
+from conda.cli import common
+from conda.config import get_channel_urls, normalize_urls, pkgs_dirs, prioritize_channels
+from conda.fetch import cache_fn_url
+
+MAX_SIZE_VAR = 'CONDA_ENV_INDEX_CACHE_MB'
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def split_channels(channels):
+    """
+    Return conda's ``channel_urls`` and ``prepend`` arguments for an
+    environment's channels, where ``nodefaults`` leaves out the defaults
+    """
+    return [chan for chan in channels if chan != 'nodefaults'], 'nodefaults' not in channels
+
+
+def effective_channels(channel_urls, prepend=True, platform=None, offline=False):
+    """Return ``{url: (channel, priority)}`` for the URLs conda will fetch"""
+    urls = normalize_urls(list(channel_urls), platform, offline)
+    if prepend:
+        urls.extend(get_channel_urls(platform, offline))
+    return prioritize_channels(urls)
+
+
+def repodata_stamp(url):
+    """The modification time and size of conda's cached repodata for url"""
+    try:
+        st = os.stat(os.path.join(pkgs_dirs[0], 'cache', cache_fn_url(url)))
+    except OSError:
+        return None, 0
+    return st.st_mtime, st.st_size
+
+
+class IndexCache(object):
+    """
+    Indexes by channel URLs, holding up to ``max_size`` bytes of repodata or
+    everything if ``max_size`` is None
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        # key => (stamps, size, index), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, channel_urls, prepend=True, platform=None, offline=False):
+        channels = effective_channels(channel_urls, prepend, platform, offline)
+        return (tuple(sorted(channels.items())), platform, offline), sorted(channels)
+
+    def get(self, channel_urls=(), prepend=True, platform=None, offline=False, json=False):
+        """
+        Return the index for the channels, loading it if it isn't cached or
+        the repodata changed since.  Callers get their own copy, which they
+        are free to add packages to.
+        """
+        key, urls = self.key(channel_urls, prepend, platform, offline)
+        stamps = [repodata_stamp(url) for url in urls]
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] == stamps:
+                self._entries[key] = entry
+                return dict(entry[2])
+
+        index = common.get_index_trap(channel_urls=list(channel_urls), prepend=prepend,
+                                      platform=platform, offline=offline, json=json)
+        # Loading the index may have refreshed the repodata
+        stamps = [repodata_stamp(url) for url in urls]
+        with self._lock:
+            self._entries[key] = (stamps, sum(size for _, size in stamps), index)
+            self._evict()
+        return dict(index)
+
+    def invalidate(self, channel_urls=(), prepend=True, platform=None, offline=False):
+        """Drop the index for the channels, if it is cached"""
+        key, _ = self.key(channel_urls, prepend, platform, offline)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return sum(entry[1] for entry in self._entries.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        if self.max_size is None:
+            return
+        while self._entries and self.size() > self.max_size:
+            self._entries.popitem(last=False)
+
+
+def shared_cache():
+    """Return the cache shared by everything in this process"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            max_size = os.environ.get(MAX_SIZE_VAR)
+            _shared = IndexCache(int(float(max_size) * 1024 * 1024) if max_size else None)
+        return _shared
+
+
+def get_index(channels=(), platform=None, offline=False, json=False):
+    """
+    Return the index for an environment's ``channels`` from the shared cache
+    """
+    channel_urls, prepend = split_channels(channels)
+    return shared_cache().get(channel_urls, prepend, platform=platform, offline=offline,
+                              json=json)
+
+
+def invalidate(channels=(), platform=None, offline=False):
+    """Drop the index for an environment's ``channels`` from the shared cache"""
+    channel_urls, prepend = split_channels(channels)
+    shared_cache().invalidate(channel_urls, prepend, platform=platform, offline=offline)
+
+
+def clear():
+    """Drop every index from the shared cache"""
+    shared_cache().clear()
@@ -1,15 +1,274 @@
+"""
+Installers put one group of an environment's dependencies into a prefix
+
+Every group (``conda``, ``pip``, ...) has an Installer class, made with the
+prefix, the group's specs, the command line arguments and the environment,
+which works in three phases:
+
+    installer = get_installer('pip')(prefix, specs, args, env)
+    plan = installer.plan() # decides what to do, without changing anything
+    fetched = installer.fetch(plan, directory) # downloads, e.g. into directory
+    installer.link(plan, fetched) # installs into prefix
+
+``install_all`` plans every group, fetches for all of them at once and then
+links them in order, timing each phase.  Besides the built-in installers,
+classes registered under the ``conda_env.installers`` entry point group are
+found by name, e.g. in setup.py:
+
+    entry_points={
+        'conda_env.installers': ['npm = mypackage.npm:NpmInstaller'],
+    }
+
+Modules named ``conda_env.installers.<name>`` with an ``install(prefix,
+specs, args, env, prune=False)`` function, and optionally ``prefetch(specs,
+args, env, directory)``, still work as installers too.
+"""
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
 import importlib
+import os
+import shutil
+import tempfile
+import time
+
+from ..compat import with_metaclass
+from ..utils.concurrency import Task
+from ..utils.entry_points import load, scan_entry_points
+
 ENTRY_POINT = 'conda_env.installers'
+MODULE_PREFIX = 'conda_env.installers'
+PHASES = ('plan', 'fetch', 'link')
+
+builtin_installers = OrderedDict([
+    ('conda', 'conda_env.installers.conda:CondaInstaller'),
+    ('pip', 'conda_env.installers.pip:PipInstaller'),
+])
 
 
 class InvalidInstaller(Exception):
     def __init__(self, name):
+        self.name = name
         msg = 'Unable to load installer for {}'.format(name)
         super(InvalidInstaller, self).__init__(msg)
 
 
+class Plan(object):
+    """
+    What an installer is going to do: ``steps`` of ``(action, target)``, such
+    as ``('link', 'numpy-1.11.1-py35_0')``, to show people, and whatever
+    the installer needs in its later phases in ``data``
+    """
+
+    def __init__(self, steps=(), data=None):
+        self.steps = list(steps)
+        self.data = data
+
+    def to_dict(self):
+        return [{'action': action, 'target': target} for action, target in self.steps]
+
+
+class Installer(with_metaclass(ABCMeta)):
+    """
+    Base class for installers.  Subclasses implement ``link``, and ``plan``
+    and ``fetch`` when they have something to do before the prefix changes.
+    ``prune`` is None unless the command asked for it either way.
+    ``plans`` holds the plans of the installers that run before this one, by
+    group name, by the time ``plan`` is called.
+    """
+
+    def __init__(self, prefix, specs, args, env, prune=None):
+        self.prefix = prefix
+        self.specs = specs
+        self.args = args
+        self.env = env
+        self.prune = prune
+        self.plans = OrderedDict()
+
+    def plan(self):
+        return Plan([('install', str(spec)) for spec in self.specs])
+
+    def fetch(self, plan, directory):
+        """
+        Download what the plan needs, e.g. into directory, and return
+        anything ``link`` should be given.  Runs at the same time as the
+        fetch phase of the other installers and the link phase of the ones
+        before this one, so it mustn't touch the prefix.
+        """
+        return None
+
+    @abstractmethod
+    def link(self, plan, fetched=None):
+        """
+        Install what the plan says into the prefix, given what ``fetch``
+        returned
+        """
+
+    def install(self):
+        """Run every phase, one after the other"""
+        staging = tempfile.mkdtemp(prefix='conda-env-staging-')
+        try:
+            plan = self.plan()
+            return self.link(plan, self.fetch(plan, staging))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+
+class ModuleInstaller(Installer):
+    """Runs an installer module written for the single step protocol"""
+    module = None
+
+    @classmethod
+    def wrap(cls, module):
+        return type(cls.__name__, (cls,), {'module': module})
+
+    def fetch(self, plan, directory):
+        if not hasattr(self.module, 'prefetch'):
+            return None
+        try:
+            return self.module.prefetch(self.specs, self.args, self.env, directory)
+        except Exception:
+            # Prefetching only saves time, install can still fetch
+            # everything itself
+            return None
+
+    def link(self, plan, fetched=None):
+        kwargs = {} if self.prune is None else {'prune': self.prune}
+        if fetched is not None:
+            kwargs['staged'] = fetched
+        self.module.install(self.prefix, self.specs, self.args, self.env, **kwargs)
+
+
+class InstallerRegistry(object):
+    """
+    Installer classes by dependency group name: the built-in ones, those
+    registered under the ``conda_env.installers`` entry point group and those
+    passed to ``register``.  ``module:attr`` strings are imported when the
+    installer is first needed.
+    """
+
+    def __init__(self, builtins=None, entry_point=ENTRY_POINT):
+        self.builtins = OrderedDict(builtins or ())
+        self.entry_point = entry_point
+        self._extra = OrderedDict()
+
+    def register(self, name, InstallerClass):
+        self._extra[name] = InstallerClass
+        return InstallerClass
+
+    def _find(self, name):
+        if name in self._extra:
+            return self._extra[name]
+        if name in self.builtins:
+            return self.builtins[name]
+        if self.entry_point is not None:
+            for entry_name, value in scan_entry_points(self.entry_point):
+                if entry_name == name:
+                    return value
+        return None
+
+    def get(self, name):
+        """
+        :raises: InvalidInstaller
+        """
+        found = self._find(name)
+        try:
+            if found is None:
+                return ModuleInstaller.wrap(importlib.import_module(MODULE_PREFIX + '.' + name))
+            if not isinstance(found, type):
+                found = load(found)
+        except (ImportError, AttributeError):
+            raise InvalidInstaller(name)
+        return found
+
+
+installers = InstallerRegistry(builtin_installers)
+
+
 def get_installer(name):
+    """
+    Return the Installer class for the dependency group called name
+    :raises: InvalidInstaller
+    """
+    return installers.get(name)
+
+
+class InstallReport(object):
+    """
+    The plan of every installer and the seconds each of its phases took,
+    by dependency group
+    """
+
+    def __init__(self):
+        self.plans = OrderedDict()
+        self.timings = OrderedDict()
+
+    def record(self, name, phase, seconds):
+        self.timings.setdefault(name, OrderedDict())[phase] = round(seconds, 2)
+
+    def timed(self, name, phase, func, *args):
+        start = time.time()
+        try:
+            return func(*args)
+        finally:
+            self.record(name, phase, time.time() - start)
+
+    def to_dict(self):
+        return OrderedDict((name, OrderedDict([('plan', self.plans[name].to_dict()),
+                                               ('seconds', self.timings.get(name, {}))]))
+                           for name in self.plans)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a report from ``to_dict``, e.g. one sent by another process"""
+        report = cls()
+        for name, group in data.items():
+            report.plans[name] = Plan((step['action'], step['target']) for step in group['plan'])
+            if group['seconds']:
+                report.timings[name] = OrderedDict(group['seconds'])
+        return report
+
+    def format_plans(self):
+        lines = []
+        for name, plan in self.plans.items():
+            lines.append('## %s' % name)
+            lines.extend('    %-8s %s' % step for step in plan.steps)
+            if not plan.steps:
+                lines.append('    nothing to do')
+        return '\n'.join(lines)
+
+    def format_timings(self):
+        return '\n'.join('# %s: %s' % (name, ', '.join('%s %.1fs' % (phase, timings[phase])
+                                                       for phase in PHASES if phase in timings))
+                         for name, timings in self.timings.items())
+
+
+def install_all(prefix, env, args, prune=None, dry_run=False):
+    """
+    Plan every group of env's dependencies, in order, then fetch for all of
+    them at once, so e.g. pip downloads while conda is still fetching and
+    linking, and link them in order.  With ``dry_run``, stop after planning.
+    Returns an InstallReport.
+    :raises: InvalidInstaller before anything is installed
+    """
+    steps = [(name, get_installer(name)(prefix, specs, args, env, prune=prune))
+             for name, specs in env.dependencies.items()]
+
+    report = InstallReport()
+    plans = []
+    for name, installer in steps:
+        installer.plans = OrderedDict(report.plans)
+        plans.append(report.timed(name, 'plan', installer.plan))
+        report.plans[name] = plans[-1]
+    if dry_run:
+        return report
+
+    staging = tempfile.mkdtemp(prefix='conda-env-staging-')
     try:
-        return importlib.import_module(ENTRY_POINT + '.' + name)
-    except ImportError:
-        raise InvalidInstaller(name)
+        fetches = [Task(report.timed, name, 'fetch', installer.fetch, plan,
+                        os.path.join(staging, name))
+                   for (name, installer), plan in zip(steps, plans)]
+        for (name, installer), plan, fetch in zip(steps, plans, fetches):
+            report.timed(name, 'link', installer.link, plan, fetch.result())
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return report
@@ -1,28 +1,208 @@
 from __future__ import absolute_import
+from collections import OrderedDict, defaultdict
+import os
 
+from conda import __version__ as conda_version
+from conda import install as conda_install
+from conda import instructions as inst
 from conda.cli import common
+from conda.config import pkgs_dirs, subdir
+from conda.install import linked
+from conda.utils import md5_file
 from conda import plan
 
+from .. import __version__
+from ..index_cache import get_index, split_channels
+from ..package_spec import PackageSpec
+from ..utils.cache import DiskCache, cache_dir, hash_key
+from ..utils.files import file_lock
+from .base import Installer, Plan
 
-def install(prefix, specs, args, env, prune=False):
-    # TODO: do we need this?
-    common.check_specs(prefix, specs, json=args.json)
-
-    # TODO: support all various ways this happens
-    # Including 'nodefaults' in the channels list disables the defaults
-    index = common.get_index_trap(channel_urls=[chan for chan in env.channels
-                                                     if chan != 'nodefaults'],
-                                  prepend='nodefaults' not in env.channels)
+# Steps of a plan that depend on the state of the package cache
+PACKAGE_CACHE_OPS = (inst.RM_FETCHED, inst.FETCH, inst.RM_EXTRACTED, inst.EXTRACT)
+
+
+def index_fingerprint(index):
+    """A digest of every package (and its md5) in index"""
+    return hash_key(*sorted('%s:%s' % (fn, info.get('md5')) for fn, info in index.items()))
+
+
+def plan_key(prefix, specs, channel_urls, prepend, prune, index):
+    """
+    Everything the solver's answer depends on: the requested specs, the
+    channels, what is already installed or pinned in prefix and the index
+    """
+    return hash_key(__version__, conda_version, subdir, prefix,
+                    repr(sorted(set(specs))), repr(list(channel_urls)), prepend, prune,
+                    repr(sorted(linked(prefix))), repr(sorted(plan.get_pinned_specs(prefix))),
+                    index_fingerprint(index))
+
+
+def solved_actions(actions):
+    """
+    The part of actions that only depends on what plan_key covers, leaving
+    out the steps that depend on what's in the package cache
+    """
+    return dict((op, value) for op, value in actions.items() if op not in PACKAGE_CACHE_OPS)
+
+
+def is_stale(dist, fetched, index):
+    """True if the tarball fetched for dist doesn't match the index's md5"""
+    md5 = (index.get(dist + '.tar.bz2') or {}).get('md5')
+    if not md5:
+        return False
+    try:
+        return md5_file(fetched) != md5
+    except (IOError, OSError):
+        return True
+
+
+def with_package_cache_actions(actions, index):
+    """
+    Add the steps the linked packages of solved actions need, given what
+    the package cache holds now, the same way conda plans them: missing
+    packages are fetched and extracted, and tarballs that don't match the
+    index are removed and fetched again
+    """
+    actions = defaultdict(list, solved_actions(actions))
+    for arg in actions.get(inst.LINK) or []:
+        dist = inst.split_linkarg(arg)[0]
+        fetched = conda_install.is_fetched(dist)
+        if fetched and is_stale(dist, fetched, index):
+            actions[inst.RM_FETCHED].append(dist)
+            actions[inst.FETCH].append(dist)
+            actions[inst.EXTRACT].append(dist)
+            continue
+        if not conda_install.is_extracted(dist):
+            if not fetched:
+                actions[inst.FETCH].append(dist)
+            actions[inst.EXTRACT].append(dist)
+    return actions
+
+
+def install_actions(prefix, index, specs, channel_urls, prepend, prune=False, use_cache=True):
+    """
+    Return plan.install_actions(prefix, index, specs), reusing a previously
+    computed plan for the same inputs when caching is enabled.  Only the
+    solver's answer is cached; what to fetch and extract is worked out again
+    every time, as the package cache may have been cleaned since.
+    """
+    directory = cache_dir('plans') if use_cache else None
+    if directory is None:
+        return plan.install_actions(prefix, index, specs, prune=prune)
+
+    cache = DiskCache(directory)
+    key = plan_key(prefix, specs, channel_urls, prepend, prune, index)
+    solved = cache.get(key)
+    if solved is not None:
+        return with_package_cache_actions(solved, index)
     actions = plan.install_actions(prefix, index, specs, prune=prune)
+    cache.set(key, solved_actions(actions))
+    return actions
+
+
+def package_lock(dist):
+    """A lock for fetching and extracting dist, shared by every process"""
+    return file_lock(os.path.join(pkgs_dirs[0], '.conda-env-locks',
+                                  conda_install.dist2dirname(dist) + '.lock'))
+
 
-    with common.json_progress_bars(json=args.json and not args.quiet):
-        try:
-            plan.execute_actions(actions, index, verbose=not args.quiet)
-        except RuntimeError as e:
-            if len(e.args) > 0 and "LOCKERROR" in e.args[0]:
-                error_type = "AlreadyLocked"
-            else:
-                error_type = "RuntimeError"
-            common.exception_and_exit(e, error_type=error_type, json=args.json)
-        except SystemExit as e:
-            common.exception_and_exit(e, json=args.json)
+def refresh_cached(dist, index):
+    """
+    Tell conda about dist if another process fetched or extracted it since
+    conda scanned the package cache
+    """
+    info = (index or {}).get(dist + '.tar.bz2') or {}
+    if not info.get('url'):
+        return
+    for pkgs_dir in pkgs_dirs:
+        if (os.path.isfile(os.path.join(pkgs_dir, conda_install.dist2filename(dist))) or
+                os.path.isdir(os.path.join(pkgs_dir, conda_install.dist2dirname(dist)))):
+            conda_install.add_cached_package(pkgs_dir, info['url'], overwrite=True)
+            return
+
+
+def fetch_packages(actions, index, verbose=False):
+    """
+    Run the package cache steps of actions (removing stale copies, fetching
+    and extracting) one package at a time under package_lock.  Several
+    processes creating environments from the same package cache then never
+    touch the same package at once, and a package another one got to first
+    is used as it is.
+    """
+    ops = dict((op, actions.get(op) or []) for op in PACKAGE_CACHE_OPS)
+    for dist in OrderedDict.fromkeys(dist for op in PACKAGE_CACHE_OPS for dist in ops[op]):
+        with package_lock(dist):
+            refresh_cached(dist, index)
+            steps = {inst.PREFIX: actions[inst.PREFIX], 'op_order': list(PACKAGE_CACHE_OPS)}
+            # Removing the tarball removes what was extracted from it too
+            refetch = dist in ops[inst.RM_FETCHED]
+            reextract = refetch or dist in ops[inst.RM_EXTRACTED]
+            if refetch:
+                steps[inst.RM_FETCHED] = [dist]
+            if dist in ops[inst.RM_EXTRACTED]:
+                steps[inst.RM_EXTRACTED] = [dist]
+            if dist in ops[inst.FETCH] and (refetch or not conda_install.is_fetched(dist)):
+                steps[inst.FETCH] = [dist]
+            if dist in ops[inst.EXTRACT] and (reextract or not conda_install.is_extracted(dist)):
+                steps[inst.EXTRACT] = [dist]
+            if len(steps) > 2:
+                inst.execute_instructions(plan.plan_from_actions(steps), index, verbose)
+
+
+def link_packages(actions, index, verbose=False):
+    """Run everything in actions but the package cache steps"""
+    rest = dict((op, value) for op, value in actions.items() if op not in PACKAGE_CACHE_OPS)
+    plan.execute_actions(rest, index, verbose=verbose)
+
+
+def execute_actions(actions, index, verbose=False):
+    """plan.execute_actions, fetching under package_lock"""
+    fetch_packages(actions, index, verbose)
+    link_packages(actions, index, verbose)
+
+
+class CondaInstaller(Installer):
+    def plan(self):
+        specs = [common.arg2spec(spec.to_yaml()) if isinstance(spec, PackageSpec) else spec
+                 for spec in self.specs]
+
+        # TODO: do we need this?
+        common.check_specs(self.prefix, specs, json=self.args.json)
+
+        # TODO: support all various ways this happens
+        # Including 'nodefaults' in the channels list disables the defaults
+        channel_urls, prepend = split_channels(self.env.channels)
+        index = get_index(self.env.channels, offline=getattr(self.args, 'offline', False))
+        actions = install_actions(self.prefix, index, specs, channel_urls, prepend,
+                                  prune=bool(self.prune),
+                                  use_cache=not getattr(self.args, 'no_plan_cache', False))
+
+        steps = [('fetch', dist) for dist in actions.get(inst.FETCH) or []]
+        steps.extend(('unlink', dist) for dist in actions.get(inst.UNLINK) or [])
+        steps.extend(('link', inst.split_linkarg(arg)[0]) for arg in actions.get(inst.LINK) or [])
+        return Plan(steps, {'actions': actions, 'index': index})
+
+    def run(self, func, plan):
+        with common.json_progress_bars(json=self.args.json and not self.args.quiet):
+            try:
+                func(plan.data['actions'], plan.data['index'], verbose=not self.args.quiet)
+            except RuntimeError as e:
+                if len(e.args) > 0 and "LOCKERROR" in e.args[0]:
+                    error_type = "AlreadyLocked"
+                else:
+                    error_type = "RuntimeError"
+                common.exception_and_exit(e, error_type=error_type, json=self.args.json)
+            except SystemExit as e:
+                common.exception_and_exit(e, json=self.args.json)
+
+    def fetch(self, plan, directory):
+        # conda fetches into its package cache, not directory
+        self.run(fetch_packages, plan)
+
+    def link(self, plan, fetched=None):
+        self.run(link_packages, plan)
+
+
+def install(prefix, specs, args, env, prune=False):
+    CondaInstaller(prefix, specs, args, env, prune=prune).install()
@@ -1,14 +1,144 @@
 from __future__ import absolute_import
+import os
 import subprocess
+import sys
 
 from conda.cli import common
-from conda_env.pip_util import pip_args
+from conda_env.package_spec import PackageSpec
+from conda_env.pip_util import download_args, pip_args, requirement_args
+from conda_env.wheelhouse import Wheelhouse
+from conda_env.wheels import install_pinned, interpreter_paths
 
+from .base import Installer, Plan
 
-def install(prefix, specs, args, env, prune=False):
-    pip_cmd = pip_args(prefix) + ['install', ] + specs
-    process = subprocess.Popen(pip_cmd, universal_newlines=True)
-    process.communicate()
+
+def target_python(prefix, plans):
+    """
+    Return the ``major.minor`` version of the Python prefix will have, going
+    by the plans linking a python package or the Python already in prefix,
+    or None if there is none
+    """
+    for plan in plans.values():
+        for action, target in plan.steps:
+            if action != 'link':
+                continue
+            try:
+                spec = PackageSpec.from_dist(target)
+            except ValueError:
+                continue
+            if spec.name == 'python':
+                return '.'.join(spec.version.split('.')[:2])
+
+    if sys.platform == 'win32':
+        py_path = os.path.join(prefix, 'python.exe')
+    else:
+        py_path = os.path.join(prefix, 'bin', 'python')
+    if not os.path.isfile(py_path):
+        return None
+    try:
+        return interpreter_paths(py_path)['version']
+    except (OSError, ValueError, KeyError, subprocess.CalledProcessError):
+        return None
+
+
+def prefetch(specs, args, env, directory, python_version=None):
+    """
+    Download specs into directory with the pip conda-env itself runs on, which
+    doesn't have to wait for the prefix's Python to be installed.  When the
+    prefix gets another version of Python, only wheels for that version are
+    downloaded.  Nothing is downloaded if python_version isn't known.
+    Returns directory, or None if nothing could be downloaded.
+    """
+    if python_version is None:
+        return None
+    with requirement_args([str(spec) for spec in specs]) as requirements:
+        process = subprocess.Popen(download_args(directory, python_version) + requirements,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   universal_newlines=True)
+        _, stderr = process.communicate()
+    if process.returncode != 0:
+        errors = stderr.strip().splitlines()
+        sys.stderr.write("# Warning: unable to download pip packages ahead of time%s\n"
+                         % (': ' + errors[-1] if errors else ''))
+    # Even a failed download may have fetched most of the packages
+    if os.path.isdir(directory) and os.listdir(directory):
+        return directory
+    return None
+
+
+def _run_quietly(cmd):
+    """Run cmd, only showing its output if it succeeds"""
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               universal_newlines=True)
+    stdout, _ = process.communicate()
+    if process.returncode == 0:
+        sys.stdout.write(stdout)
+    return process.returncode == 0
+
+
+def install_from_wheelhouse(wheelhouse, lines, staged=None):
+    """
+    Install lines from the shared wheelhouse, building the dependencies it
+    lacks if needed.  Returns True if pip succeeded.
+    """
+    find_links = [staged] if staged is not None else []
+    install_cmd = wheelhouse.pip_cmd + ['install'] + wheelhouse.install_args()
+    with requirement_args(lines) as requirements:
+        if _run_quietly(install_cmd + requirements):
+            return True
+        # Dependencies and unpinned requirements aren't in the wheelhouse yet
+        if not wheelhouse.build(requirements, find_links=find_links):
+            return False
+        process = subprocess.Popen(install_cmd + requirements, universal_newlines=True)
+        process.communicate()
+    return process.returncode == 0
+
+
+def install(prefix, specs, args, env, prune=False, staged=None):
+    # specs may be PackageSpec records or lines from the environment file
+    lines = [str(spec) for spec in specs]
+    if not any(line.startswith(('-e', '--editable')) for line in lines):
+        wheelhouse = Wheelhouse.for_prefix(prefix)
+        find_links = [staged] if staged is not None else []
+        if wheelhouse is not None:
+            wheelhouse.fill(lines, find_links)
+        # Fully pinned requirements can skip pip entirely
+        directories = [wheelhouse.directory] if wheelhouse is not None else []
+        if install_pinned(prefix, lines, directories, find_links):
+            return
+        if wheelhouse is not None and install_from_wheelhouse(wheelhouse, lines, staged):
+            return
+
+    pip_cmd = pip_args(prefix) + ['install', ]
+    if staged is not None:
+        # Anything that isn't there, or doesn't suit the prefix's Python,
+        # still comes from the index
+        pip_cmd += ['--find-links', staged]
+
+    with requirement_args(lines) as requirements:
+        process = subprocess.Popen(pip_cmd + requirements, universal_newlines=True)
+        process.communicate()
 
     if process.returncode != 0:
         common.exception_and_exit(ValueError("pip returned an error."))
+
+
+class PipInstaller(Installer):
+    def plan(self):
+        lines = [str(spec) for spec in self.specs]
+        return Plan([('install', line) for line in lines],
+                    {'lines': lines, 'python': target_python(self.prefix, self.plans)})
+
+    def fetch(self, plan, directory):
+        try:
+            return prefetch(plan.data['lines'], self.args, self.env, directory,
+                            python_version=plan.data['python'])
+        except Exception as e:
+            # Prefetching only saves time, link still fetches what's missing
+            sys.stderr.write("# Warning: unable to download pip packages ahead of time: %s\n"
+                             % e)
+            return None
+
+    def link(self, plan, fetched=None):
+        install(self.prefix, plan.data['lines'], self.args, self.env, prune=bool(self.prune),
+                staged=fetched)
@@ -0,0 +1,215 @@
+"""
+Lock an environment to the exact packages it resolves to
+
+    lock = resolve(environment) # solves once, against the current index
+    lock.save('environment.lock.yml')
+
+    lock = Lock.load('environment.lock.yml')
+    lock.install(prefix, args) # fetches and links those packages, no index, no solve
+
+The lock file lists the URL and md5 of every conda package, in link order,
+along with the index record conda needs to link it, the channels the
+environment was resolved against and every pip package, dependencies
+included, pinned with ``==`` to the file pip downloaded for the locked
+Python and that file's sha256, so installing it runs pip in hash-checking
+mode.
+"""
+from __future__ import absolute_import, print_function
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+from conda import instructions as inst
+from conda import plan
+from conda.config import subdir, url_channel
+from conda.misc import explicit
+
+from . import yaml
+from .exceptions import InvalidLockFile, UnresolvablePipRequirements
+from .index_cache import get_index
+from .installers.base import get_installer
+from .package_spec import PIP
+from .pip_util import download_args, requirement_args
+from .requirements_file import canonical_name
+from .utils.files import atomic_open
+from .wheelhouse import parse_wheel_name
+
+LOCK_VERSION = 1
+# The parts of an index record conda uses to fetch and link a package
+RECORD_KEYS = ('name', 'version', 'build', 'build_number', 'depends', 'features',
+               'track_features', 'size', 'md5', 'url', 'fn')
+
+_sdist = re.compile(r'^(?P<name>.+?)-(?P<version>\d[^-]*?)\.(tar\.gz|tar\.bz2|tgz|zip)$')
+
+
+def default_filename(filename):
+    """environment.yml => environment.lock.yml"""
+    return os.path.splitext(filename)[0] + '.lock.yml'
+
+
+class Lock(object):
+    def __init__(self, name=None, platform=subdir, channels=None, packages=None, pip=None):
+        self.name = name
+        self.platform = platform
+        self.channels = channels or []
+        self.packages = packages or []
+        self.pip = pip or []
+        self.filename = None
+
+    def to_dict(self):
+        d = yaml.dict([('version', LOCK_VERSION), ('name', self.name),
+                       ('platform', self.platform), ('channels', self.channels)])
+        d['packages'] = [yaml.dict((key, record[key]) for key in RECORD_KEYS if key in record)
+                         for record in self.packages]
+        if self.pip:
+            d['pip'] = self.pip
+        return d
+
+    def to_yaml(self, stream=None):
+        return yaml.dump(self.to_dict(), stream, default_flow_style=False)
+
+    def save(self, filename):
+        with atomic_open(filename) as fp:
+            fp.write("# Generated by conda env lock, don't edit by hand\n".encode('utf-8'))
+            fp.write(self.to_yaml().encode('utf-8'))
+
+    @classmethod
+    def load(cls, filename):
+        """
+        :raises: InvalidLockFile
+        """
+        try:
+            with open(filename, 'rb') as fp:
+                data = yaml.load(fp.read().decode('utf-8'))
+        except (IOError, OSError) as e:
+            raise InvalidLockFile(filename, e.strerror or str(e))
+        except Exception as e:
+            raise InvalidLockFile(filename, str(e))
+
+        if not isinstance(data, dict) or data.get('version') != LOCK_VERSION:
+            raise InvalidLockFile(filename, 'not a version {} lock file'.format(LOCK_VERSION))
+        for record in data.get('packages') or []:
+            if not isinstance(record, dict) or not record.get('url') or not record.get('fn'):
+                raise InvalidLockFile(filename, 'every package needs a url and fn')
+        lock = cls(data.get('name'), data.get('platform'), data.get('channels'),
+                   data.get('packages'), data.get('pip'))
+        lock.filename = filename
+        return lock
+
+    def urls(self):
+        """The packages in conda's explicit ``url#md5`` form"""
+        return ['{}#{}'.format(r['url'], r['md5']) if r.get('md5') else r['url']
+                for r in self.packages]
+
+    def index(self):
+        """
+        An index holding just the locked packages, keyed the way conda keys
+        them on this machine
+        """
+        index = {}
+        for record in self.packages:
+            channel, schannel = url_channel(record['url'])
+            info = dict(record, channel=channel, schannel=schannel)
+            prefix = '' if schannel == 'defaults' else schannel + '::'
+            index[prefix + record['fn']] = info
+        return index
+
+    def check_platform(self):
+        """
+        :raises: InvalidLockFile if the lock was made for another platform
+        """
+        if self.platform != subdir:
+            raise InvalidLockFile(self.filename or self.name, 'locked for {}, this is {}'.format(
+                self.platform, subdir))
+
+    def install(self, prefix, args):
+        """
+        Fetch and link exactly the locked packages into prefix, then install
+        the pip requirements
+        :raises: InvalidLockFile
+        """
+        self.check_platform()
+        if self.packages:
+            explicit(self.urls(), prefix, verbose=not args.quiet, index=self.index())
+        if self.pip:
+            get_installer(PIP)(prefix, self.pip, args, None).install()
+
+
+def artifact_pin(filename):
+    """
+    Return ``(project, version)`` for a wheel or sdist's file name, or None
+    if it's neither
+    """
+    parsed = parse_wheel_name(filename)
+    if parsed is not None:
+        return parsed[:2]
+    match = _sdist.match(filename)
+    if match is None:
+        return None
+    return canonical_name(match.group('name')), match.group('version')
+
+
+def lock_pip(lines, python_version=None):
+    """
+    Download the requirement lines and everything they depend on for the
+    ``major.minor`` python_version, and return a ``name==version
+    --hash=sha256:...`` line for every file pip picked
+    :raises: UnresolvablePipRequirements
+    """
+    editable = [line for line in lines if line.startswith(('-e', '--editable'))]
+    if editable:
+        raise UnresolvablePipRequirements(editable, "editable requirements can't be locked")
+
+    directory = tempfile.mkdtemp(prefix='conda-env-lock-pip-')
+    try:
+        with requirement_args(lines) as requirements:
+            process = subprocess.Popen(download_args(directory, python_version) + requirements,
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       universal_newlines=True)
+            _, stderr = process.communicate()
+        if process.returncode != 0:
+            errors = stderr.strip().splitlines()
+            raise UnresolvablePipRequirements(lines, errors[-1] if errors else
+                                              'pip download exited with %d' % process.returncode)
+
+        pins = []
+        for filename in sorted(os.listdir(directory)):
+            pin = artifact_pin(filename)
+            if pin is None:
+                raise UnresolvablePipRequirements(lines, 'pip downloaded ' + filename)
+            with open(os.path.join(directory, filename), 'rb') as fp:
+                digest = hashlib.sha256(fp.read()).hexdigest()
+            pins.append('%s==%s --hash=sha256:%s' % (pin + (digest,)))
+        return pins
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def resolve(environment):
+    """
+    Solve environment's conda dependencies, then its pip ones for the Python
+    that solve picked, and return the Lock for them
+    :raises: UnresolvablePipRequirements
+    """
+    channels = list(environment.channels)
+    index = get_index(channels)
+    specs = environment.dependencies.get('conda', [])
+
+    # Resolve as if creating the environment from scratch
+    prefix = tempfile.mkdtemp(prefix='conda-env-lock-')
+    os.rmdir(prefix)
+    actions = plan.install_actions(prefix, index, specs)
+
+    packages = []
+    for link in actions.get(inst.LINK, []):
+        fn = inst.split_linkarg(link)[0] + '.tar.bz2'
+        packages.append(dict((key, index[fn][key]) for key in RECORD_KEYS if key in index[fn]))
+
+    pip = [str(spec) for spec in environment.dependencies.records(PIP)]
+    if pip:
+        python = [record['version'] for record in packages if record['name'] == 'python']
+        pip = lock_pip(pip, '.'.join(python[0].split('.')[:2]) if python else None)
+    return Lock(environment.name, subdir, channels, packages, pip)
@@ -0,0 +1,133 @@
+"""
+Compact records describing a single dependency of an environment
+
+    spec = PackageSpec.from_line('numpy=1.9=py27_0')
+    spec.name, spec.version, spec.build # => 'numpy', '1.9', 'py27_0'
+    str(spec) # => 'numpy=1.9=py27_0'
+
+Names, builds, channels and installers are interned so holding many
+environments with the same packages doesn't keep copies of those strings.
+"""
+from __future__ import absolute_import
+import re
+
+from .compat import intern
+
+CONDA = 'conda'
+PIP = 'pip'
+OPERATORS = '<>=!~'
+
+_conda_pat = re.compile(r'''
+^\s*
+(?:(?P<channel>[^:\s]+)::)?        # optional channel::
+(?P<name>[^=<>!\s]+)               # package name
+\s*
+(?P<constraint>[^\#]*?)            # =version=build, >=version or "version build"
+\s*(?:\#.*)?$                      # ignore comments
+''', re.VERBOSE)
+_pip_pat = re.compile(r'^\s*(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)(?P<constraint>[\[<>=!~;@\s].*)?$')
+
+
+def _intern(value):
+    return None if value is None else intern(str(value))
+
+
+class PackageSpec(object):
+    """A dependency as a name, version constraint, build, channel and installer"""
+    __slots__ = ('name', 'version', 'build', 'channel', 'installer')
+
+    def __init__(self, name, version=None, build=None, channel=None, installer=CONDA):
+        self.name = _intern(name)
+        self.version = version or None
+        self.build = _intern(build or None)
+        self.channel = _intern(channel or None)
+        self.installer = _intern(installer)
+
+    @classmethod
+    def from_line(cls, line, installer=CONDA):
+        """Parse a dependency as written in an environment file"""
+        line = line.strip()
+        if installer != CONDA:
+            m = _pip_pat.match(line)
+            if m is None:
+                # URLs, paths and editables are kept as they are
+                return cls(line, installer=installer)
+            constraint = (m.group('constraint') or '').strip()
+            # A plain ==version pin is stored as just the version; anything
+            # else, ===arbitrary equality included, keeps its operator
+            if (constraint.startswith('==') and not constraint.startswith('===')
+                    and not re.search(r'[,;\[\s]', constraint)):
+                constraint = constraint[2:]
+            return cls(m.group('name'), constraint, installer=installer)
+
+        m = _conda_pat.match(line)
+        if m is None:
+            return cls(line, installer=installer)
+        name, constraint = m.group('name'), m.group('constraint')
+        version = build = None
+        if constraint.startswith('=') and not constraint.startswith('=='):
+            parts = constraint[1:].split('=', 1)
+            version, build = parts[0], parts[1] if len(parts) > 1 else None
+        elif constraint and constraint[0] in OPERATORS:
+            version = constraint.replace(' ', '')
+        elif constraint:
+            parts = constraint.split()
+            version, build = parts[0], parts[1] if len(parts) > 1 else None
+        return cls(name, version, build, m.group('channel'), installer)
+
+    @classmethod
+    def from_dist(cls, dist, installer=CONDA):
+        """Parse a canonical ``[channel::]name-version-build`` dist name"""
+        channel = None
+        if '::' in dist:
+            channel, dist = dist.split('::', 1)
+        name, version, build = dist.rsplit('-', 2)
+        return cls(name, version, build, channel, installer)
+
+    @property
+    def key(self):
+        """The name this package is looked up by"""
+        if self.installer == CONDA:
+            return self.name.lower()
+        if _pip_pat.match(self.name) is None:
+            return self.name
+        return re.sub(r'[-_.]+', '-', self.name).lower()
+
+    def without_build(self):
+        return PackageSpec(self.name, self.version, None, self.channel, self.installer)
+
+    def to_yaml(self):
+        """Return the spec as it is written in an environment file"""
+        version = self.version
+        if self.installer != CONDA:
+            if not version:
+                return self.name
+            if version[0] in OPERATORS + '[;@':
+                return self.name + version
+            return self.name + '==' + version
+
+        spec = self.name if self.channel is None else self.channel + '::' + self.name
+        if not version:
+            return spec
+        if version[0] in OPERATORS:
+            return spec + version
+        return '='.join(part for part in (spec, version, self.build) if part)
+
+    __str__ = to_yaml
+
+    def __repr__(self):
+        return 'PackageSpec(%r)' % self.to_yaml()
+
+    def _astuple(self):
+        return (self.name, self.version, self.build, self.channel, self.installer)
+
+    def __eq__(self, other):
+        if not isinstance(other, PackageSpec):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._astuple())
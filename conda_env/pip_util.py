@@ -4,16 +4,35 @@ Functions related to core conda functionality that relates to pip
 NOTE: This modules used to in conda, as conda/pip.py
 """
 from __future__ import absolute_import, print_function
-from os.path import isfile, join
+from collections import OrderedDict
+from contextlib import contextmanager
+from glob import glob
+from os.path import isdir, isfile, join, normpath
+import io
+import json
+import os
 import re
 import subprocess
 import sys
+import tempfile
+try:
+    from urllib.parse import urlparse
+    from urllib.request import url2pathname
+except ImportError:
+    from urlparse import urlparse
+    from urllib import url2pathname
 
+from .package_spec import PackageSpec
+from .utils.cache import DiskCache, cache_dir, hash_key
 
-def pip_args(prefix):
+# Probed capabilities of every pip seen by this process, see pip_capabilities
+_capabilities = {}
+
+
+def pip_paths(prefix):
     """
-    return the arguments required to invoke pip (in prefix), or None if pip
-    is not installed
+    return the paths of the python interpreter and pip script in prefix, or
+    None if pip is not installed
     """
     if sys.platform == 'win32':
         pip_path = join(prefix, 'Scripts', 'pip-script.py')
@@ -22,18 +41,117 @@ def pip_args(prefix):
         pip_path = join(prefix, 'bin', 'pip')
         py_path = join(prefix, 'bin', 'python')
     if isfile(pip_path) and isfile(py_path):
-        ret = [py_path, pip_path]
+        return py_path, pip_path
+    return None
 
-        # Check the version of pip
+
+def _version_tuple(version):
+    parts = []
+    for part in version.split('.'):
+        m = re.match(r'\d+', part)
+        if m is None:
+            break
+        parts.append(int(m.group()))
+    return tuple(parts)
+
+
+def probe_pip(py_path, pip_path):
+    """
+    run pip and return a dict of the features it supports
+    """
+    pip_version = subprocess.check_output([py_path, pip_path, '-V']).decode('utf-8').split()[1]
+    version = _version_tuple(pip_version)
+    return {
+        'version': pip_version,
         # --disable-pip-version-check was introduced in pip 6.0
         # If older than that, they should probably get the warning anyway.
-        pip_version = subprocess.check_output(ret + ['-V']).decode('utf-8').split()[1]
-        major_ver = pip_version.split('.')[0]
-        if int(major_ver) >= 6:
-            ret.append('--disable-pip-version-check')
-        return ret
-    else:
+        'disable_version_check': version >= (6,),
+        # pip list --format=json was introduced in pip 9.0
+        'json_list': version >= (9,),
+        # --progress-bar was introduced in pip 10.0
+        'progress_bar': version >= (10,),
+    }
+
+
+def pip_capabilities(prefix):
+    """
+    return the features supported by the pip installed in prefix, or None if
+    pip is not installed
+
+    Probing means starting pip, so results are cached by the paths and
+    modification times of pip and python.  Upgrading either invalidates
+    the cache.  Results are also kept on disk if caching is enabled.
+    """
+    paths = pip_paths(prefix)
+    if paths is None:
+        return None
+    py_path, pip_path = paths
+    key = hash_key(py_path, os.path.getmtime(py_path),
+                   pip_path, os.path.getmtime(pip_path))
+
+    capabilities = _capabilities.get(key)
+    if capabilities is not None:
+        return capabilities
+
+    directory = cache_dir('pip')
+    cache = DiskCache(directory) if directory is not None else None
+    if cache is not None:
+        capabilities = cache.get(key)
+    if capabilities is None:
+        capabilities = probe_pip(py_path, pip_path)
+        if cache is not None:
+            cache.set(key, capabilities)
+    _capabilities[key] = capabilities
+    return capabilities
+
+
+def pip_args(prefix):
+    """
+    return the arguments required to invoke pip (in prefix), or None if pip
+    is not installed
+    """
+    capabilities = pip_capabilities(prefix)
+    if capabilities is None:
         return None
+    ret = list(pip_paths(prefix))
+    if capabilities['disable_version_check']:
+        ret.append('--disable-pip-version-check')
+    return ret
+
+
+def _needs_requirements_file(lines):
+    # Options and hashes are only understood inside a requirements file
+    return any(line.startswith('-') or ' --' in line for line in lines)
+
+
+@contextmanager
+def requirement_args(lines):
+    """Yield the pip arguments for lines, writing them to a file if needed"""
+    if not _needs_requirements_file(lines):
+        yield lines
+        return
+
+    fd, requirements = tempfile.mkstemp(prefix='conda-env-', suffix='.txt')
+    try:
+        with os.fdopen(fd, 'w') as fp:
+            fp.write('\n'.join(lines) + '\n')
+        yield ['-r', requirements]
+    finally:
+        os.remove(requirements)
+
+
+def download_args(directory, python_version=None):
+    """
+    Return the arguments downloading requirements into directory with the
+    pip conda-env runs on, for the ``major.minor`` python_version
+    """
+    cmd = [sys.executable, '-m', 'pip', 'download', '--quiet', '--dest', directory]
+    if python_version is not None and python_version != '%d.%d' % sys.version_info[:2]:
+        # pip can't build sdists for a Python it doesn't run on; the
+        # platform is this machine's either way
+        cmd += ['--only-binary=:all:', '--implementation', 'cp',
+                '--python-version', python_version.replace('.', '')]
+    return cmd
 
 
 class PipPackage(dict):
@@ -47,25 +165,154 @@ class PipPackage(dict):
         return '%s-%s-<pip>' % (self['name'], self['version'])
 
 
+def site_packages(prefix):
+    """return the site-packages directories of prefix"""
+    if sys.platform == 'win32':
+        candidates = [join(prefix, 'Lib', 'site-packages')]
+    else:
+        candidates = sorted(glob(join(prefix, 'lib', 'python*', 'site-packages')))
+    return [d for d in candidates if isdir(d)]
+
+
+def _read_name_version(path):
+    """return the Name and Version headers of a METADATA or PKG-INFO file"""
+    headers = {}
+    with io.open(path, encoding='utf-8', errors='replace') as fp:
+        for line in fp:
+            if not line.strip():
+                # The body of the metadata starts after the first blank line
+                break
+            key, sep, value = line.partition(':')
+            if sep and key in ('Name', 'Version'):
+                headers[key] = value.strip()
+                if len(headers) == 2:
+                    break
+    return headers.get('Name'), headers.get('Version')
+
+
+def _metadata_path(directory, entry):
+    path = join(directory, entry)
+    if entry.endswith('.dist-info'):
+        return join(path, 'METADATA')
+    if entry.endswith('.egg-info'):
+        return join(path, 'PKG-INFO') if isdir(path) else path
+    return None
+
+
+def _editable_location(dist_info):
+    """return where a PEP 660 editable install points to, if it is one"""
+    try:
+        with io.open(join(dist_info, 'direct_url.json'), encoding='utf-8') as fp:
+            direct_url = json.load(fp)
+    except (IOError, OSError, ValueError):
+        return None
+    if not direct_url.get('dir_info', {}).get('editable'):
+        return None
+    return url2pathname(urlparse(direct_url['url']).path)
+
+
+def _egg_link_package(egg_link):
+    """return the PipPackage for a `setup.py develop` install"""
+    try:
+        with io.open(egg_link, encoding='utf-8', errors='replace') as fp:
+            location = normpath(fp.readline().strip())
+        entries = sorted(os.listdir(location))
+    except (IOError, OSError):
+        # The project the link points to has gone away
+        return None
+    for entry in entries:
+        metadata = _metadata_path(location, entry)
+        if metadata is not None and entry.endswith('.egg-info') and isfile(metadata):
+            name, version = _read_name_version(metadata)
+            if name and version:
+                return _develop_package(name, version, location)
+    return None
+
+
+def _develop_package(name, version, path):
+    # Matches what pip list reports as "name (version, path)", see below
+    return PipPackage(name=name.lower(), version=version.replace('-', ' '), path=path)
+
+
+def installed_from_metadata(prefix):
+    """
+    return a PipPackage for every distribution in the site-packages of
+    prefix, read straight from its metadata
+    :raises: IOError, OSError
+    """
+    packages = OrderedDict()
+    for directory in site_packages(prefix):
+        for entry in sorted(os.listdir(directory)):
+            if entry.endswith('.egg-link'):
+                pkg = _egg_link_package(join(directory, entry))
+                if pkg is not None:
+                    # Develop installs take precedence over stale metadata
+                    packages[pkg['name']] = pkg
+                continue
+
+            metadata = _metadata_path(directory, entry)
+            if metadata is None or not isfile(metadata):
+                continue
+            name, version = _read_name_version(metadata)
+            if not name or not version or name.lower() in packages:
+                continue
+            location = None
+            if entry.endswith('.dist-info'):
+                location = _editable_location(join(directory, entry))
+            if location is not None:
+                pkg = _develop_package(name, version, location)
+            else:
+                pkg = PipPackage(name=name.lower(), version=version)
+            packages[pkg['name']] = pkg
+    return list(packages.values())
+
+
 def installed(prefix, output=True):
+    if pip_paths(prefix) is None:
+        return
+    try:
+        packages = installed_from_metadata(prefix)
+    except (IOError, OSError):
+        packages = None
+    if not packages:
+        # No readable site-packages, ask pip itself
+        packages = installed_from_pip(prefix, output=output)
+    for pkg in packages:
+        yield pkg
+
+
+def installed_from_pip(prefix, output=True):
     args = pip_args(prefix)
     if args is None:
         return
+    json_list = pip_capabilities(prefix)['json_list']
     args.append('list')
+    if json_list:
+        args.append('--format=json')
     try:
         pipinst = subprocess.check_output(
             args, universal_newlines=True
-        ).splitlines()
+        )
     except Exception:
         # Any error should just be ignored
         if output:
             print("# Warning: subprocess call to pip failed")
         return
 
+    if json_list:
+        for pkg in json.loads(pipinst):
+            location = pkg.get('editable_project_location')
+            if location:
+                yield _develop_package(pkg['name'], pkg['version'], location)
+            else:
+                yield PipPackage(name=pkg['name'].lower(), version=pkg['version'])
+        return
+    pipinst = pipinst.splitlines()
+
     # For every package in pipinst that is not already represented
     # in installed append a fake name to installed with 'pip'
     # as the build string
-    pat = re.compile('([\w.-]+)\s+\((.+)\)')
+    pat = re.compile(r'([\w.-]+)\s+\((.+)\)')
     for line in pipinst:
         line = line.strip()
         if not line:
@@ -98,16 +345,23 @@ def installed(prefix, output=True):
         yield PipPackage(**kwargs)
 
 
+def merge_pip_installed(installed_pkgs, pip_pkgs):
+    """
+    Add every ``PipPackage`` in ``pip_pkgs`` that isn't already installed by
+    conda to ``installed_pkgs``
+    """
+    # installed_pkgs holds canonical dist names, which may carry a channel
+    conda_names = {PackageSpec.from_dist(d).name for d in installed_pkgs}
+
+    for pip_pkg in pip_pkgs:
+        if pip_pkg['name'] in conda_names and not 'path' in pip_pkg:
+            continue
+        installed_pkgs.add(str(pip_pkg))
+
+
 def add_pip_installed(prefix, installed_pkgs, json=None, output=True):
     # Defer to json for backwards compatibility
     if type(json) is bool:
         output = not json
 
-    # TODO Refactor so installed is a real list of objects/dicts
-    #      instead of strings allowing for direct comparison
-    conda_names = {d.rsplit('-', 2)[0] for d in installed_pkgs}
-
-    for pip_pkg in installed(prefix, output=output):
-        if pip_pkg['name'] in conda_names and not 'path' in pip_pkg:
-            continue
-        installed_pkgs.add(str(pip_pkg))
+    merge_pip_installed(installed_pkgs, installed(prefix, output=output))
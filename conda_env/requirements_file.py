@@ -0,0 +1,279 @@
+"""
+Compile requirements.txt files into a single, deduplicated set of requirements
+
+    compiled = compile_file('requirements.txt')
+    compiled.requirements # => OrderedDict of Requirement by project
+    compiled.options # => global options such as --index-url=..., in order
+    compiled.lines() # => options and requirements, one per line
+
+Nested ``-r`` requirement and ``-c`` constraint files are followed relative to
+the file that includes them.  Requirements for the same project are merged
+into one, constraints only apply to projects that are actually required, and
+hashes and options are kept so pip can install everything in one go.  Each
+file is parsed once per process however many times it is included; parses are
+looked up by the hash of the file's contents.
+"""
+from __future__ import absolute_import
+from collections import OrderedDict
+import hashlib
+import io
+import os
+import re
+import shlex
+
+from .exceptions import InvalidRequirementsFile
+
+# Options that apply to the whole install, by their short and long names
+GLOBAL_OPTIONS = {
+    '-i': '--index-url',
+    '--index-url': '--index-url',
+    '--extra-index-url': '--extra-index-url',
+    '-f': '--find-links',
+    '--find-links': '--find-links',
+    '--trusted-host': '--trusted-host',
+    '--no-binary': '--no-binary',
+    '--only-binary': '--only-binary',
+}
+GLOBAL_FLAGS = ['--no-index', '--pre', '--prefer-binary', '--require-hashes']
+
+_comment = re.compile(r'(^|\s+)#.*$')
+_requirement = re.compile(r'''
+^(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)
+\s*(?:\[(?P<extras>[^\]]*)\])?
+\s*(?P<specifier>[^;@\s][^;@]*?)?
+\s*(?:;\s*(?P<marker>.+?))?\s*$
+''', re.VERBOSE)
+
+_opaque = re.compile(r'[/\\]|^\.|::')
+_operator_space = re.compile(r'([<>=!~]+)\s+')
+
+_parsed = {}
+
+
+def canonical_name(name):
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+class Requirement(object):
+    """
+    One requirement: a project name with extras, version specifiers, an
+    environment marker and hashes, or an opaque ``line`` for URLs, paths,
+    editables and channel::name specs, which are only ever deduplicated
+    """
+
+    def __init__(self, name=None, extras=(), specifiers=(), marker=None, hashes=(),
+                 line=None):
+        self.name = name
+        self.extras = list(extras)
+        self.specifiers = list(specifiers)
+        self.marker = marker
+        self.hashes = list(hashes)
+        self.line = line
+
+    @classmethod
+    def parse(cls, text, hashes=()):
+        if text.startswith(('-e', '--editable')) or _opaque.search(text):
+            return cls(line=text, hashes=hashes)
+        m = _requirement.match(text)
+        if m is None:
+            return cls(line=text, hashes=hashes)
+        specifiers = [_operator_space.sub(r'\1', s).strip()
+                      for s in (m.group('specifier') or '').split(',')]
+        return cls(
+            name=m.group('name'),
+            extras=[e.strip() for e in (m.group('extras') or '').split(',') if e.strip()],
+            specifiers=[s for s in specifiers if s],
+            marker=m.group('marker'),
+            hashes=hashes,
+        )
+
+    @property
+    def key(self):
+        if self.name is None:
+            return (self.line, None)
+        return (canonical_name(self.name), self.marker)
+
+    @property
+    def pip_only(self):
+        """True if conda can't install this requirement"""
+        if self.name is None:
+            # Only conda's channel::name specs are opaque and not pip's
+            return '::' not in self.line
+        return bool(self.extras or self.marker or self.hashes)
+
+    def merge(self, other):
+        """Return a requirement satisfying both self and other"""
+        def union(a, b):
+            return list(OrderedDict.fromkeys(a + b))
+
+        return Requirement(self.name, union(self.extras, other.extras),
+                           union(self.specifiers, other.specifiers), self.marker,
+                           union(self.hashes, other.hashes), self.line)
+
+    def to_line(self):
+        if self.name is None:
+            line = self.line
+        else:
+            line = self.name
+            if self.extras:
+                line += '[%s]' % ','.join(self.extras)
+            specifier = ','.join(self.specifiers)
+            if specifier and specifier[0] not in '<>=!~':
+                # conda's "name version build" form
+                line += ' '
+            line += specifier
+            if self.marker:
+                line += '; ' + self.marker
+        return ' '.join([line] + ['--hash=' + h for h in self.hashes])
+
+    __str__ = to_line
+
+    def __repr__(self):
+        return 'Requirement(%r)' % self.to_line()
+
+
+class CompiledRequirements(object):
+    def __init__(self):
+        self.requirements = OrderedDict()
+        self.constraints = OrderedDict()
+        self.options = []
+        self.files = []
+
+    def add(self, requirement, constraint=False):
+        target = self.constraints if constraint else self.requirements
+        key = requirement.key
+        target[key] = target[key].merge(requirement) if key in target else requirement
+
+    def add_option(self, option):
+        if option not in self.options:
+            self.options.append(option)
+
+    def apply_constraints(self):
+        for key, constraint in self.constraints.items():
+            if key in self.requirements:
+                self.requirements[key] = self.requirements[key].merge(constraint)
+
+    @property
+    def pip_only(self):
+        """True if installing these needs pip: they use options, hashes or URLs"""
+        return bool(self.options) or any(r.pip_only for r in self.requirements.values())
+
+    def lines(self):
+        return self.options + [r.to_line() for r in self.requirements.values()]
+
+
+def _logical_lines(text):
+    """Join continued lines and drop comments and blank lines"""
+    pending = ''
+    for line in text.splitlines():
+        if line.endswith('\\'):
+            pending += line[:-1]
+            continue
+        line = _comment.sub('', pending + line).strip()
+        pending = ''
+        if line:
+            yield line
+
+
+def _split_option(tokens):
+    """Split ``['--opt=value']`` or ``['--opt', 'value']`` into the option and value"""
+    option = tokens[0]
+    if '=' in option and option.startswith('--'):
+        option, value = option.split('=', 1)
+        return option, value
+    if len(option) > 2 and not option.startswith('--'):
+        # -rfile
+        return option[:2], option[2:]
+    return option, ' '.join(tokens[1:]) or None
+
+
+def parse(text, filename='<string>'):
+    """
+    Parse the contents of a requirements file into a tuple of
+    ``('requirement', Requirement)``, ``('include', path, is_constraint)`` and
+    ``('option', option)`` entries
+    """
+    entries = []
+    for line in _logical_lines(text):
+        if line.startswith('-') and not line.startswith(('-e', '--editable')):
+            try:
+                tokens = shlex.split(line)
+            except ValueError as e:
+                raise InvalidRequirementsFile(filename, '%s: %s' % (line, e))
+            option, value = _split_option(tokens)
+            if option in ('-r', '--requirement', '-c', '--constraint'):
+                if not value:
+                    raise InvalidRequirementsFile(filename, '%s needs a file name' % option)
+                entries.append(('include', value, option in ('-c', '--constraint')))
+            elif option in GLOBAL_OPTIONS:
+                if not value:
+                    raise InvalidRequirementsFile(filename, '%s needs a value' % option)
+                entries.append(('option', '%s=%s' % (GLOBAL_OPTIONS[option], value)))
+            elif option in GLOBAL_FLAGS:
+                entries.append(('option', option))
+            else:
+                raise InvalidRequirementsFile(filename, 'unsupported option %s' % option)
+            continue
+
+        hashes = []
+        if ' --' in line:
+            line, _, options = line.partition(' --')
+            for option in shlex.split('--' + options):
+                if not option.startswith('--hash='):
+                    raise InvalidRequirementsFile(filename, 'unsupported option %s' % option)
+                hashes.append(option[len('--hash='):])
+            line = line.strip()
+        entries.append(('requirement', Requirement.parse(line, hashes)))
+    return tuple(entries)
+
+
+def parse_file(filename):
+    """Parse filename, reusing the result for files with the same contents"""
+    try:
+        with io.open(filename, 'rb') as fp:
+            content = fp.read()
+    except (IOError, OSError) as e:
+        raise InvalidRequirementsFile(filename, e.strerror or str(e))
+    digest = hashlib.sha256(content).hexdigest()
+    if digest not in _parsed:
+        _parsed[digest] = parse(content.decode('utf-8'), filename)
+    return _parsed[digest]
+
+
+def _compile(filename, compiled, stack, seen, constraint):
+    path = os.path.realpath(filename)
+    if path in stack:
+        chain = stack[stack.index(path):] + [path]
+        raise InvalidRequirementsFile(filename, 'include cycle: %s' % ' -> '.join(chain))
+    if (path, constraint) in seen:
+        # Already included through another file
+        return
+    seen.add((path, constraint))
+    compiled.files.append(filename)
+
+    stack.append(path)
+    directory = os.path.dirname(filename)
+    for entry in parse_file(filename):
+        kind = entry[0]
+        if kind == 'requirement':
+            compiled.add(entry[1], constraint)
+        elif kind == 'option':
+            compiled.add_option(entry[1])
+        else:
+            if '://' in entry[1]:
+                raise InvalidRequirementsFile(filename, "can't include remote file %s" % entry[1])
+            include = os.path.join(directory, os.path.expanduser(entry[1]))
+            # Anything below a constraints file is a constraint as well
+            _compile(include, compiled, stack, seen, constraint or entry[2])
+    stack.pop()
+
+
+def compile_file(filename):
+    """
+    Follow every include of filename and return its CompiledRequirements
+    :raises: InvalidRequirementsFile
+    """
+    compiled = CompiledRequirements()
+    _compile(os.path.abspath(filename), compiled, [], set(), False)
+    compiled.apply_constraints()
+    return compiled
@@ -3,8 +3,12 @@ from .yaml_file import YamlFileSpec
 from .notebook import NotebookSpec
 from .requirements import RequirementsSpec
 from ..exceptions import SpecNotFound
+from ..utils.entry_points import load_entry_points
 
-all_specs = [
+ENTRY_POINT = 'conda_env.specs'
+DEFAULT_PRIORITY = 0
+
+builtin_specs = [
     BinstarSpec,
     NotebookSpec,
     YamlFileSpec,
@@ -12,15 +16,86 @@ all_specs = [
 ]
 
 
+def priority(SpecClass):
+    return getattr(SpecClass, 'priority', DEFAULT_PRIORITY)
+
+
+class SpecRegistry(object):
+    """
+    The spec handlers ``detect`` chooses from, highest priority first
+
+    Besides the built-in handlers, any class registered under the
+    ``conda_env.specs`` entry point group is picked up, e.g. in setup.py:
+
+        entry_points={
+            'conda_env.specs': ['pipfile = mypackage.spec:PipfileSpec'],
+        }
+
+    Handlers without a ``priority`` attribute default to 0, after all of
+    the built-in ones; handlers with equal priority keep their registration
+    order.  Plugins are discovered the first time the registry is used.
+    """
+
+    def __init__(self, builtins=(), entry_point=ENTRY_POINT):
+        self.builtins = list(builtins)
+        self.entry_point = entry_point
+        self._extra = []
+        self._handlers = None
+
+    def register(self, SpecClass):
+        """Add a handler that isn't declared as an entry point"""
+        self._extra.append(SpecClass)
+        self._handlers = None
+        return SpecClass
+
+    def handlers(self):
+        if self._handlers is None:
+            found = list(self.builtins)
+            if self.entry_point is not None:
+                found.extend(SpecClass for _, SpecClass in load_entry_points(self.entry_point)
+                             if SpecClass not in found)
+            found.extend(SpecClass for SpecClass in self._extra if SpecClass not in found)
+            self._handlers = sorted(found, key=lambda SpecClass: -priority(SpecClass))
+        return self._handlers
+
+    def __iter__(self):
+        return iter(self.handlers())
+
+    def __len__(self):
+        return len(self.handlers())
+
+
+all_specs = SpecRegistry(builtin_specs)
+
+
+def sniff(SpecClass, kwargs):
+    """
+    Ask SpecClass whether it may handle kwargs, without opening anything
+    expensive.  Handlers without a sniff method are always asked.
+    """
+    sniffer = getattr(SpecClass, 'sniff', None)
+    return sniffer is None or bool(sniffer(**kwargs))
+
+
+def candidates(**kwargs):
+    """The handlers ``detect`` asks about kwargs, in the order it asks them"""
+    handlers = list(all_specs)
+    likely = [SpecClass for SpecClass in handlers if sniff(SpecClass, kwargs)]
+    # If none of the likely handlers can do it, the others still get their
+    # turn, if only to explain why they can't either
+    return likely + [SpecClass for SpecClass in handlers if SpecClass not in likely]
+
+
 def detect(**kwargs):
+    handlers = list(all_specs)
     specs = []
-    for SpecClass in all_specs:
+    for SpecClass in candidates(**kwargs):
         spec = SpecClass(**kwargs)
-        specs.append(spec)
+        specs.append((handlers.index(SpecClass), spec))
         if spec.can_handle():
             return spec
 
-    raise SpecNotFound(build_message(specs))
+    raise SpecNotFound(build_message([spec for _, spec in sorted(specs, key=lambda s: s[0])]))
 
 
 def build_message(specs):
@@ -1,7 +1,14 @@
+from collections import OrderedDict
+import os
 import re
+import sys
 from conda.resolve import normalized_version
 from .. import env
-from ..exceptions import EnvironmentFileNotDownloaded, CondaEnvException
+from ..exceptions import (EnvironmentFileNotDownloaded, EnvironmentNotCached, CondaEnvException,
+                          SpecNotFound)
+from ..utils.binstar_cache import CachingClient
+from ..utils.cache import CACHE_DIR_VAR, cache_dir
+from ..utils.concurrency import default_workers, parallel_map
 try:
     from binstar_client import errors
     from binstar_client.utils import get_binstar
@@ -9,9 +16,69 @@ except ImportError:
     get_binstar = None
 
 ENVIRONMENT_TYPE = 'env'
+LOCAL_EXTENSIONS = ('.yml', '.yaml', '.txt', '.ipynb')
 # TODO: isolate binstar related code into conda_env.utils.binstar
 
 
+def _pool_connections(client, size):
+    # requests keeps at most 10 connections per host by default, which
+    # would serialize larger batches
+    session = getattr(client, 'session', None)
+    if session is None or not hasattr(session, 'mount'):
+        return
+    try:
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        return
+    adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def get_client(offline=False, pool_size=None):
+    """
+    Return the anaconda.org client, wrapped in a CachingClient when caching is
+    enabled, or None if it isn't available
+    """
+    client = None
+    if get_binstar is not None and not offline:
+        client = get_binstar()
+        if pool_size:
+            _pool_connections(client, pool_size)
+    directory = cache_dir('anaconda.org')
+    if directory is not None and (client is not None or offline):
+        client = CachingClient(client, directory, offline=offline)
+    return client
+
+
+def fetch_environments(handles, workers=None, offline=False, binstar=None):
+    """
+    Resolve many user/package handles at once, sharing one client between up
+    to ``workers`` threads.  Returns an OrderedDict mapping each handle to its
+    Environment, or to the exception that kept it from being resolved.
+
+    results = fetch_environments(['darth/deathstar', 'darth/tie-fighter'])
+    results['darth/deathstar'] # => Environment or CondaEnvException
+    """
+    handles = list(OrderedDict.fromkeys(handles))
+    workers = min(workers or default_workers(), len(handles)) or 1
+    if binstar is None:
+        binstar = get_client(offline=offline, pool_size=workers)
+
+    def fetch(handle):
+        spec = BinstarSpec(name=handle, offline=offline)
+        spec.binstar = binstar
+        try:
+            if not spec.can_handle():
+                return SpecNotFound(spec.msg or "{} has no environment file".format(handle))
+            return spec.environment
+        except (Exception, SystemExit):
+            # conda's spec parsing exits on invalid specs
+            return sys.exc_info()[1]
+
+    return OrderedDict(zip(handles, parallel_map(fetch, handles, workers)))
+
+
 class BinstarSpec(object):
     """
     spec = BinstarSpec('darth/deathstar')
@@ -26,15 +93,37 @@ class BinstarSpec(object):
     _packagename = None
     _package = None
     _file_data = None
+    _binstar = None
+    _binstar_loaded = False
     msg = None
+    priority = 40
 
-    def __init__(self, name=None, **kwargs):
+    def __init__(self, name=None, offline=False, **kwargs):
         self.name = name
+        self.offline = offline
         self.quiet = False
-        if get_binstar is not None:
-            self.binstar = get_binstar()
-        else:
-            self.binstar = None
+
+    @staticmethod
+    def sniff(name=None, **kwargs):
+        """
+        Cheaply tell whether name looks like a user/package handle rather than
+        a local file
+        """
+        return (name is not None and re.match("^(.+)/(.+)$", name) is not None and
+                not name.endswith(LOCAL_EXTENSIONS) and not os.path.exists(name))
+
+    @property
+    def binstar(self):
+        # Loading the anaconda-client config and building the client is
+        # expensive, so only do it once something needs it
+        if not self._binstar_loaded:
+            self.binstar = get_client(offline=self.offline)
+        return self._binstar
+
+    @binstar.setter
+    def binstar(self, value):
+        self._binstar = value
+        self._binstar_loaded = True
 
     def can_handle(self):
         """
@@ -44,7 +133,11 @@ class BinstarSpec(object):
         # TODO: log information about trying to find the package in binstar.org
         if self.valid_name():
             if self.binstar is None:
-                self.msg = "Please install binstar"
+                if self.offline:
+                    self.msg = "Set {} to use anaconda.org environments offline".format(
+                        CACHE_DIR_VAR)
+                else:
+                    self.msg = "Please install binstar"
                 return False
             return self.package is not None and self.valid_package()
         return False
@@ -97,6 +190,8 @@ class BinstarSpec(object):
         if self._package is None:
             try:
                 self._package = self.binstar.package(self.username, self.packagename)
+            except EnvironmentNotCached as e:
+                self.msg = str(e)
             except errors.NotFound:
                 self.msg = "{} was not found on anaconda.org.\n"\
                            "You may need to be logged in. Try running:\n"\
@@ -3,17 +3,49 @@ try:
 except ImportError:
     nbformat = None
 from ..env import Environment
+from ..utils.files import read_head
+from ..utils.json_stream import find_member
 from .binstar import BinstarSpec
 
 
 class NotebookSpec(object):
     msg = None
+    priority = 30
 
     def __init__(self, name=None, **kwargs):
         self.name = name
         self.nb = {}
 
+    @staticmethod
+    def sniff(name=None, **kwargs):
+        """Cheaply tell whether name looks like a notebook (a JSON file)"""
+        if name is None:
+            return False
+        if name.endswith('.ipynb'):
+            return True
+        head = read_head(name)
+        return head is not None and head.lstrip().startswith(b'{')
+
     def can_handle(self):
+        # Notebooks can be hundreds of megabytes of cell outputs, so only the
+        # top-level metadata is read from them
+        try:
+            with open(self.name, 'rb') as fp:
+                metadata = find_member(fp, 'metadata')
+        except IOError:
+            self.msg = "{} does not exist or can't be accessed".format(self.name)
+            return False
+        except ValueError:
+            # Let nbformat explain what's wrong with it
+            return self.read_with_nbformat()
+
+        if metadata is None or not isinstance(metadata.value, dict):
+            self.msg = "{} does not looks like a notebook file".format(self.name)
+            return False
+        self.nb = {'metadata': metadata.value}
+        return 'environment' in self.nb['metadata']
+
+    def read_with_nbformat(self):
         try:
             self.nb = nbformat.reader.reads(open(self.name).read())
             return 'environment' in self.nb['metadata']
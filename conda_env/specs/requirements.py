@@ -1,6 +1,7 @@
 import os
 
 from .. import env
+from ..requirements_file import compile_file
 
 
 class RequirementsSpec(object):
@@ -9,12 +10,17 @@ class RequirementsSpec(object):
     and returns an Environment object from it.
     '''
     msg = None
+    priority = 10
 
     def __init__(self, filename=None, name=None, **kwargs):
         self.filename = filename
         self.name = name
         self.msg = None
 
+    @staticmethod
+    def sniff(filename=None, **kwargs):
+        return filename is not None and not filename.endswith(('.yml', '.yaml', '.ipynb'))
+
     def _valid_file(self):
         if os.path.exists(self.filename):
             return True
@@ -34,10 +40,16 @@ class RequirementsSpec(object):
 
     @property
     def environment(self):
-        dependencies = []
-        with open(self.filename) as reqfile:
-            for line in reqfile:
-                dependencies.append(line)
+        """
+        :raises: InvalidRequirementsFile
+        """
+        compiled = compile_file(self.filename)
+        if not compiled.pip_only:
+            dependencies = compiled.lines()
+        else:
+            # Hashes, options and URLs only mean something to pip, which
+            # installs the whole set in one go
+            dependencies = ['pip', {'pip': compiled.lines()}]
         return env.Environment(
             name=self.name,
             dependencies=dependencies
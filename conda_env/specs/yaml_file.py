@@ -4,11 +4,17 @@ from ..exceptions import EnvironmentFileNotFound
 
 class YamlFileSpec(object):
     _environment = None
+    priority = 20
 
     def __init__(self, filename=None, **kwargs):
         self.filename = filename
         self.msg = None
 
+    @staticmethod
+    def sniff(filename=None, **kwargs):
+        """Anything but requirements files and notebooks may be YAML"""
+        return filename is not None and not filename.endswith(('.txt', '.ipynb'))
+
     def can_handle(self):
         try:
             self._environment = env.from_file(self.filename)
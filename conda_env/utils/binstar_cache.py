@@ -0,0 +1,89 @@
+"""
+Keep anaconda.org package metadata and environment files on disk
+
+    client = CachingClient(get_binstar(), cache_dir('anaconda.org'))
+    client.package('darth', 'deathstar') # => metadata, fetched at most every ttl seconds
+    client.download('darth', 'deathstar', '1.0', 'environment.yml').text
+
+Package metadata is served from the cache for ``ttl`` seconds and then
+revalidated by fetching it again.  Environment files are keyed on
+user/package/version/basename and the md5 anaconda.org reports for them, so a
+file is only downloaded again once its metadata says it changed.  In offline
+mode everything comes from the cache and misses raise
+``EnvironmentNotCached``.
+"""
+from __future__ import absolute_import
+import os
+import time
+
+from ..exceptions import EnvironmentNotCached
+from .cache import DiskCache, hash_key
+
+TTL_VAR = 'CONDA_ENV_REMOTE_TTL'
+DEFAULT_TTL = 10 * 60
+
+
+def default_ttl():
+    try:
+        return float(os.environ.get(TTL_VAR, DEFAULT_TTL))
+    except ValueError:
+        return DEFAULT_TTL
+
+
+class CachedDownload(object):
+    """Stands in for the response ``download`` returns on a cache hit"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class CachingClient(object):
+    """
+    Wrap an anaconda.org ``client`` (anything with the ``package`` and
+    ``download`` methods of binstar_client's ``Binstar``) with an on-disk cache
+    """
+
+    def __init__(self, client, directory, ttl=None, offline=False, clock=time.time, **kwargs):
+        self.client = client
+        self.cache = DiskCache(directory, **kwargs)
+        self.ttl = default_ttl() if ttl is None else ttl
+        self.offline = offline
+        self.clock = clock
+
+    def _package_key(self, username, packagename):
+        return hash_key('package', username.lower(), packagename.lower())
+
+    def package(self, username, packagename):
+        key = self._package_key(username, packagename)
+        entry = self.cache.get(key)
+        if entry is not None and (self.offline or self.clock() - entry['fetched'] < self.ttl):
+            return entry['package']
+        if self.offline:
+            raise EnvironmentNotCached('{}/{}'.format(username, packagename))
+
+        package = self.client.package(username, packagename)
+        self.cache.set(key, {'fetched': self.clock(), 'package': package})
+        return package
+
+    def _checksum(self, username, packagename, version, basename):
+        entry = self.cache.get(self._package_key(username, packagename))
+        if entry is None:
+            return None
+        for data in entry['package'].get('files', []):
+            if data.get('version') == version and data.get('basename') == basename:
+                return data.get('md5')
+        return None
+
+    def download(self, username, packagename, version, basename):
+        key = hash_key('file', username.lower(), packagename.lower(), version, basename,
+                       self._checksum(username, packagename, version, basename))
+        text = self.cache.get(key)
+        if text is not None:
+            return CachedDownload(text)
+        if self.offline:
+            raise EnvironmentNotCached('{}/{}'.format(username, packagename))
+
+        req = self.client.download(username, packagename, version, basename)
+        if req is not None:
+            self.cache.set(key, req.text)
+        return req
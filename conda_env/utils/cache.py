@@ -0,0 +1,129 @@
+"""
+Size bounded, content addressed on-disk caches
+
+Caching is opt-in: nothing is stored unless ``CONDA_ENV_CACHE_DIR`` points
+to a directory.  Each cache lives in its own sub-directory of it.
+"""
+from __future__ import absolute_import
+import hashlib
+import os
+import pickle
+
+from .. import compat
+from .files import atomic_open
+
+CACHE_DIR_VAR = 'CONDA_ENV_CACHE_DIR'
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+def cache_dir(name):
+    """
+    Return the directory for the cache called ``name`` or None if caching
+    has not been enabled
+    """
+    root = os.environ.get(CACHE_DIR_VAR)
+    if not root:
+        return None
+    return os.path.join(os.path.expanduser(root), name)
+
+
+def hash_key(*parts):
+    """Return a stable hex digest of ``parts``"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = compat.b(u'%s' % (part,))
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class DiskCache(object):
+    """
+    Store pickled objects in ``directory``, evicting the least recently
+    used entries once their total size exceeds ``max_size`` bytes.
+
+    cache = DiskCache('/tmp/cache')
+    cache.set(hash_key('some', 'key'), value)
+    cache.get(hash_key('some', 'key')) # => value or None
+    """
+    suffix = '.pickle'
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key, default=None):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as fp:
+                value = pickle.load(fp)
+        except (IOError, OSError):
+            return default
+        except Exception:
+            # Truncated or written by an incompatible version
+            self.delete(key)
+            return default
+        try:
+            # Hits refresh the mtime, which is what eviction orders by
+            os.utime(path, None)
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value):
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with atomic_open(self.path(key)) as fp:
+                pickle.dump(value, fp, pickle.HIGHEST_PROTOCOL)
+        except (IOError, OSError):
+            # A cache that can't be written to is just a miss next time
+            return
+        self.evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+
+    def entries(self):
+        """Return ``(mtime, size, path)`` for every entry, oldest first"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return sorted(entries)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
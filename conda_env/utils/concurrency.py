@@ -0,0 +1,99 @@
+"""
+Small threading helpers that work on both Python 2 and 3
+"""
+from __future__ import absolute_import
+import multiprocessing
+import sys
+import threading
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+
+from ..exceptions import TaskTimeout
+
+
+def cpu_count():
+    try:
+        return multiprocessing.cpu_count()
+    except NotImplementedError:
+        return 1
+
+
+def default_workers():
+    """Number of threads to use for I/O bound work"""
+    return min(32, cpu_count() * 4)
+
+
+class Task(object):
+    """
+    Run ``func(*args, **kwargs)`` in a background thread
+
+    task = Task(slow_function, 'arg')
+    task.result(timeout=10) # => return value, or raises what it raised
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, args=(func, args, kwargs))
+        # Never keep the interpreter alive waiting for an abandoned task
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, func, args, kwargs):
+        try:
+            self._result = func(*args, **kwargs)
+        except BaseException:
+            self._error = sys.exc_info()[1]
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def result(self, timeout=None):
+        """
+        Wait for the task and return its result
+        :raises: TaskTimeout
+        """
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TaskTimeout(timeout)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def parallel_map(func, items, workers=None):
+    """
+    Return ``[func(item) for item in items]``, running up to ``workers``
+    calls at once in threads.  If any call raises, the first error is
+    raised once every call has finished.
+    """
+    items = list(items)
+    results = [None] * len(items)
+    errors = []
+    queue = Queue()
+    for position, item in enumerate(items):
+        queue.put((position, item))
+
+    def work():
+        while True:
+            try:
+                position, item = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                results[position] = func(item)
+            except BaseException:
+                errors.append(sys.exc_info()[1])
+
+    threads = [threading.Thread(target=work)
+               for _ in range(min(workers or default_workers(), len(items)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
@@ -0,0 +1,89 @@
+"""
+Discover plugins declared as package entry points
+
+Scanning the metadata of every installed distribution is slow, so the
+result is kept in memory for the life of the process, and in the on-disk
+cache when ``CONDA_ENV_CACHE_DIR`` is set, until a directory on ``sys.path``
+changes, e.g. because a package was installed or removed.
+"""
+from __future__ import absolute_import
+import importlib
+import os
+import sys
+
+from .cache import DiskCache, cache_dir, hash_key
+
+# Scans done by this process, by group and sys.path fingerprint
+_scanned = {}
+
+
+def _scan(group):
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        entry_points = None
+
+    if entry_points is not None:
+        eps = entry_points()
+        if hasattr(eps, 'select'):
+            selected = eps.select(group=group)
+        else:
+            selected = eps.get(group, [])
+        return sorted(set((ep.name, ep.value) for ep in selected))
+
+    try:
+        import pkg_resources
+    except ImportError:
+        return []
+    return sorted(set((ep.name, '%s:%s' % (ep.module_name, '.'.join(ep.attrs)))
+                      for ep in pkg_resources.iter_entry_points(group)))
+
+
+def _path_fingerprint():
+    parts = [sys.version]
+    for path in sys.path:
+        try:
+            parts.append('%s:%s' % (path, os.path.getmtime(path or '.')))
+        except OSError:
+            continue
+    return parts
+
+
+def scan_entry_points(group):
+    """Return sorted ``(name, 'module:attr')`` pairs for every entry point in group"""
+    key = hash_key(group, *_path_fingerprint())
+    found = _scanned.get(key)
+    if found is None:
+        directory = cache_dir('entry-points')
+        cache = None if directory is None else DiskCache(directory)
+        found = None if cache is None else cache.get(key)
+        if found is None:
+            found = _scan(group)
+            if cache is not None:
+                cache.set(key, found)
+        _scanned[key] = found
+    return list(found)
+
+
+def load(value):
+    """Import and return the object a ``module:attr`` entry point refers to"""
+    module_name, _, attrs = value.partition(':')
+    obj = importlib.import_module(module_name.strip())
+    for attr in filter(None, attrs.strip().split('.')):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def load_entry_points(group):
+    """
+    Return ``(name, object)`` for every entry point in group.  Plugins that
+    fail to load are reported on stderr and skipped.
+    """
+    loaded = []
+    for name, value in scan_entry_points(group):
+        try:
+            loaded.append((name, load(value)))
+        except Exception as e:
+            sys.stderr.write("# Warning: unable to load %s plugin %s (%s): %s\n"
+                             % (group, name, value, e))
+    return loaded
@@ -0,0 +1,132 @@
+from __future__ import absolute_import
+from contextlib import contextmanager
+import os
+import sys
+import tempfile
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+from .. import compat
+
+
+def _default_mode():
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+@contextmanager
+def atomic_open(filename, mode='wb'):
+    """
+    Open a temporary file next to ``filename`` for writing and move it over
+    ``filename`` once the block finishes, so readers never see a partially
+    written file.  If the block raises, ``filename`` is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory,
+                               prefix='.' + os.path.basename(filename) + '.',
+                               suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as fp:
+            yield fp
+            fp.flush()
+            os.fsync(fp.fileno())
+        try:
+            mode_bits = os.stat(filename).st_mode & 0o777
+        except OSError:
+            mode_bits = _default_mode()
+        os.chmod(tmp, mode_bits)
+        compat.replace(tmp, filename)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def read_head(filename, size=64):
+    """Return the first ``size`` bytes of ``filename``, or None if unreadable"""
+    try:
+        with open(filename, 'rb') as fp:
+            return fp.read(size)
+    except (IOError, OSError, TypeError):
+        return None
+
+
+def _lock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            # Gives up after trying for 10 seconds
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except (IOError, OSError):
+            continue
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(filename):
+    """
+    Hold an exclusive lock on ``filename`` for the duration of the block,
+    waiting for any other thread or process holding it.  The file is created
+    if needed and left behind.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError:
+            # Made by someone else in the meantime
+            pass
+    fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        _lock(fd)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def redirect_output(filename):
+    """
+    Send everything written to stdout and stderr, by this process and the
+    ones it starts, to ``filename`` for the duration of the block
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = [os.dup(1), os.dup(2)]
+    streams = sys.stdout, sys.stderr
+    try:
+        with open(filename, 'ab') as fp:
+            os.dup2(fp.fileno(), 1)
+            os.dup2(fp.fileno(), 2)
+            # sys.stdout may not be file descriptor 1, e.g. under a test runner
+            sys.stdout = sys.stderr = os.fdopen(os.dup(1), 'w')
+            try:
+                yield
+            finally:
+                sys.stdout.close()
+                sys.stdout, sys.stderr = streams
+                os.dup2(saved[0], 1)
+                os.dup2(saved[1], 2)
+    finally:
+        for fd in saved:
+            os.close(fd)
@@ -0,0 +1,238 @@
+"""
+Pull one member out of a large JSON object without parsing the rest
+
+    with open('analysis.ipynb', 'rb') as fp:
+        member = find_member(fp, 'metadata')
+    member.value # => the parsed metadata
+    member.start, member.end # => where its value sits in the file
+
+The file is read ``chunk_size`` bytes at a time and the values of other
+members are skipped without being decoded, so memory use is bounded by the
+chunk size plus the size of the member itself.  Reading stops as soon as the
+member has been found.
+
+``replace_member`` rewrites one member the same way, copying every other
+byte of the file unchanged.
+"""
+from __future__ import absolute_import
+import json
+import re
+import shutil
+
+from .files import atomic_open
+
+CHUNK_SIZE = 1024 * 1024
+
+WHITESPACE = re.compile(b'[ \t\n\r]*')
+STRING_SPECIAL = re.compile(b'["\\\\]')
+STRUCTURE = re.compile(b'["{}\\[\\]]')
+SCALAR_END = re.compile(b'[,}\\] \t\n\r]')
+
+
+class Member(object):
+    """
+    A member of a JSON object: its parsed ``value`` and the byte offsets
+    ``start`` and ``end`` of the value
+    """
+
+    def __init__(self, key, value, start, end):
+        self.key = key
+        self.value = value
+        self.start = start
+        self.end = end
+
+
+class _Scanner(object):
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = b''
+        self.pos = 0
+        # File offset of buf[0]
+        self.offset = 0
+        # Start of the value being captured, kept across refills
+        self.mark = None
+
+    def more(self):
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            return False
+        keep = self.pos if self.mark is None else self.mark
+        self.buf = self.buf[keep:] + chunk
+        self.offset += keep
+        self.pos -= keep
+        if self.mark is not None:
+            self.mark -= keep
+        return True
+
+    def error(self, message):
+        return ValueError('%s at byte %d' % (message, self.offset + self.pos))
+
+    def peek(self):
+        """Skip whitespace and return the next byte, or b'' at the end"""
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.more():
+                return self.buf[self.pos:self.pos + 1]
+
+    def expect(self, byte):
+        if self.peek() != byte:
+            raise self.error('Expected %r' % byte)
+        self.pos += 1
+
+    def search(self, pattern):
+        """Return the next match of pattern, reading more as needed"""
+        while True:
+            match = pattern.search(self.buf, self.pos)
+            if match is not None:
+                return match
+            self.pos = len(self.buf)
+            if not self.more():
+                raise self.error('Unexpected end of file')
+
+    def skip_string(self):
+        self.pos += 1
+        while True:
+            match = self.search(STRING_SPECIAL)
+            if match.group() == b'"':
+                self.pos = match.end()
+                return
+            if match.end() >= len(self.buf):
+                # The escaped character is in the next chunk
+                self.pos = match.start()
+                if not self.more():
+                    raise self.error('Unexpected end of file')
+                continue
+            self.pos = match.end() + 1
+
+    def skip_value(self):
+        first = self.peek()
+        if first == b'"':
+            self.skip_string()
+        elif first in (b'{', b'['):
+            depth = 0
+            while True:
+                match = self.search(STRUCTURE)
+                token = match.group()
+                if token == b'"':
+                    self.pos = match.start()
+                    self.skip_string()
+                    continue
+                self.pos = match.end()
+                depth += 1 if token in (b'{', b'[') else -1
+                if depth == 0:
+                    return
+        elif first:
+            while True:
+                match = SCALAR_END.search(self.buf, self.pos)
+                if match is not None:
+                    self.pos = match.start()
+                    return
+                self.pos = len(self.buf)
+                if not self.more():
+                    return
+        else:
+            raise self.error('Unexpected end of file')
+
+    def capture(self, skip):
+        """Run skip and return the bytes it skipped over"""
+        self.mark = self.pos
+        try:
+            skip()
+            return self.buf[self.mark:self.pos]
+        finally:
+            self.mark = None
+
+
+def _decode(raw):
+    return json.loads(raw.decode('utf-8'))
+
+
+def find_member(fp, key, chunk_size=CHUNK_SIZE):
+    """
+    Return the Member called ``key`` of the JSON object in the binary file
+    ``fp``, or None if there is no such member
+    :raises: ValueError if ``fp`` doesn't hold a JSON object
+    """
+    scanner = _Scanner(fp, chunk_size)
+    scanner.expect(b'{')
+    if scanner.peek() == b'}':
+        return None
+
+    while True:
+        if scanner.peek() != b'"':
+            raise scanner.error('Expected a member name')
+        name = _decode(scanner.capture(scanner.skip_string))
+        scanner.expect(b':')
+        scanner.peek()
+        start = scanner.offset + scanner.pos
+        if name == key:
+            value = _decode(scanner.capture(scanner.skip_value))
+            return Member(key, value, start, scanner.offset + scanner.pos)
+        scanner.skip_value()
+
+        separator = scanner.peek()
+        if separator == b'}':
+            return None
+        if separator != b',':
+            raise scanner.error("Expected ',' or '}'")
+        scanner.pos += 1
+
+
+def _leading_whitespace(line):
+    return line[:len(line) - len(line.lstrip())]
+
+
+def dumps_like(value, original):
+    """
+    Serialize value as JSON bytes, indented like the ``original`` bytes it
+    replaces so the surrounding document keeps its layout
+    """
+    lines = original.split(b'\n')
+    if len(lines) == 1:
+        text = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    else:
+        base = _leading_whitespace(lines[-1]).decode('utf-8')
+        unit = len(_leading_whitespace(lines[1])) - len(base)
+        text = json.dumps(value, indent=unit if unit > 0 else 1, sort_keys=True,
+                          ensure_ascii=False, separators=(',', ': '))
+        text = text.replace(u'\n', u'\n' + base)
+    if not isinstance(text, bytes):
+        text = text.encode('utf-8')
+    return text
+
+
+def _copy(src, dst, length, chunk_size=CHUNK_SIZE):
+    while length > 0:
+        chunk = src.read(min(chunk_size, length))
+        if not chunk:
+            break
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+def replace_member(filename, key, update, chunk_size=CHUNK_SIZE):
+    """
+    Replace the value of the member ``key`` of the JSON object in filename
+    with ``update(value)``.  Every other byte is copied over unchanged and the
+    file is replaced atomically, so if ``update`` raises or the copy is
+    interrupted the file is left as it was.
+
+    Returns False, without touching the file, if it has no such member.
+    :raises: ValueError if the file doesn't hold a JSON object
+    """
+    with open(filename, 'rb') as src:
+        member = find_member(src, key, chunk_size=chunk_size)
+        if member is None:
+            return False
+        value = update(member.value)
+        src.seek(member.start)
+        replacement = dumps_like(value, src.read(member.end - member.start))
+
+        src.seek(0)
+        with atomic_open(filename) as dst:
+            _copy(src, dst, member.start, chunk_size)
+            dst.write(replacement)
+            src.seek(member.end)
+            shutil.copyfileobj(src, dst, chunk_size)
+    return True
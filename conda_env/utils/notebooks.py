@@ -1,6 +1,8 @@
 from os.path import basename
 import conda.config as config
 from ..exceptions import EnvironmentAlreadyInNotebook, NBFormatNotInstalled
+from .files import atomic_open
+from .json_stream import replace_member
 try:
     import nbformat
 except ImportError:
@@ -12,8 +14,6 @@ class Notebook(object):
     def __init__(self, notebook):
         self.msg = ""
         self.notebook = notebook
-        if nbformat is None:
-            raise NBFormatNotInstalled
 
     def inject(self, content, force=False):
         try:
@@ -27,10 +27,34 @@ class Notebook(object):
         return False
 
     def store_in_file(self, content, force=False):
+        def update(metadata):
+            if not isinstance(metadata, dict):
+                raise ValueError('metadata is not an object')
+            if not force and 'environment' in metadata:
+                raise EnvironmentAlreadyInNotebook(self.notebook)
+            metadata['environment'] = content
+            return metadata
+
+        # Only the metadata is rewritten; cells and outputs are copied over
+        # byte for byte
+        try:
+            if replace_member(self.notebook, 'metadata', update):
+                return True
+        except ValueError:
+            pass
+        return self.store_with_nbformat(content, force)
+
+    def store_with_nbformat(self, content, force=False):
+        if nbformat is None:
+            raise NBFormatNotInstalled
         nb = nbformat.reader.reads(open(self.notebook).read())
         if force or 'environment' not in nb['metadata']:
             nb['metadata']['environment'] = content
-            nbformat.write(nb, self.notebook)
+            text = nbformat.writes(nb)
+            if not text.endswith(u'\n'):
+                text += u'\n'
+            with atomic_open(self.notebook) as fp:
+                fp.write(text.encode('utf-8'))
             return True
         else:
             raise EnvironmentAlreadyInNotebook(self.notebook)
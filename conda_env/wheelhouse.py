@@ -0,0 +1,197 @@
+"""
+A wheelhouse shared by every environment conda-env installs pip packages into
+
+    wheelhouse = Wheelhouse.for_prefix(prefix) # None unless caching is enabled
+    wheelhouse.missing(lines) # => pinned requirements without a wheel yet
+    wheelhouse.fill(lines) # builds the missing ones, in parallel
+    wheelhouse.install_args() # => ['--no-index', '--find-links', ...]
+
+Wheels live in one directory per interpreter (implementation, Python version,
+ABI and platform) below the ``wheelhouse`` cache, so a project is downloaded
+and built into a wheel once per version and interpreter, after which every
+environment installs it from there without going to the index.
+
+Downloads come from the index named by ``CONDA_ENV_PIP_INDEX`` when it's set:
+an URL is used as pip's ``--index-url`` and a local directory of
+distributions stands in for the index entirely.
+"""
+from __future__ import absolute_import
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+from . import compat
+from .compat import InvalidVersion, Version
+from .pip_util import pip_args, pip_paths, requirement_args
+from .requirements_file import Requirement, canonical_name
+from .utils.cache import cache_dir
+from .utils.concurrency import parallel_map
+
+INDEX_VAR = 'CONDA_ENV_PIP_INDEX'
+
+TAG_SCRIPT = ("import platform, sys, sysconfig; print('-'.join(["
+              "platform.python_implementation().lower(), '%d.%d' % sys.version_info[:2], "
+              "sysconfig.get_config_var('SOABI') or 'none', sysconfig.get_platform()]))")
+
+# name-version(-build)?-python-abi-platform.whl
+_wheel = re.compile(r'^(?P<name>[^-]+)-(?P<version>[^-]+)(-\d[^-]*)?-[^-]+-[^-]+-[^-]+\.whl$')
+_unsafe = re.compile(r'[^A-Za-z0-9._-]+')
+
+# Interpreter tags by python path and modification time
+_tags = {}
+
+
+def parse_wheel_name(filename):
+    """
+    Return ``(project, version, python_tag, abi_tag, platform_tag)`` for a
+    wheel's file name, or None if it isn't one
+    """
+    match = _wheel.match(filename)
+    if match is None:
+        return None
+    return ((canonical_name(match.group('name')), match.group('version').replace('_', '-'))
+            + tuple(filename[:-len('.whl')].rsplit('-', 3)[1:]))
+
+
+def version_key(version):
+    """
+    Return something equal for every spelling of a version, so ``1.0`` and
+    ``1.0.0`` match.  Versions that aren't PEP 440 ones compare as written.
+    """
+    if Version is None:
+        return version
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return version
+
+
+def wheel_key(project, version):
+    """The key pins and wheels of the same project and version share"""
+    return project, version_key(version)
+
+
+def index_args():
+    """The pip arguments selecting the configured index, if any"""
+    index = os.environ.get(INDEX_VAR)
+    if not index:
+        return []
+    if os.path.isdir(os.path.expanduser(index)):
+        return ['--no-index', '--find-links', os.path.abspath(os.path.expanduser(index))]
+    return ['--index-url', index]
+
+
+def interpreter_tag(py_path):
+    """
+    Return a string telling apart interpreters whose wheels aren't
+    interchangeable, e.g. ``cpython-3.5-cpython-35m-x86_64-linux-gnu-linux-x86_64``
+    """
+    key = (py_path, os.path.getmtime(py_path))
+    if key not in _tags:
+        output = subprocess.check_output([py_path, '-c', TAG_SCRIPT])
+        _tags[key] = _unsafe.sub('_', output.decode('utf-8').strip())
+    return _tags[key]
+
+
+def pinned(line):
+    """
+    Return ``(project, version)`` if line requires exactly one version of a
+    project, without extras, otherwise None
+    """
+    if line.startswith('-'):
+        return None
+    requirement = Requirement.parse(line.split(' --', 1)[0].strip())
+    if (requirement.name is None or requirement.extras or requirement.marker
+            or len(requirement.specifiers) != 1):
+        return None
+    specifier = requirement.specifiers[0]
+    if not specifier.startswith('==') or specifier.startswith('===') or '*' in specifier:
+        return None
+    return canonical_name(requirement.name), specifier[2:].strip()
+
+
+class Wheelhouse(object):
+    def __init__(self, directory, pip_cmd):
+        self.directory = directory
+        self.pip_cmd = pip_cmd
+
+    @classmethod
+    def for_prefix(cls, prefix):
+        """
+        Return the wheelhouse for the interpreter in prefix, or None if
+        caching is disabled or prefix has no pip
+        """
+        root = cache_dir('wheelhouse')
+        paths = pip_paths(prefix)
+        if root is None or paths is None:
+            return None
+        return cls(os.path.join(root, interpreter_tag(paths[0])), pip_args(prefix))
+
+    def wheels(self):
+        """Return the set of ``wheel_key`` there's a wheel for"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return set()
+        return set(wheel_key(*parsed[:2]) for parsed in map(parse_wheel_name, names) if parsed)
+
+    def missing(self, lines):
+        """Return the pinned requirements in lines that have no wheel yet"""
+        wheels = self.wheels()
+        pins = [(line, pinned(line)) for line in lines]
+        return [line for line, pin in pins if pin is not None and wheel_key(*pin) not in wheels]
+
+    def wheel_cmd(self, requirements, no_deps=False, find_links=(), wheel_dir=None):
+        cmd = self.pip_cmd + ['wheel', '--quiet', '--wheel-dir', wheel_dir or self.directory,
+                              '--find-links', self.directory]
+        for directory in find_links:
+            cmd += ['--find-links', directory]
+        if no_deps:
+            cmd.append('--no-deps')
+        return cmd + index_args() + requirements
+
+    def build(self, requirements, no_deps=False, find_links=()):
+        """
+        Download or build wheels for the pip ``requirements`` arguments and
+        their dependencies.  Returns True if pip succeeded.
+        """
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                # Made by a concurrent build
+                pass
+        # Wheels are built aside and moved in once complete, so concurrent
+        # builds never see, or overwrite, half written ones
+        build_dir = tempfile.mkdtemp(prefix='.build-', dir=self.directory)
+        try:
+            process = subprocess.Popen(self.wheel_cmd(requirements, no_deps, find_links,
+                                                      wheel_dir=build_dir),
+                                       universal_newlines=True)
+            process.communicate()
+            for name in os.listdir(build_dir):
+                if name.endswith('.whl'):
+                    compat.replace(os.path.join(build_dir, name),
+                                   os.path.join(self.directory, name))
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+        return process.returncode == 0
+
+    def fill(self, lines, find_links=(), workers=None):
+        """
+        Build a wheel for every pinned requirement in lines that has none,
+        one pip process per requirement.  Dependencies are left to ``build``.
+        """
+        missing = self.missing(lines)
+
+        def build_one(line):
+            with requirement_args([line]) as requirements:
+                return self.build(requirements, no_deps=True, find_links=find_links)
+
+        return parallel_map(build_one, missing, workers)
+
+    def install_args(self):
+        """The pip install arguments that install from the wheelhouse only"""
+        return ['--no-index', '--find-links', self.directory]
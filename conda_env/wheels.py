@@ -0,0 +1,400 @@
+"""
+Install pinned wheels straight into a prefix, without going through pip
+
+    install_pinned(prefix, ['six==1.10.0', 'requests==2.11.1'], [wheelhouse])
+
+When every requirement pins a single version and a wheel for each one is at
+hand, the wheels are unpacked into the prefix's site-packages in parallel,
+along with the RECORD, INSTALLER and console scripts pip would write, and
+then compiled to bytecode by a pool of the prefix's own Python.
+
+Anything this can't do the way pip would (unpinned requirements, extras,
+options, sdists, projects that are already installed, dependencies missing
+from the list or behind markers that can't be evaluated, Windows script
+launchers) makes ``install_pinned`` return False
+without touching the prefix, so the caller can hand everything to pip.
+Compiled files aren't listed in RECORD; pip removes them along with their
+sources when uninstalling.
+"""
+from __future__ import absolute_import
+import base64
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import zipfile
+
+from .compat import Marker
+from .pip_util import pip_paths
+from .requirements_file import canonical_name, parse
+from .utils.concurrency import cpu_count, parallel_map
+from .wheelhouse import parse_wheel_name, pinned, wheel_key
+
+INSTALLER = 'conda-env'
+# Files handed to each compileall process
+COMPILE_CHUNK = 200
+# Longest shebang line the kernel reads in full
+MAX_SHEBANG = 127
+
+PATHS_SCRIPT = """
+import json, os, platform, sys, sysconfig
+
+def version(info):
+    text = '%d.%d.%d' % tuple(info[:3])
+    if info[3] != 'final':
+        text += info[3][0] + str(info[4])
+    return text
+
+implementation = getattr(sys, 'implementation', None)
+paths = sysconfig.get_paths()
+paths['executable'] = sys.executable
+paths['version'] = '%d.%d' % sys.version_info[:2]
+paths['markers'] = {
+    'implementation_name': implementation.name if implementation else '',
+    'implementation_version': version(implementation.version) if implementation else '0',
+    'os_name': os.name,
+    'platform_machine': platform.machine(),
+    'platform_python_implementation': platform.python_implementation(),
+    'platform_release': platform.release(),
+    'platform_system': platform.system(),
+    'platform_version': platform.version(),
+    'python_full_version': platform.python_version(),
+    'python_version': '.'.join(platform.python_version_tuple()[:2]),
+    'sys_platform': sys.platform,
+}
+print(json.dumps(paths))
+"""
+
+SCRIPT = u"""#!{executable}
+# -*- coding: utf-8 -*-
+import re
+import sys
+
+from {module} import {name}
+
+if __name__ == '__main__':
+    sys.argv[0] = re.sub(r'(-script\\.pyw?|\\.exe)?$', '', sys.argv[0])
+    sys.exit({func}())
+"""
+
+_python_shebang = re.compile(br'^#!pythonw?')
+_requires_name = re.compile(r'\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?')
+
+# Installation paths by python path and modification time
+_paths = {}
+
+
+class Unsupported(Exception):
+    """Raised for anything that should be left to pip"""
+
+
+def interpreter_paths(py_path):
+    """Return the sysconfig installation paths of the python at py_path"""
+    key = (py_path, os.path.getmtime(py_path))
+    if key not in _paths:
+        output = subprocess.check_output([py_path, '-c', PATHS_SCRIPT])
+        _paths[key] = json.loads(output.decode('utf-8'))
+    return _paths[key]
+
+
+def record_hash(data):
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b'=')
+    return 'sha256=' + digest.decode('ascii')
+
+
+def installed_projects(paths):
+    """Return the projects with metadata in the site-packages directories"""
+    projects = set()
+    for directory in set([paths['purelib'], paths['platlib']]):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            if name.endswith(('.dist-info', '.egg-info')):
+                projects.add(canonical_name(name.split('-', 1)[0].rsplit('.', 1)[0]))
+    return projects
+
+
+def requires(metadata):
+    """
+    Return ``(project, has_extras, marker)`` for every Requires-Dist of
+    METADATA, where marker is None if there is none
+    """
+    found = []
+    for line in metadata.splitlines():
+        if not line.strip():
+            # End of the headers
+            break
+        if not line.startswith('Requires-Dist:'):
+            continue
+        requirement, _, marker = line[len('Requires-Dist:'):].partition(';')
+        match = _requires_name.match(requirement)
+        if match is not None:
+            found.append((canonical_name(match.group(1)), bool(match.group(2)),
+                          marker.strip() or None))
+    return found
+
+
+def marker_applies(marker, environment):
+    """
+    Return whether the environment marker holds for the interpreter
+    described by ``environment``, with no extras requested
+    :raises: Unsupported if the marker can't be evaluated here
+    """
+    if marker is None:
+        return True
+    if Marker is None:
+        raise Unsupported('no packaging to evaluate %s' % marker)
+    values = dict(environment, extra='')
+    try:
+        return Marker(marker).evaluate(values)
+    except Exception:
+        raise Unsupported('unable to evaluate %s' % marker)
+
+
+def entry_points(text):
+    """Parse entry_points.txt into ``{section: [(name, value)]}``"""
+    sections = {}
+    section = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(('#', ';')):
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            section = sections.setdefault(line[1:-1].strip(), [])
+        elif section is not None and '=' in line:
+            name, value = line.split('=', 1)
+            section.append((name.strip(), value.strip()))
+    return sections
+
+
+def script(executable, value):
+    """The text of a console script calling the ``module:attr`` value"""
+    module, _, attrs = re.sub(r'\[.*\]', '', value).partition(':')
+    attrs = attrs.strip() or 'main'
+    return SCRIPT.format(executable=executable, module=module.strip(),
+                         name=attrs.split('.')[0], func=attrs)
+
+
+def find_wheels(lines, directories, pure_directories, version):
+    """
+    Return a wheel path for every line, taking only pure Python wheels from
+    ``pure_directories``
+    :raises: Unsupported
+    """
+    available = {}
+    major = 'py' + version.split('.')[0]
+    minor = 'py' + version.replace('.', '')
+    for pure, directory in ([(True, d) for d in reversed(pure_directories)]
+                            + [(False, d) for d in reversed(directories)]):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            parsed = parse_wheel_name(name)
+            if parsed is None:
+                continue
+            if pure and (parsed[3:] != ('none', 'any')
+                         or not set([major, minor]) & set(parsed[2].split('.'))):
+                continue
+            available[wheel_key(*parsed[:2])] = os.path.join(directory, name)
+
+    wheels = []
+    for line in lines:
+        entries = parse(line)
+        if len(entries) != 1 or entries[0][0] != 'requirement':
+            raise Unsupported(line)
+        pin = pinned(line)
+        key = None if pin is None else wheel_key(*pin)
+        if key is None or key not in available:
+            raise Unsupported(line)
+        hashes = entries[0][1].hashes
+        if hashes:
+            with open(available[key], 'rb') as fp:
+                digest = 'sha256:' + hashlib.sha256(fp.read()).hexdigest()
+            if digest not in hashes:
+                raise Unsupported(line)
+        wheels.append(available[key])
+    return wheels
+
+
+class WheelInstall(object):
+    """Unpack one wheel into the directories in ``paths``"""
+
+    def __init__(self, path, paths):
+        self.path = path
+        self.paths = paths
+        self.project = parse_wheel_name(os.path.basename(path))[0]
+        self.written = []
+
+    def dist_info(self, zf):
+        for name in zf.namelist():
+            parts = name.split('/')
+            if len(parts) == 2 and parts[0].endswith('.dist-info') and parts[1] == 'WHEEL':
+                return parts[0]
+        raise Unsupported('%s has no .dist-info' % self.path)
+
+    def target(self, name, root, data_dir):
+        """Return where the archive member name goes and if it's a script"""
+        parts = name.split('/')
+        if name.startswith('/') or '..' in parts or ':' in parts[0]:
+            raise Unsupported('%s has an unsafe path %s' % (self.path, name))
+        if parts[0] != data_dir:
+            return os.path.join(root, *parts), False
+        if len(parts) < 3:
+            raise Unsupported('%s has an unknown data path %s' % (self.path, name))
+        scheme, rest = parts[1], parts[2:]
+        if scheme in ('purelib', 'platlib', 'scripts', 'data'):
+            return os.path.join(self.paths[scheme], *rest), scheme == 'scripts'
+        if scheme == 'headers':
+            return os.path.join(self.paths['include'], self.project, *rest), False
+        raise Unsupported('%s has an unknown data path %s' % (self.path, name))
+
+    def write(self, path, data, executable=False):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Made by another wheel being unpacked at the same time
+                pass
+        with open(path, 'wb') as fp:
+            fp.write(data)
+        self.written.append(path)
+        if executable:
+            os.chmod(path, 0o755)
+
+    def install(self):
+        """Unpack the wheel and return the Python sources it installed"""
+        try:
+            return self._install()
+        except BaseException:
+            self.rollback()
+            raise
+
+    def rollback(self):
+        """Remove every file written so far"""
+        for path in reversed(self.written):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.written = []
+
+    def _install(self):
+        with zipfile.ZipFile(self.path) as zf:
+            dist_info = self.dist_info(zf)
+            data_dir = dist_info[:-len('.dist-info')] + '.data'
+            wheel = zf.read(dist_info + '/WHEEL').decode('utf-8')
+            purelib = re.search(r'^Root-Is-Purelib:\s*true\s*$', wheel, re.M | re.I)
+            root = self.paths['purelib' if purelib else 'platlib']
+            executable = self.paths['executable']
+
+            record = []
+            for info in zf.infolist():
+                if info.filename.endswith('/'):
+                    continue
+                if info.filename == dist_info + '/RECORD':
+                    continue
+                path, is_script = self.target(info.filename, root, data_dir)
+                data = zf.read(info)
+                if is_script and data.startswith(b'#!python'):
+                    data = _python_shebang.sub(b'#!' + executable.encode('utf-8'), data, 1)
+                mode = (info.external_attr >> 16) & 0o111
+                self.write(path, data, executable=is_script or bool(mode))
+                record.append((path, record_hash(data), len(data)))
+
+            try:
+                points = entry_points(zf.read(dist_info + '/entry_points.txt').decode('utf-8'))
+            except KeyError:
+                points = {}
+
+        for section in ('console_scripts', 'gui_scripts'):
+            for name, value in points.get(section, []):
+                data = script(executable, value).encode('utf-8')
+                path = os.path.join(self.paths['scripts'], name)
+                self.write(path, data, executable=True)
+                record.append((path, record_hash(data), len(data)))
+
+        installer = os.path.join(root, dist_info, 'INSTALLER')
+        data = (INSTALLER + '\n').encode('utf-8')
+        self.write(installer, data)
+        record.append((installer, record_hash(data), len(data)))
+
+        # RECORD goes last, so a wheel only looks installed once it is
+        record_path = os.path.join(root, dist_info, 'RECORD')
+        lines = ['%s,%s,%d' % (os.path.relpath(path, root).replace(os.sep, '/'), digest, size)
+                 for path, digest, size in record]
+        lines.append('%s/RECORD,,' % dist_info)
+        self.write(record_path, ('\n'.join(lines) + '\n').encode('utf-8'))
+        return [path for path, _, _ in record if path.endswith('.py')]
+
+
+def compile_sources(py_path, sources, workers=None):
+    """
+    Compile sources to bytecode with a pool of ``py_path`` processes.
+    Files that don't compile are skipped, as pip does.
+    """
+    if not sources:
+        return
+
+    def compile_chunk(chunk):
+        with open(os.devnull, 'w') as devnull:
+            process = subprocess.Popen([py_path, '-m', 'compileall', '-q', '-i', '-'],
+                                       stdin=subprocess.PIPE, stdout=devnull, stderr=devnull)
+            process.communicate(('\n'.join(chunk) + '\n').encode(sys.getfilesystemencoding()))
+
+    chunks = [sources[i:i + COMPILE_CHUNK] for i in range(0, len(sources), COMPILE_CHUNK)]
+    parallel_map(compile_chunk, chunks, workers or cpu_count())
+
+
+def install_pinned(prefix, lines, directories, pure_directories=(), workers=None):
+    """
+    Install the pinned requirement lines into prefix from the wheels in
+    ``directories``, or the pure Python ones in ``pure_directories``.
+    Returns False, leaving prefix as it was, if pip has to do it instead.
+    """
+    paths = pip_paths(prefix)
+    if sys.platform == 'win32' or paths is None or not lines:
+        return False
+    py_path = paths[0]
+    try:
+        target = interpreter_paths(py_path)
+        executable = target['executable']
+        if ' ' in executable or len('#!' + executable) > MAX_SHEBANG:
+            raise Unsupported(executable)
+        wheels = find_wheels(lines, directories, pure_directories, target['version'])
+
+        installs = [WheelInstall(path, target) for path in wheels]
+        installed = installed_projects(target)
+        projects = set(install.project for install in installs)
+        if projects & installed:
+            raise Unsupported('already installed: %s' % ', '.join(sorted(projects & installed)))
+        for install in installs:
+            with zipfile.ZipFile(install.path) as zf:
+                metadata = zf.read(install.dist_info(zf) + '/METADATA').decode('utf-8')
+            for project, has_extras, marker in requires(metadata):
+                if not marker_applies(marker, target['markers']):
+                    continue
+                if has_extras:
+                    # The extra's own dependencies would have to be found too
+                    raise Unsupported('%s requires extras of %s' % (install.project, project))
+                if project not in projects and project not in installed:
+                    raise Unsupported('%s requires %s' % (install.project, project))
+    except (Unsupported, KeyError, ValueError, OSError, zipfile.BadZipfile,
+            subprocess.CalledProcessError):
+        return False
+
+    try:
+        sources = parallel_map(lambda install: install.install(), installs, workers)
+    except Exception as e:
+        for install in installs:
+            install.rollback()
+        sys.stderr.write("# Warning: unable to unpack wheels, using pip: %s\n" % e)
+        return False
+    compile_sources(py_path, [source for found in sources for source in found])
+    return True
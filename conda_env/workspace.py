@@ -0,0 +1,169 @@
+"""
+Find and index every environment file below a directory
+
+    index = scan('/path/to/monorepo', ignore=['build'])
+    index.by_name() # => {'env-name': {'/path/to/environment.yml': 'sha256...'}}
+    index.save('/path/to/index.json')
+
+Saving the index and passing it back to ``scan`` on the next run skips
+re-reading and re-parsing files whose size and modification time haven't
+changed.
+"""
+from __future__ import absolute_import
+from fnmatch import fnmatch
+import hashlib
+import json
+import os
+import sys
+import threading
+try:
+    from queue import Queue
+except ImportError:
+    from Queue import Queue
+
+from . import __version__
+from . import env
+from .compat import scandir
+from .utils.concurrency import default_workers, parallel_map
+from .utils.files import atomic_open
+
+DEFAULT_IGNORE = ['.git', '.hg', '.svn', '.tox', 'node_modules', '__pycache__']
+
+
+def is_ignored(relpath, ignore):
+    """True if ``relpath`` or its basename matches a pattern in ``ignore``"""
+    relpath = relpath.replace(os.sep, '/')
+    name = relpath.rsplit('/', 1)[-1]
+    return any(fnmatch(name, pattern) or fnmatch(relpath, pattern) for pattern in ignore)
+
+
+def find_environment_files(root, ignore=DEFAULT_IGNORE, workers=None):
+    """
+    Return the sorted paths of every environment file below ``root``,
+    listing directories in parallel
+    """
+    root = os.path.abspath(root)
+    names = set(env.ENVIRONMENT_FILES)
+    found = []
+    queue = Queue()
+
+    def work():
+        while True:
+            directory = queue.get()
+            if directory is None:
+                return
+            try:
+                for entry in scandir(directory):
+                    relpath = os.path.relpath(entry.path, root)
+                    if is_ignored(relpath, ignore):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            queue.put(entry.path)
+                        elif entry.name in names and entry.is_file():
+                            found.append(entry.path)
+                    except OSError:
+                        continue
+            except OSError:
+                # Unreadable directories are skipped, like `find` does
+                pass
+            finally:
+                queue.task_done()
+
+    workers = workers or default_workers()
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    queue.put(root)
+    queue.join()
+    for _ in threads:
+        queue.put(None)
+    for thread in threads:
+        thread.join()
+    return sorted(found)
+
+
+class WorkspaceIndex(object):
+    """
+    The environment files found by ``scan``
+
+    ``entries`` maps each file to its environment name, the sha256 of its
+    contents, its size and modification time.  ``errors`` maps files that
+    could not be parsed to the reason.
+    """
+
+    def __init__(self, entries=None, errors=None):
+        self.entries = entries or {}
+        self.errors = errors or {}
+
+    def by_name(self):
+        """Return ``{name: {path: sha256}}``"""
+        names = {}
+        for path, entry in sorted(self.entries.items()):
+            names.setdefault(entry['name'], {})[path] = entry['sha256']
+        return names
+
+    def to_dict(self):
+        return {'version': __version__, 'entries': self.entries, 'errors': self.errors}
+
+    def save(self, filename):
+        with atomic_open(filename) as fp:
+            fp.write(json.dumps(self.to_dict(), indent=2, sort_keys=True).encode('utf-8'))
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Load an index saved by ``save``.  Returns an empty index if the file
+        is missing, unreadable or written by a different version.
+        """
+        try:
+            with open(filename, 'rb') as fp:
+                data = json.loads(fp.read().decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return cls()
+        if not isinstance(data, dict) or data.get('version') != __version__:
+            return cls()
+        return cls(data.get('entries'))
+
+
+def _index_file(path, previous):
+    st = os.stat(path)
+    entry = previous.entries.get(path)
+    if entry is not None and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime:
+        return entry
+
+    with open(path, 'rb') as fp:
+        content = fp.read()
+    environment = env.from_yaml(content.decode('utf-8'), filename=path)
+    return {
+        'name': environment.name,
+        'sha256': hashlib.sha256(content).hexdigest(),
+        'size': st.st_size,
+        'mtime': st.st_mtime,
+    }
+
+
+def scan(root, ignore=DEFAULT_IGNORE, workers=None, index=None):
+    """
+    Find and parse every environment file below ``root`` and return a
+    ``WorkspaceIndex`` of them.  Entries of a previous ``index`` are reused
+    for files that haven't changed since.
+    """
+    previous = index if index is not None else WorkspaceIndex()
+    paths = find_environment_files(root, ignore=ignore, workers=workers)
+
+    def index_file(path):
+        try:
+            return _index_file(path, previous), None
+        except (Exception, SystemExit):
+            # conda's spec parsing exits on invalid specs
+            return None, str(sys.exc_info()[1]) or 'invalid environment file'
+
+    result = WorkspaceIndex()
+    for path, (entry, error) in zip(paths, parallel_map(index_file, paths, workers)):
+        if error is None:
+            result.entries[path] = entry
+        else:
+            result.errors[path] = error
+    return result
@@ -2,11 +2,22 @@
 Wrapper around yaml to ensure that everything is ordered correctly.
 
 This is based on the answer at http://stackoverflow.com/a/16782282
+
+When PyYAML was built against libyaml the C ``CSafeLoader`` and
+``CSafeDumper`` are used, otherwise this falls back to the pure-Python
+``SafeLoader`` and ``SafeDumper``.  Both engines produce the same output.
 """
 from __future__ import absolute_import, print_function
 from collections import OrderedDict
 import yaml
 
+try:
+    from yaml import CSafeLoader as Loader, CSafeDumper as Dumper
+    has_libyaml = True
+except ImportError:
+    from yaml import SafeLoader as Loader, SafeDumper as Dumper
+    has_libyaml = False
+
 
 def represent_ordereddict(dumper, data):
     value = []
@@ -20,7 +31,39 @@ def represent_ordereddict(dumper, data):
     return yaml.nodes.MappingNode(u'tag:yaml.org,2002:map', value)
 
 yaml.add_representer(OrderedDict, represent_ordereddict)
+for _dumper in {yaml.SafeDumper, Dumper}:
+    yaml.add_representer(OrderedDict, represent_ordereddict, Dumper=_dumper)
+
+
+def load(stream, Loader=Loader):
+    """Parse ``stream`` using the fastest available safe loader"""
+    return yaml.load(stream, Loader=Loader)
+
+
+def dump(data, stream=None, Dumper=Dumper, **kwargs):
+    """Serialize ``data`` using the fastest available safe dumper"""
+    return yaml.dump(data, stream=stream, Dumper=Dumper, **kwargs)
+
+
+def iterdump(data, chunk_size=256, **kwargs):
+    """
+    Yield the block style YAML for the mapping ``data`` a piece at a time
+
+    Lists are serialized ``chunk_size`` items at a time, so memory use does
+    not grow with their length.  The joined pieces are identical to
+    ``dump(data, default_flow_style=False)``.
+    """
+    kwargs['default_flow_style'] = False
+    for key, value in data.items():
+        if not isinstance(value, (list, tuple)) or not value:
+            yield dump(OrderedDict([(key, value)]), **kwargs)
+            continue
+        if isinstance(value, tuple):
+            value = list(value)
+        # The first chunk is dumped along with its key
+        yield dump(OrderedDict([(key, value[:chunk_size])]), **kwargs)
+        for start in range(chunk_size, len(value), chunk_size):
+            yield dump(value[start:start + chunk_size], **kwargs)
+
 
-dump = yaml.dump
-load = yaml.load
 dict = OrderedDict
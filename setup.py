@@ -1,4 +1,6 @@
 #!/usr/bin/env python
+import os
+import re
 import sys
 
 if 'develop' in sys.argv:
@@ -12,9 +14,17 @@ if sys.version_info[:2] < (2, 7):
     sys.exit("conda is only meant for Python 2.7, with experimental support "
              "for python 3.  current version: %d.%d" % sys.version_info[:2])
 
+
+def read_version():
+    # conda_env/__init__.py is the only place the version is written down
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conda_env', '__init__.py')
+    with open(path) as fp:
+        return re.search(r"^__version__ = '([^']+)'", fp.read(), re.M).group(1)
+
+
 setup(
     name="conda-env",
-    version="2.5.0alpha",
+    version=read_version(),
     author="Continuum Analytics, Inc.",
     author_email="support@continuum.io",
     url="https://github.com/conda/conda-env",
@@ -0,0 +1,189 @@
+from collections import OrderedDict
+import os
+import threading
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env.installers import base
+from conda_env.installers.base import InvalidInstaller, Installer, Plan, install_all
+
+
+class FakeEnvironment(object):
+    def __init__(self, *dependencies):
+        self.dependencies = OrderedDict(dependencies)
+
+
+class InstallAllTestCase(unittest.TestCase):
+    def installers(self, **installers):
+        installers = dict((name, base.ModuleInstaller.wrap(module))
+                          for name, module in installers.items())
+        return mock.patch.object(base, 'get_installer', side_effect=installers.__getitem__)
+
+    def test_prefetch_overlaps_earlier_installers(self):
+        downloading = threading.Event()
+        calls = []
+
+        conda = mock.Mock(spec=['install'])
+        conda.install.side_effect = lambda *args, **kwargs: (
+            calls.append(('conda', downloading.wait(5))))
+
+        pip = mock.Mock(spec=['install', 'prefetch'])
+
+        def prefetch(specs, args, env, directory):
+            downloading.set()
+            return directory
+        pip.prefetch.side_effect = prefetch
+        pip.install.side_effect = lambda *args, **kwargs: calls.append(('pip', kwargs))
+
+        env = FakeEnvironment(('conda', ['python']), ('pip', ['flask']))
+        with self.installers(conda=conda, pip=pip):
+            install_all('/prefix', env, 'args')
+
+        self.assertEqual(calls[0], ('conda', True))
+        self.assertEqual(calls[1][0], 'pip')
+        staged = calls[1][1]['staged']
+        self.assertEqual(os.path.basename(staged), 'pip')
+        # The staging directory is cleaned up afterwards
+        self.assertFalse(os.path.exists(os.path.dirname(staged)))
+
+    def test_failed_prefetch_is_ignored(self):
+        pip = mock.Mock(spec=['install', 'prefetch'])
+        pip.prefetch.side_effect = RuntimeError
+        with self.installers(pip=pip):
+            install_all('/prefix', FakeEnvironment(('pip', ['flask'])), 'args')
+        pip.install.assert_called_with('/prefix', ['flask'], 'args', mock.ANY)
+
+    def test_prune_is_passed_when_given(self):
+        conda = mock.Mock(spec=['install'])
+        with self.installers(conda=conda):
+            env = FakeEnvironment(('conda', ['python']))
+            install_all('/prefix', env, 'args')
+            conda.install.assert_called_with('/prefix', ['python'], 'args', env)
+            install_all('/prefix', env, 'args', prune=True)
+            conda.install.assert_called_with('/prefix', ['python'], 'args', env, prune=True)
+
+    def test_invalid_installer_installs_nothing(self):
+        conda = mock.Mock(spec=['install'])
+
+        def get_installer(name):
+            if name == 'conda':
+                return base.ModuleInstaller.wrap(conda)
+            raise InvalidInstaller(name)
+
+        env = FakeEnvironment(('conda', ['python']), ('nope', ['x']))
+        with mock.patch.object(base, 'get_installer', side_effect=get_installer):
+            with self.assertRaises(InvalidInstaller) as e:
+                install_all('/prefix', env, 'args')
+        self.assertEqual(e.exception.name, 'nope')
+        self.assertFalse(conda.install.called)
+
+    def test_dry_run_only_plans(self):
+        conda = mock.Mock(spec=['install'])
+        with self.installers(conda=conda):
+            report = install_all('/prefix', FakeEnvironment(('conda', ['python'])), 'args',
+                                 dry_run=True)
+        self.assertFalse(conda.install.called)
+        self.assertEqual(report.to_dict(), {'conda': {
+            'plan': [{'action': 'install', 'target': 'python'}],
+            'seconds': {'plan': 0.0},
+        }})
+        self.assertEqual(report.format_plans(), '## conda\n    install  python')
+
+    def test_reports_every_phase(self):
+        calls = []
+
+        class Npm(Installer):
+            def plan(self):
+                return Plan([('install', 'left-pad@1.1.3')], data='plan data')
+
+            def fetch(self, plan, directory):
+                calls.append(('fetch', plan.data))
+                return 'tarballs'
+
+            def link(self, plan, fetched=None):
+                calls.append(('link', plan.data, fetched))
+
+        with mock.patch.object(base, 'get_installer', return_value=Npm):
+            report = install_all('/prefix', FakeEnvironment(('npm', ['left-pad'])), 'args')
+        self.assertEqual(calls, [('fetch', 'plan data'), ('link', 'plan data', 'tarballs')])
+        self.assertEqual(list(report.timings['npm']), ['plan', 'fetch', 'link'])
+        self.assertEqual(report.format_timings(), '# npm: plan 0.0s, fetch 0.0s, link 0.0s')
+        copy = base.InstallReport.from_dict(report.to_dict())
+        self.assertEqual(copy.to_dict(), report.to_dict())
+        self.assertEqual(copy.format_plans(), report.format_plans())
+
+
+    def test_later_installers_see_earlier_plans(self):
+        seen = []
+
+        class Recorder(Installer):
+            def plan(self):
+                seen.append(list(self.plans))
+                return Plan()
+
+            def link(self, plan, fetched=None):
+                pass
+
+        with mock.patch.object(base, 'get_installer', return_value=Recorder):
+            install_all('/prefix', FakeEnvironment(('conda', ['python']), ('pip', ['flask'])),
+                        'args', dry_run=True)
+        self.assertEqual(seen, [[], ['conda']])
+
+
+class NpmInstaller(Installer):
+    pass
+
+
+class InstallerTestCase(unittest.TestCase):
+    def test_link_is_required(self):
+        with self.assertRaises(TypeError):
+            NpmInstaller('/some/prefix', ['left-pad'], None, None)
+
+        class Linked(NpmInstaller):
+            def link(self, plan, fetched=None):
+                return plan.steps
+
+        installer = Linked('/some/prefix', ['left-pad'], None, None)
+        self.assertEqual(installer.install(), [('install', 'left-pad')])
+
+
+class RegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(base, 'scan_entry_points', return_value=[
+            ('npm', 'tests.installers.test_base:NpmInstaller'),
+        ])
+        self.scan_entry_points = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.registry = base.InstallerRegistry({'fake': 'tests.installers.test_base:Npm'})
+
+    def test_builtins(self):
+        self.assertIs(base.get_installer('conda'),
+                      base.load('conda_env.installers.conda:CondaInstaller'))
+        self.assertIs(base.get_installer('pip'),
+                      base.load('conda_env.installers.pip:PipInstaller'))
+
+    def test_entry_points(self):
+        self.assertIs(self.registry.get('npm'), NpmInstaller)
+        self.scan_entry_points.assert_called_with(base.ENTRY_POINT)
+
+    def test_register(self):
+        self.assertIs(self.registry.register('npm', Installer), Installer)
+        self.assertIs(self.registry.get('npm'), Installer)
+
+    def test_modules_are_wrapped(self):
+        installer = self.registry.get('base')
+        self.assertTrue(issubclass(installer, base.ModuleInstaller))
+        self.assertIs(installer.module, base)
+
+    def test_invalid(self):
+        for name in ('fake', 'nope'):
+            with self.assertRaises(InvalidInstaller) as e:
+                self.registry.get(name)
+            self.assertEqual(e.exception.name, name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env.installers import conda
+from conda_env.utils import cache
+
+INDEX = {
+    'numpy-1.9.2-py27_0.tar.bz2': {'name': 'numpy', 'md5': 'a' * 32},
+    'python-2.7.11-0.tar.bz2': {'name': 'python', 'md5': 'b' * 32},
+}
+
+
+class PlanCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.directory, 'env')
+        self.env = mock.patch.dict(os.environ, {cache.CACHE_DIR_VAR: self.directory})
+        self.env.start()
+        self.solve = mock.patch.object(conda.plan, 'install_actions',
+                                       side_effect=lambda *args, **kwargs: {'LINK': ['x']})
+        self.install_actions = self.solve.start()
+        # dist => tarball
+        self.fetched = {}
+        self.extracted = set()
+        self.package_cache = [
+            mock.patch.object(conda.conda_install, 'is_fetched', side_effect=self.fetched.get),
+            mock.patch.object(conda.conda_install, 'is_extracted',
+                              side_effect=self.extracted.__contains__),
+        ]
+        for patcher in self.package_cache:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.package_cache:
+            patcher.stop()
+        self.solve.stop()
+        self.env.stop()
+        shutil.rmtree(self.directory)
+
+    def actions(self, specs=('numpy',), channels=(), prepend=True, prune=False, index=INDEX,
+                **kwargs):
+        return conda.install_actions(self.prefix, index, list(specs), list(channels), prepend,
+                                     prune=prune, **kwargs)
+
+    def test_hit_skips_solver(self):
+        self.assertEqual(self.actions(), {'LINK': ['x']})
+        self.assertEqual(self.actions(), {'LINK': ['x'], 'FETCH': ['x'], 'EXTRACT': ['x']})
+        self.assertEqual(self.install_actions.call_count, 1)
+
+    def test_hit_checks_the_package_cache(self):
+        self.install_actions.side_effect = lambda *args, **kwargs: {
+            'LINK': ['numpy-1.9.2-py27_0 2', 'python-2.7.11-0 2'],
+            'UNLINK': ['numpy-1.9.1-py27_0'],
+            'FETCH': [], 'EXTRACT': [], 'RM_EXTRACTED': ['python-2.7.11-0'],
+        }
+        self.actions()
+        # As if the package cache was cleaned since, except for one package
+        self.fetched['python-2.7.11-0'] = '/pkgs/python-2.7.11-0.tar.bz2'
+        with mock.patch.object(conda, 'md5_file', return_value='b' * 32):
+            actions = self.actions()
+        self.assertEqual(self.install_actions.call_count, 1)
+        self.assertEqual(actions['FETCH'], ['numpy-1.9.2-py27_0'])
+        self.assertEqual(actions['EXTRACT'], ['numpy-1.9.2-py27_0', 'python-2.7.11-0'])
+        self.assertEqual(actions['UNLINK'], ['numpy-1.9.1-py27_0'])
+        self.assertNotIn('RM_EXTRACTED', actions)
+
+    def test_hit_refetches_tarballs_that_dont_match_the_index(self):
+        self.install_actions.side_effect = lambda *args, **kwargs: {
+            'LINK': ['numpy-1.9.2-py27_0 2', 'python-2.7.11-0 2'],
+        }
+        self.actions()
+        tarball = os.path.join(self.directory, 'numpy-1.9.2-py27_0.tar.bz2')
+        with open(tarball, 'wb') as fp:
+            fp.write(b'truncated')
+        self.fetched.update({'numpy-1.9.2-py27_0': tarball, 'python-2.7.11-0': tarball})
+        self.extracted.update(self.fetched)
+        md5 = conda.md5_file(tarball)
+        index = dict(INDEX, **{'python-2.7.11-0.tar.bz2': {'name': 'python', 'md5': md5}})
+
+        with mock.patch.object(conda, 'plan_key', return_value='key'):
+            self.actions()
+            actions = self.actions(index=index)
+        self.assertEqual(actions['RM_FETCHED'], ['numpy-1.9.2-py27_0'])
+        self.assertEqual(actions['FETCH'], ['numpy-1.9.2-py27_0'])
+        self.assertEqual(actions['EXTRACT'], ['numpy-1.9.2-py27_0'])
+
+    def test_spec_order_does_not_matter(self):
+        self.actions(specs=['numpy', 'python'])
+        self.actions(specs=['python', 'numpy', 'numpy'])
+        self.assertEqual(self.install_actions.call_count, 1)
+
+    def test_inputs_are_part_of_the_key(self):
+        self.actions()
+        self.actions(specs=['python'])
+        self.actions(channels=['conda-forge'])
+        self.actions(prepend=False)
+        self.actions(prune=True)
+        self.actions(index=dict(INDEX, **{'six-1.0-0.tar.bz2': {'md5': 'c' * 32}}))
+        self.assertEqual(self.install_actions.call_count, 6)
+
+    def test_installed_packages_are_part_of_the_key(self):
+        self.actions()
+        with mock.patch.object(conda, 'linked', return_value={'python-2.7.11-0'}):
+            self.actions()
+        self.assertEqual(self.install_actions.call_count, 2)
+
+    def test_escape_hatch(self):
+        self.actions(use_cache=False)
+        self.actions(use_cache=False)
+        self.assertEqual(self.install_actions.call_count, 2)
+
+    def test_disabled_without_cache_dir(self):
+        with mock.patch.dict(os.environ, clear=True):
+            self.actions()
+            self.actions()
+        self.assertEqual(self.install_actions.call_count, 2)
+
+
+class ExecuteActionsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        patchers = [
+            mock.patch.object(conda, 'pkgs_dirs', [self.directory]),
+            mock.patch.object(conda.inst, 'execute_instructions'),
+            mock.patch.object(conda.plan, 'execute_actions'),
+            mock.patch.object(conda.conda_install, 'is_fetched', return_value=None),
+            mock.patch.object(conda.conda_install, 'is_extracted', return_value=None),
+            mock.patch.object(conda.conda_install, 'add_cached_package'),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.actions = {'PREFIX': '/envs/stats', 'FETCH': ['numpy-1.9.2-py27_0'],
+                        'EXTRACT': ['numpy-1.9.2-py27_0', 'python-2.7.11-0'],
+                        'LINK': ['python-2.7.11-0 1 False', 'numpy-1.9.2-py27_0 1 False']}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def steps(self):
+        return [[step for step in call[0][0] if step[0] in conda.PACKAGE_CACHE_OPS]
+                for call in conda.inst.execute_instructions.call_args_list]
+
+    def test_one_package_at_a_time_under_a_lock(self):
+        conda.execute_actions(self.actions, INDEX)
+        self.assertEqual(self.steps(), [
+            [('FETCH', 'numpy-1.9.2-py27_0'), ('EXTRACT', 'numpy-1.9.2-py27_0')],
+            [('EXTRACT', 'python-2.7.11-0')],
+        ])
+        self.assertTrue(os.path.exists(os.path.join(
+            self.directory, '.conda-env-locks', 'numpy-1.9.2-py27_0.lock')))
+        rest = conda.plan.execute_actions.call_args[0][0]
+        self.assertEqual(sorted(rest), ['LINK', 'PREFIX'])
+
+    def test_stale_copies_are_replaced_under_the_lock(self):
+        # conda's plan for a cached tarball whose md5 doesn't match the index
+        self.actions.update({'RM_FETCHED': ['numpy-1.9.2-py27_0'],
+                             'RM_EXTRACTED': ['python-2.7.11-0']})
+        conda.conda_install.is_fetched.return_value = '/pkgs/numpy-1.9.2-py27_0.tar.bz2'
+        conda.conda_install.is_extracted.return_value = '/pkgs/cached'
+
+        conda.execute_actions(self.actions, INDEX)
+        self.assertEqual(self.steps(), [
+            [('RM_FETCHED', 'numpy-1.9.2-py27_0'), ('FETCH', 'numpy-1.9.2-py27_0'),
+             ('EXTRACT', 'numpy-1.9.2-py27_0')],
+            [('RM_EXTRACTED', 'python-2.7.11-0'), ('EXTRACT', 'python-2.7.11-0')],
+        ])
+        rest = conda.plan.execute_actions.call_args[0][0]
+        self.assertEqual(sorted(rest), ['LINK', 'PREFIX'])
+
+    def test_uses_what_another_process_extracted(self):
+        os.makedirs(os.path.join(self.directory, 'python-2.7.11-0'))
+        index = dict(INDEX)
+        index['python-2.7.11-0.tar.bz2'] = dict(
+            INDEX['python-2.7.11-0.tar.bz2'], url='https://repo/python-2.7.11-0.tar.bz2')
+        conda.conda_install.is_extracted.side_effect = lambda dist: dist == 'python-2.7.11-0'
+
+        conda.execute_actions(self.actions, index)
+        conda.conda_install.add_cached_package.assert_called_with(
+            self.directory, 'https://repo/python-2.7.11-0.tar.bz2', overwrite=True)
+        self.assertEqual(len(self.steps()), 1)
+
+
+class CondaInstallerTestCase(unittest.TestCase):
+    def test_plan(self):
+        actions = {
+            'PREFIX': '/prefix',
+            'FETCH': ['numpy-1.9.2-py27_0'],
+            'UNLINK': ['numpy-1.9.1-py27_0'],
+            'LINK': ['numpy-1.9.2-py27_0 2', 'python-2.7.11-0'],
+        }
+        args = mock.Mock(json=False, quiet=True, offline=False, no_plan_cache=False)
+        env = mock.Mock(channels=['conda-forge', 'nodefaults'])
+        installer = conda.CondaInstaller('/prefix', ['numpy'], args, env)
+        with mock.patch.object(conda.common, 'check_specs'):
+            with mock.patch.object(conda, 'get_index', return_value=INDEX) as get_index:
+                with mock.patch.object(conda, 'install_actions',
+                                       return_value=actions) as install_actions:
+                    plan = installer.plan()
+        get_index.assert_called_with(['conda-forge', 'nodefaults'], offline=False)
+        install_actions.assert_called_with('/prefix', INDEX, ['numpy'], ['conda-forge'], False,
+                                           prune=False, use_cache=True)
+        self.assertEqual(plan.steps, [('fetch', 'numpy-1.9.2-py27_0'),
+                                      ('unlink', 'numpy-1.9.1-py27_0'),
+                                      ('link', 'numpy-1.9.2-py27_0'),
+                                      ('link', 'python-2.7.11-0')])
+        self.assertEqual(plan.data, {'actions': actions, 'index': INDEX})
+
+    def test_phases(self):
+        args = mock.Mock(json=False, quiet=True)
+        installer = conda.CondaInstaller('/prefix', ['numpy'], args, mock.Mock())
+        plan = conda.Plan(data={'actions': 'actions', 'index': INDEX})
+        with mock.patch.object(conda, 'fetch_packages') as fetch_packages:
+            with mock.patch.object(conda, 'link_packages') as link_packages:
+                self.assertIsNone(installer.fetch(plan, '/staging'))
+                fetch_packages.assert_called_with('actions', INDEX, verbose=False)
+                self.assertFalse(link_packages.called)
+                installer.link(plan)
+                link_packages.assert_called_with('actions', INDEX, verbose=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
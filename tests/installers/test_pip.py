@@ -1,3 +1,8 @@
+from collections import OrderedDict
+import os
+import shutil
+import sys
+import tempfile
 import unittest
 try:
     from unittest import mock
@@ -5,6 +10,7 @@ except ImportError:
     import mock
 
 from conda_env.installers import pip
+from conda_env.installers.base import Plan
 
 
 class PipInstallerTest(unittest.TestCase):
@@ -29,3 +35,94 @@ class PipInstallerTest(unittest.TestCase):
 
                 self.assertRaises(SystemExit, pip.install,
                                   '/some/prefix', ['foo'], '', '')
+
+
+class PipRequirementsFileTest(unittest.TestCase):
+    def test_hashes_and_options_go_through_a_file(self):
+        written = []
+
+        def popen(cmd, **kwargs):
+            with open(cmd[-1]) as fp:
+                written.append(fp.read())
+            return mock.Mock(returncode=0)
+
+        with mock.patch.object(pip.subprocess, 'Popen', side_effect=popen) as Popen:
+            with mock.patch.object(pip, 'pip_args', return_value=['pip']):
+                pip.install('/some/prefix', ['--index-url=https://example.com/simple',
+                                             'foo==1.0 --hash=sha256:abc', 'bar'], '', '')
+
+        cmd = Popen.call_args[0][0]
+        self.assertEqual(cmd[:3], ['pip', 'install', '-r'])
+        self.assertEqual(written, ['--index-url=https://example.com/simple\n'
+                                   'foo==1.0 --hash=sha256:abc\nbar\n'])
+        self.assertFalse(os.path.exists(cmd[-1]))
+
+
+class PipPrefetchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def download(self, staging, returncode=0, stderr=''):
+        def download(cmd, **kwargs):
+            os.makedirs(staging)
+            open(os.path.join(staging, 'foo-1.0-py2.py3-none-any.whl'), 'w').close()
+            return mock.Mock(returncode=returncode,
+                             communicate=mock.Mock(return_value=('', stderr)))
+        return mock.patch.object(pip.subprocess, 'Popen', side_effect=download)
+
+    def test_downloads_with_running_python(self):
+        staging = os.path.join(self.directory, 'pip')
+        version = '%d.%d' % sys.version_info[:2]
+        with self.download(staging) as popen:
+            self.assertEqual(pip.prefetch(['foo==1.0'], None, None, staging, version), staging)
+        self.assertEqual(popen.call_args[0][0],
+                         [sys.executable, '-m', 'pip', 'download', '--quiet',
+                          '--dest', staging, 'foo==1.0'])
+
+    def test_only_wheels_for_another_python(self):
+        staging = os.path.join(self.directory, 'pip')
+        with self.download(staging) as popen:
+            pip.prefetch(['foo==1.0'], None, None, staging, '1.5')
+        self.assertEqual(popen.call_args[0][0][-6:],
+                         ['--only-binary=:all:', '--implementation', 'cp',
+                          '--python-version', '15', 'foo==1.0'])
+
+    def test_unknown_python_skips_prefetch(self):
+        with mock.patch.object(pip.subprocess, 'Popen') as popen:
+            self.assertIsNone(pip.prefetch(['foo'], None, None, self.directory))
+        self.assertFalse(popen.called)
+
+    def test_failures_are_reported(self):
+        staging = os.path.join(self.directory, 'pip')
+        with self.download(staging, returncode=1, stderr='Collecting\nNo matching bar\n'):
+            with mock.patch('sys.stderr') as stderr:
+                self.assertEqual(pip.prefetch(['foo', 'bar'], None, None, staging, '1.5'),
+                                 staging)
+        self.assertIn('No matching bar', stderr.write.call_args[0][0])
+
+    def test_target_python(self):
+        conda = Plan([('fetch', 'python-3.5.2-0'), ('link', 'conda-forge::python-3.5.2-0'),
+                      ('link', 'numpy-1.11.1-py35_0')])
+        self.assertEqual(pip.target_python(self.directory, OrderedDict([('conda', conda)])),
+                         '3.5')
+        self.assertIsNone(pip.target_python(self.directory, OrderedDict()))
+
+    def test_install_uses_staged_downloads(self):
+        with mock.patch.object(pip.subprocess, 'Popen') as popen:
+            popen.return_value.returncode = 0
+            with mock.patch.object(pip, 'pip_args', return_value=['pip']):
+                pip.install('/some/prefix', ['foo'], '', '', staged='/staging/pip')
+        popen.assert_called_with(['pip', 'install', '--find-links', '/staging/pip', 'foo'],
+                                 universal_newlines=True)
+
+
+class PipPinnedTest(unittest.TestCase):
+    def test_pinned_wheels_skip_pip(self):
+        with mock.patch.object(pip, 'install_pinned', return_value=True) as install_pinned:
+            with mock.patch.object(pip.subprocess, 'Popen') as popen:
+                pip.install('/some/prefix', ['foo==1.0'], None, None, staged='/staged')
+        install_pinned.assert_called_with('/some/prefix', ['foo==1.0'], [], ['/staged'])
+        self.assertFalse(popen.called)
@@ -69,3 +69,66 @@ class DetectTestCase(unittest.TestCase):
         spec4 = mock.Mock(msg='error 4')
         spec5 = mock.Mock(msg=None)
         self.assertEqual(specs.build_message([spec3, spec4, spec5]), 'error 3\nerror 4')
+
+
+class SniffTestCase(unittest.TestCase):
+    def generate_specs(self):
+        unlikely = mock.Mock(can_handle=false_func, msg='unlikely')
+        unlikely.return_value = unlikely
+        unlikely.sniff.return_value = False
+        likely = mock.Mock(can_handle=true_func, msg=None)
+        likely.return_value = likely
+        likely.sniff.return_value = True
+        return unlikely, likely
+
+    def test_only_sniffed_specs_are_constructed(self):
+        unlikely, likely = self.generate_specs()
+        with patched_specs(unlikely, likely):
+            self.assertEqual(specs.detect(name="foo"), likely)
+        likely.sniff.assert_called_with(name="foo")
+        self.assertFalse(unlikely.called)
+
+    def test_other_specs_explain_failure(self):
+        unlikely, likely = self.generate_specs()
+        likely.can_handle = false_func
+        likely.msg = 'likely'
+        with patched_specs(unlikely, likely):
+            with self.assertRaises(SpecNotFound) as e:
+                specs.detect(name="foo")
+        self.assertTrue(unlikely.called)
+        # Messages keep the registration order
+        self.assertEqual(str(e.exception), 'unlikely\nlikely')
+
+
+class SpecRegistryTestCase(unittest.TestCase):
+    def test_builtins_are_ordered_by_priority(self):
+        self.assertEqual(list(specs.all_specs)[:4], specs.builtin_specs)
+
+    def test_entry_points_are_sorted_by_priority(self):
+        class Urgent(object):
+            priority = 100
+
+        class Plain(object):
+            pass
+
+        with mock.patch.object(specs, 'load_entry_points') as load:
+            load.return_value = [('plain', Plain), ('urgent', Urgent)]
+            registry = specs.SpecRegistry(specs.builtin_specs)
+            self.assertEqual(list(registry), [Urgent] + specs.builtin_specs + [Plain])
+        load.assert_called_with(specs.ENTRY_POINT)
+
+    def test_entry_points_are_loaded_once(self):
+        with mock.patch.object(specs, 'load_entry_points', return_value=[]) as load:
+            registry = specs.SpecRegistry(specs.builtin_specs)
+            list(registry)
+            list(registry)
+        self.assertEqual(load.call_count, 1)
+
+    def test_register_adds_handler(self):
+        class Extra(object):
+            priority = 15
+
+        registry = specs.SpecRegistry(specs.builtin_specs, entry_point=None)
+        list(registry)
+        registry.register(Extra)
+        self.assertEqual(list(registry).index(Extra), 3)
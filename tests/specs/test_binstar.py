@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import types
 import unittest
 try:
@@ -10,6 +13,9 @@ from binstar_client import errors
 from conda_env.specs import binstar
 from conda_env.specs.binstar import BinstarSpec
 from conda_env.env import Environment
+from conda_env.exceptions import SpecNotFound
+from conda_env.utils import cache
+from ..utils.test_binstar_cache import FakeBinstar
 
 
 class TestBinstarSpec(unittest.TestCase):
@@ -79,6 +85,19 @@ class TestBinstarSpec(unittest.TestCase):
             spec.environment
             downloader.assert_called_with('darth', 'env-file', '0.2.0', 'environment.yml')
 
+    def test_client_is_created_lazily(self):
+        with patch('conda_env.specs.binstar.get_binstar') as get_binstar_mock:
+            spec = BinstarSpec(name='darth/env-file')
+            self.assertFalse(get_binstar_mock.called)
+            spec.binstar
+            self.assertTrue(get_binstar_mock.called)
+
+    def test_sniff(self):
+        self.assertTrue(BinstarSpec.sniff(name='darth/deathstar'))
+        self.assertFalse(BinstarSpec.sniff(name=None))
+        self.assertFalse(BinstarSpec.sniff(name='deathstar'))
+        self.assertFalse(BinstarSpec.sniff(name='path/to/notebook.ipynb'))
+
     def test_binstar_not_installed(self):
         spec = BinstarSpec(name='user/package')
         spec.binstar = None
@@ -86,5 +105,87 @@ class TestBinstarSpec(unittest.TestCase):
         self.assertEqual(spec.msg, 'Please install binstar')
 
 
+class TestOfflineBinstarSpec(unittest.TestCase):
+    fake_package = {
+        'files': [{'type': 'env', 'version': '1', 'basename': 'environment.yml', 'md5': 'abc'}]
+    }
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.env = patch.dict(os.environ, {cache.CACHE_DIR_VAR: self.directory})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.directory)
+
+    def test_offline_uses_cache(self):
+        with patch('conda_env.specs.binstar.get_binstar') as get_binstar_mock:
+            package = MagicMock(return_value=self.fake_package)
+            downloader = MagicMock(return_value=MagicMock(text=u"name: env"))
+            get_binstar_mock.return_value = MagicMock(package=package, download=downloader)
+            BinstarSpec(name='darth/env-file').environment
+
+            spec = BinstarSpec(name='darth/env-file', offline=True)
+            self.assertTrue(spec.can_handle())
+            self.assertEqual(spec.environment.name, 'env')
+        self.assertEqual(get_binstar_mock.call_count, 1)
+        self.assertEqual(package.call_count, 1)
+        self.assertEqual(downloader.call_count, 1)
+
+    def test_offline_miss(self):
+        spec = BinstarSpec(name='darth/env-file', offline=True)
+        self.assertFalse(spec.can_handle())
+        self.assertIn('darth/env-file is not in the local cache', spec.msg)
+
+    def test_offline_without_cache(self):
+        with patch.dict(os.environ, clear=True):
+            spec = BinstarSpec(name='darth/env-file', offline=True)
+            self.assertFalse(spec.can_handle())
+        self.assertIn(cache.CACHE_DIR_VAR, spec.msg)
+
+
+class TestFetchEnvironments(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBinstar()
+        self.server.upload('darth', 'deathstar', '1.0', u'name: deathstar')
+        self.server.upload('darth', 'tie-fighter', '0.1', u'name: tie-fighter')
+        self.server.packages[('darth', 'empty')] = {'files': []}
+
+    def test_fetches_every_handle(self):
+        results = binstar.fetch_environments(['darth/deathstar', 'darth/tie-fighter'],
+                                             binstar=self.server)
+        self.assertEqual(list(results), ['darth/deathstar', 'darth/tie-fighter'])
+        self.assertEqual([env.name for env in results.values()], ['deathstar', 'tie-fighter'])
+
+    def test_errors_are_reported_per_handle(self):
+        results = binstar.fetch_environments(
+            ['darth/missing', 'invalid', 'darth/empty', 'darth/deathstar'],
+            binstar=self.server)
+        self.assertIsInstance(results['darth/missing'], KeyError)
+        self.assertIsInstance(results['invalid'], SpecNotFound)
+        self.assertIsInstance(results['darth/empty'], SpecNotFound)
+        self.assertEqual(results['darth/deathstar'].name, 'deathstar')
+
+    def test_duplicates_are_fetched_once(self):
+        results = binstar.fetch_environments(['darth/deathstar'] * 3, binstar=self.server)
+        self.assertEqual(list(results), ['darth/deathstar'])
+        self.assertEqual(len([call for call in self.server.calls if call[0] == 'download']), 1)
+
+    def test_client_is_shared(self):
+        with patch('conda_env.specs.binstar.get_binstar') as get_binstar_mock:
+            get_binstar_mock.return_value = self.server
+            with patch.dict(os.environ, clear=True):
+                results = binstar.fetch_environments(['darth/deathstar', 'darth/tie-fighter'])
+        self.assertEqual(get_binstar_mock.call_count, 1)
+        self.assertEqual(results['darth/tie-fighter'].name, 'tie-fighter')
+
+    def test_connection_pool_grows_with_workers(self):
+        client = MagicMock()
+        binstar._pool_connections(client, 32)
+        adapter = client.session.mount.call_args[0][1]
+        self.assertEqual(adapter._pool_maxsize, 32)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,4 +1,9 @@
 import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
 from conda_env import env
 from conda_env.specs.notebook import NotebookSpec
 from ..utils import support_file
@@ -17,3 +22,14 @@ class TestNotebookSpec(unittest.TestCase):
         spec = NotebookSpec(support_file('notebook_with_env.ipynb'))
         self.assertTrue(spec.can_handle())
         self.assertIsInstance(spec.environment, env.Environment)
+
+    def test_metadata_is_read_without_nbformat(self):
+        with mock.patch('conda_env.specs.notebook.nbformat', None):
+            spec = NotebookSpec(support_file('notebook_with_env.ipynb'))
+            self.assertTrue(spec.can_handle())
+        self.assertEqual(list(spec.nb), ['metadata'])
+
+    def test_sniff(self):
+        self.assertTrue(NotebookSpec.sniff(name=support_file('notebook.ipynb')))
+        self.assertFalse(NotebookSpec.sniff(name=support_file('simple.yml')))
+        self.assertFalse(NotebookSpec.sniff(name=None))
@@ -1,3 +1,6 @@
+import os
+import shutil
+import tempfile
 import unittest
 
 from .. import utils
@@ -26,3 +29,27 @@ class TestRequiremets(unittest.TestCase):
             spec.environment.dependencies['conda'][0],
             'flask ==0.10.1'
         )
+
+
+class TestCompiledRequirements(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def spec(self, content):
+        filename = os.path.join(self.directory, 'requirements.txt')
+        with open(filename, 'w') as fp:
+            fp.write(content)
+        return RequirementsSpec(filename=filename, name='env')
+
+    def test_comments_are_not_dependencies(self):
+        env = self.spec('# pinned\n\nflask==0.10.1\nflask==0.10.1\n').environment
+        self.assertEqual(env.dependencies['conda'], ['flask ==0.10.1'])
+
+    def test_pip_features_go_to_pip(self):
+        env = self.spec('--index-url https://a/simple\nfoo==1.0 --hash=sha256:abc\n').environment
+        self.assertEqual(env.dependencies['conda'], ['pip'])
+        self.assertEqual(env.dependencies['pip'], ['--index-url=https://a/simple',
+                                                   'foo==1.0 --hash=sha256:abc'])
@@ -0,0 +1,201 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env.installers.base import InstallReport, Plan
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only the subcommand that runs should pay for importing these
+HEAVY_MODULES = ['conda.plan', 'conda.misc', 'binstar_client', 'nbformat', 'conda_env.env']
+
+
+class LazySubcommandImportsTestCase(unittest.TestCase):
+    def imported(self, argv):
+        script = '\n'.join([
+            "import sys",
+            "sys.argv = ['conda-env'] + %r" % (argv,),
+            "from conda_env.cli.main import create_parser",
+            "create_parser()",
+            "print('\\n'.join(sorted(sys.modules)))",
+        ])
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+        output = subprocess.check_output([sys.executable, '-c', script], env=env,
+                                         universal_newlines=True)
+        return set(output.split())
+
+    def test_building_the_parser_is_cheap(self):
+        modules = self.imported(['list'])
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, modules)
+
+
+class ManifestTestCase(unittest.TestCase):
+    def test_read_manifest(self):
+        from conda_env.cli.main_create import read_manifest
+
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'environments.txt')
+            with open(filename, 'w') as fp:
+                fp.write("# provisioned nightly\ndarth/deathstar\n\n  darth/tie-fighter  # v2\n")
+            self.assertEqual(read_manifest(filename), ['darth/deathstar', 'darth/tie-fighter'])
+        finally:
+            shutil.rmtree(directory)
+
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        from conda_env.cli import main_create
+
+        self.main_create = main_create
+        self.directory = tempfile.mkdtemp()
+        self.files = []
+        for name in ('web', 'worker'):
+            filename = os.path.join(self.directory, name + '.yml')
+            with open(filename, 'w') as fp:
+                fp.write('name: %s\ndependencies:\n  - pip:\n    - six==1.10.0\n' % name)
+            self.files.append(filename)
+        self.envs = os.path.join(self.directory, 'envs')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def args(self, **kwargs):
+        import argparse
+
+        defaults = dict(file=self.files, remote_definition=[], manifest=None, name=None,
+                        prefix=None, workers=None, jobs=1, offline=False, json=True,
+                        quiet=True, dry_run=False, timings=False)
+        defaults.update(kwargs)
+        return argparse.Namespace(**defaults)
+
+    def run_batch(self, args, install):
+        from conda.cli import common
+
+        def get_prefix(args, search=False):
+            return os.path.join(self.envs, args.name)
+
+        output = []
+        with mock.patch.object(self.main_create, 'install', side_effect=install):
+            with mock.patch.object(common, 'get_prefix', side_effect=get_prefix):
+                with mock.patch.object(common, 'stdout_json', side_effect=output.append):
+                    status = self.main_create.execute_batch(args, self.main_create.read_sources(args))
+        return status, output[0] if output else None
+
+    def test_manifest_files(self):
+        manifest = os.path.join(self.directory, 'environments.txt')
+        with open(manifest, 'w') as fp:
+            fp.write('web.yml\ndarth/deathstar\n')
+        sources = self.main_create.read_sources(self.args(file=None, manifest=manifest))
+        self.assertEqual(sources, [('file', self.files[0]), ('remote', 'darth/deathstar')])
+
+    def test_only_anaconda_org_handles_are_fetched_together(self):
+        from conda_env import specs
+        from conda_env.env import Environment
+        from conda_env.specs import binstar
+
+        notebook = os.path.join(self.directory, 'analysis.ipynb')
+        with open(notebook, 'w') as fp:
+            fp.write('{}')
+        spec = mock.Mock(environment=Environment(name='analysis'))
+        fetched = {'darth/deathstar': Environment(name='deathstar')}
+        args = self.args(remote_definition=[notebook, 'darth/deathstar'], file=self.files[:1])
+        with mock.patch.object(binstar, 'fetch_environments', return_value=fetched) as fetch:
+            with mock.patch.object(specs, 'detect', return_value=spec) as detect:
+                loaded = self.main_create.load_environments(
+                    self.main_create.read_sources(args), args)
+        fetch.assert_called_with(['darth/deathstar'], workers=None, offline=False)
+        self.assertEqual(detect.call_args_list[0], mock.call(name=notebook, offline=False))
+        self.assertEqual(list(loaded), [notebook, 'darth/deathstar', self.files[0]])
+        self.assertEqual(loaded['darth/deathstar'].name, 'deathstar')
+        self.assertEqual(loaded[notebook].name, 'analysis')
+
+    def test_reports_each_environment(self):
+        def install(prefix, env, args):
+            if env.name == 'worker':
+                raise RuntimeError('no space left')
+            return InstallReport()
+
+        status, report = self.run_batch(self.args(), install)
+        self.assertEqual(status, 1)
+        self.assertEqual(list(report), self.files)
+        self.assertEqual(report[self.files[0]]['prefix'], os.path.join(self.envs, 'web'))
+        self.assertIn('seconds', report[self.files[0]])
+        self.assertEqual(report[self.files[0]]['phases'], {})
+        self.assertEqual(report[self.files[1]]['error'], 'no space left')
+
+    def test_duplicate_names(self):
+        copy = os.path.join(self.directory, 'web-copy.yml')
+        shutil.copy(self.files[0], copy)
+        status, report = self.run_batch(self.args(file=self.files + [copy]),
+                                        lambda prefix, env, args: InstallReport())
+        self.assertEqual(status, 1)
+        self.assertEqual(report[copy], {'error': 'same environment as %s' % self.files[0]})
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork to share the mocks')
+    def test_process_pool(self):
+        def install(prefix, env, args):
+            print('installing %s' % env.name)
+            if env.name == 'worker':
+                return -1
+            return InstallReport()
+
+        status, report = self.run_batch(self.args(jobs=2), install)
+        self.assertEqual(status, 1)
+        self.assertNotEqual(report[self.files[0]]['prefix'], report[self.files[1]]['prefix'])
+        self.assertNotIn('error', report[self.files[0]])
+        log = report[self.files[1]]['log']
+        with open(log) as fp:
+            self.assertEqual(fp.read(), 'installing worker\n')
+        shutil.rmtree(os.path.dirname(log))
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'needs fork to share the mocks')
+    def test_dead_worker_fails_its_job(self):
+        def install(prefix, env, args):
+            if env.name == 'worker':
+                os._exit(3)
+            return InstallReport()
+
+        status, report = self.run_batch(self.args(jobs=2), install)
+        self.assertEqual(status, 1)
+        self.assertNotIn('error', report[self.files[0]])
+        self.assertIn('exited with code 3', report[self.files[1]]['error'])
+        shutil.rmtree(os.path.dirname(report[self.files[1]]['log']))
+
+    def test_dry_run(self):
+        def install(prefix, env, args):
+            report = InstallReport()
+            report.plans['pip'] = Plan([('install', 'six==1.10.0')])
+            return report
+
+        with mock.patch('sys.stdout') as stdout:
+            status, _ = self.run_batch(self.args(json=False, dry_run=True), install)
+        self.assertIsNone(status)
+        output = ''.join(call[0][0] for call in stdout.write.call_args_list)
+        self.assertIn('# Would create %s in %s' % (self.files[0], os.path.join(self.envs, 'web')),
+                      output)
+        self.assertIn('    install  six==1.10.0', output)
+        self.assertNotIn('Created', output)
+
+    def test_timings(self):
+        def install(prefix, env, args):
+            report = InstallReport()
+            report.plans['pip'] = Plan([('install', 'six==1.10.0')])
+            report.record('pip', 'link', 1.5)
+            return report
+
+        for timings in (False, True):
+            with mock.patch('sys.stdout') as stdout:
+                self.run_batch(self.args(json=False, timings=timings), install)
+            output = ''.join(call[0][0] for call in stdout.write.call_args_list)
+            self.assertIn('# Created', output)
+            self.assertEqual('# pip: link 1.5s' in output, timings)
@@ -1,10 +1,17 @@
 from collections import OrderedDict
 import os
+import shutil
 import sys
 import random
+import tempfile
 import textwrap
+import threading
 import unittest
 import yaml
+try:
+    from unittest import mock
+except ImportError:
+    import mock
 
 try:
     from io import StringIO
@@ -13,6 +20,7 @@ except ImportError:
 
 from conda_env import env
 from conda_env import exceptions
+from conda_env.pip_util import PipPackage
 
 from . import utils
 
@@ -45,6 +53,44 @@ class from_file_TestCase(unittest.TestCase):
         self.assert_('baz' in e.dependencies['pip'])
 
 
+class from_file_cache_TestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        patcher = mock.patch.dict(os.environ, {'CONDA_ENV_CACHE_DIR': self.cache_dir})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_warm_load_skips_parsing(self):
+        expected = get_simple_environment()
+        with mock.patch.object(env.yaml, 'load') as load:
+            e = get_simple_environment()
+            self.assertFalse(load.called)
+        self.assertEqual(expected.name, e.name)
+        self.assertEqual(expected.dependencies, e.dependencies)
+        self.assertEqual(utils.support_file('simple.yml'), e.filename)
+
+    def test_filename_is_not_remembered(self):
+        e = get_simple_environment()
+        with open(utils.support_file('simple.yml')) as fp:
+            yamlstr = fp.read()
+        self.assertIsNone(env.from_yaml(yamlstr).filename)
+        self.assertEqual(e.filename, get_simple_environment().filename)
+
+    def test_format_is_part_of_the_key(self):
+        env.from_yaml('name: one')
+        with mock.patch.object(env, 'PARSE_CACHE_FORMAT', -1):
+            with mock.patch.object(env.yaml, 'load', return_value={'name': 'one'}) as load:
+                env.from_yaml('name: one')
+        self.assertTrue(load.called)
+
+    def test_changed_content_is_reparsed(self):
+        env.from_yaml('name: one')
+        self.assertEqual('two', env.from_yaml('name: two').name)
+
+
 class EnvironmentTestCase(unittest.TestCase):
     def test_has_empty_filename_by_default(self):
         e = env.Environment()
@@ -149,7 +195,7 @@ class EnvironmentTestCase(unittest.TestCase):
             'dependencies': ['nodejs']
         }
 
-        actual = yaml.load(StringIO(e.to_yaml()))
+        actual = yaml.safe_load(StringIO(e.to_yaml()))
         self.assertEqual(expected, actual)
 
     def test_to_yaml_returns_proper_yaml(self):
@@ -216,6 +262,126 @@ class EnvironmentTestCase(unittest.TestCase):
         self.assert_('bar' in e.dependencies['conda'])
 
 
+class DependenciesTestCase(unittest.TestCase):
+    def test_add_replaces_existing_package(self):
+        e = env.Environment(dependencies=['nltk', 'numpy'])
+        e.dependencies.add('numpy=1.9')
+        self.assertEqual(e.dependencies['conda'], ['nltk', 'numpy 1.9*'])
+        self.assertEqual(e.dependencies.raw, ['nltk', 'numpy=1.9'])
+
+    def test_contains(self):
+        e = env.Environment(dependencies=['nltk', {'pip': ['Flask_Testing>=0.4']}])
+        self.assertTrue(e.dependencies.contains('nltk'))
+        self.assertTrue(e.dependencies.contains('flask-testing', installer='pip'))
+        self.assertFalse(e.dependencies.contains('numpy'))
+        self.assertFalse(e.dependencies.contains('nltk', installer='pip'))
+
+    def test_replace_requires_existing_package(self):
+        e = env.Environment(dependencies=['nltk'])
+        with self.assertRaises(KeyError):
+            e.dependencies.replace('numpy')
+        e.dependencies.replace('nltk=3.0')
+        self.assertEqual(e.dependencies.raw, ['nltk=3.0'])
+
+    def test_remove_keeps_raw_in_sync(self):
+        e = env.Environment(
+            dependencies=['nltk', {'pip': ['foo', 'bar']}, 'numpy', 'scipy']
+        )
+        e.dependencies.remove('numpy')
+        e.dependencies.remove('foo', installer='pip')
+        self.assertEqual(e.dependencies.raw, ['nltk', {'pip': ['bar']}, 'scipy'])
+        self.assertEqual(e.dependencies['conda'], ['nltk', 'scipy'])
+        e.dependencies.replace('scipy=0.17')
+        self.assertEqual(e.dependencies.raw[-1], 'scipy=0.17')
+
+    def test_removing_several_keeps_the_order(self):
+        e = env.Environment(dependencies=['a', 'b', 'c', 'd', 'e', 'f',
+                                          {'pip': ['p1', 'p2', 'p3', 'p4']}])
+        for name in ('b', 'e', 'a'):
+            e.dependencies.remove(name)
+        for name in ('p1', 'p3'):
+            e.dependencies.remove(name, installer='pip')
+        self.assertEqual(e.dependencies.raw, ['c', 'd', 'f', {'pip': ['p2', 'p4']}])
+        self.assertEqual([str(r) for r in e.dependencies.records()], ['c', 'd', 'f'])
+        for name in ('c', 'd', 'f'):
+            e.dependencies.replace(name + '=1.0')
+        e.dependencies.replace('p4==1.0', installer='pip')
+        self.assertEqual(e.dependencies.raw,
+                         ['c=1.0', 'd=1.0', 'f=1.0', {'pip': ['p2', 'p4==1.0']}])
+        e.dependencies.remove('f')
+        e.dependencies.add('g')
+        self.assertEqual(e.dependencies['conda'], ['c 1.0*', 'd 1.0*', 'g'])
+        self.assertFalse(e.dependencies.contains('e'))
+
+    def test_duplicates_collapse_to_the_last_spec(self):
+        e = env.Environment(dependencies=['numpy', 'scipy', {'pip': ['foo', 'Foo==1.0']},
+                                          'numpy=1.9'])
+        self.assertEqual(e.dependencies.raw, ['numpy=1.9', 'scipy', {'pip': ['Foo==1.0']}])
+        self.assertEqual(e.dependencies['conda'], ['numpy 1.9*', 'scipy'])
+        self.assertEqual(e.dependencies['pip'], ['Foo==1.0'])
+        e.dependencies.remove('numpy')
+        self.assertFalse(e.dependencies.contains('numpy'))
+        self.assertEqual(e.dependencies.raw, ['scipy', {'pip': ['Foo==1.0']}])
+        self.assertEqual([str(r) for r in e.dependencies.records()], ['scipy'])
+
+    def test_add_to_new_installer(self):
+        e = env.Environment(dependencies=['nltk'])
+        e.dependencies.add('foo==1.0', installer='pip')
+        self.assertEqual(e.dependencies['pip'], ['foo==1.0'])
+        self.assertEqual(e.dependencies.raw, ['nltk', {'pip': ['foo==1.0']}])
+
+    def test_records(self):
+        e = env.Environment(dependencies=['nltk=3.0', {'pip': ['foo==1.0']}])
+        self.assertEqual([str(r) for r in e.dependencies.records()], ['nltk=3.0'])
+        self.assertEqual(e.dependencies.records('pip')[0].version, '1.0')
+        e.dependencies.add('nltk=3.1')
+        self.assertEqual(e.dependencies.records()[0].version, '3.1')
+
+    def test_add_to_empty_dependencies(self):
+        e = env.Environment(name='empty')
+        e.dependencies.add('nltk')
+        self.assertEqual(e.to_dict()['dependencies'], ['nltk'])
+
+
+class from_environment_TestCase(unittest.TestCase):
+    def export(self, pip_installed=None, **kwargs):
+        if pip_installed is None:
+            pip_installed = lambda prefix, output: iter([
+                PipPackage(name='foo', version='1.0'),
+                PipPackage(name='python', version='2.7.11'),
+            ])
+
+        with mock.patch.object(env.install, 'linked') as linked:
+            linked.return_value = set(['python-2.7.11-0', 'conda-forge::numpy-1.9.0-py27_0'])
+            with mock.patch.object(env, 'pip_installed', side_effect=pip_installed):
+                with mock.patch.object(env.config, 'get_rc_urls', return_value=[]):
+                    return env.from_environment('exported', '/some/prefix', **kwargs)
+
+    def test_exports_dependencies(self):
+        e = self.export()
+        self.assertEqual(e.dependencies.raw, [
+            'conda-forge::numpy=1.9.0=py27_0',
+            'python=2.7.11=0',
+            {'pip': ['foo==1.0']},
+        ])
+
+    def test_pip_timeout_leaves_out_pip_packages(self):
+        event = threading.Event()
+
+        def pip_installed(prefix, output):
+            event.wait(5)
+            yield PipPackage(name='foo', version='1.0')
+
+        with mock.patch.object(env.sys, 'stderr'):
+            e = self.export(pip_installed=pip_installed, pip_timeout=0.01)
+        event.set()
+        self.assertEqual(e.dependencies.raw, ['conda-forge::numpy=1.9.0=py27_0', 'python=2.7.11=0'])
+
+    def test_exports_without_builds(self):
+        e = self.export(no_builds=True)
+        self.assertEqual(e.dependencies.raw[:2], ['conda-forge::numpy=1.9.0', 'python=2.7.11'])
+
+
 class DirectoryTestCase(unittest.TestCase):
     directory = utils.support_file('example')
 
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env import index_cache
+
+URLS = {
+    'https://conda.anaconda.org/conda-forge/linux-64/': ('conda-forge', 1),
+    'https://conda.anaconda.org/conda-forge/noarch/': ('conda-forge', 1),
+}
+
+
+class SplitChannelsTestCase(unittest.TestCase):
+    def test_nodefaults(self):
+        self.assertEqual(index_cache.split_channels(['conda-forge', 'nodefaults']),
+                         (['conda-forge'], False))
+        self.assertEqual(index_cache.split_channels(['conda-forge']), (['conda-forge'], True))
+
+
+class IndexCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.directory, 'cache'))
+        patchers = [
+            mock.patch.object(index_cache, 'pkgs_dirs', [self.directory]),
+            mock.patch.object(index_cache, 'effective_channels', return_value=URLS),
+            mock.patch.object(index_cache.common, 'get_index_trap',
+                              side_effect=lambda **kwargs: {'numpy.tar.bz2': {'size': 1}}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.get_index_trap = index_cache.common.get_index_trap
+        self.cache = index_cache.IndexCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_repodata(self, url, content='{}', mtime=None):
+        path = os.path.join(self.directory, 'cache', index_cache.cache_fn_url(url))
+        with open(path, 'w') as fp:
+            fp.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def test_loads_once(self):
+        first = self.cache.get(['conda-forge'], prepend=False)
+        second = self.cache.get(['conda-forge'], prepend=False)
+        self.assertEqual(first, second)
+        self.assertEqual(1, self.get_index_trap.call_count)
+        self.get_index_trap.assert_called_with(channel_urls=['conda-forge'], prepend=False,
+                                               platform=None, offline=False, json=False)
+
+    def test_callers_get_a_copy(self):
+        self.cache.get(['conda-forge'])['feature@'] = {}
+        self.assertNotIn('feature@', self.cache.get(['conda-forge']))
+
+    def test_different_channels(self):
+        self.cache.get(['conda-forge'], prepend=False)
+        index_cache.effective_channels.return_value = {'https://example.com/': ('x', 1)}
+        self.cache.get(['https://example.com/'], prepend=False)
+        self.assertEqual(2, self.get_index_trap.call_count)
+        self.assertEqual(2, len(self.cache))
+
+    def test_changed_repodata_reloads(self):
+        url = sorted(URLS)[0]
+        self.write_repodata(url, mtime=1)
+        self.cache.get(['conda-forge'])
+        self.cache.get(['conda-forge'])
+        self.write_repodata(url, mtime=2)
+        self.cache.get(['conda-forge'])
+        self.assertEqual(2, self.get_index_trap.call_count)
+
+    def test_invalidate(self):
+        self.cache.get(['conda-forge'])
+        self.cache.invalidate(['conda-forge'])
+        self.cache.get(['conda-forge'])
+        self.cache.clear()
+        self.cache.get(['conda-forge'])
+        self.assertEqual(3, self.get_index_trap.call_count)
+
+    def test_memory_cap(self):
+        for url in URLS:
+            self.write_repodata(url, content='x' * 100)
+        self.cache.max_size = 300
+        self.cache.get(['conda-forge'])
+        self.assertEqual(200, self.cache.size())
+        index_cache.effective_channels.return_value = {'https://example.com/': ('x', 1)}
+        self.write_repodata('https://example.com/', content='x' * 150)
+        self.cache.get(['https://example.com/'])
+        self.assertEqual(1, len(self.cache))
+        self.assertEqual(150, self.cache.size())
+
+
+class SharedCacheTestCase(unittest.TestCase):
+    def tearDown(self):
+        index_cache._shared = None
+
+    def test_cap_from_environment(self):
+        index_cache._shared = None
+        with mock.patch.dict(os.environ, {index_cache.MAX_SIZE_VAR: '1.5'}):
+            self.assertEqual(index_cache.shared_cache().max_size, 1536 * 1024)
+        self.assertIs(index_cache.shared_cache(), index_cache.shared_cache())
+
+    def test_environment_channels(self):
+        with mock.patch.object(index_cache, 'shared_cache') as shared:
+            index_cache.get_index(['nodefaults', 'conda-forge'], offline=True)
+        shared.return_value.get.assert_called_with(['conda-forge'], False, platform=None,
+                                                   offline=True, json=False)
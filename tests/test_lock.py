@@ -0,0 +1,171 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda.config import subdir
+
+from conda_env import lock
+from conda_env.env import Environment
+from conda_env.exceptions import InvalidLockFile, UnresolvablePipRequirements
+
+URL = 'https://repo.continuum.io/pkgs/free/%s/' % subdir
+INDEX = {
+    'numpy-1.9.2-py27_0.tar.bz2': {
+        'name': 'numpy', 'version': '1.9.2', 'build': 'py27_0', 'build_number': 0,
+        'depends': ['python 2.7*'], 'md5': 'a' * 32, 'size': 100, 'priority': 1,
+        'fn': 'numpy-1.9.2-py27_0.tar.bz2', 'url': URL + 'numpy-1.9.2-py27_0.tar.bz2',
+    },
+    'python-2.7.11-0.tar.bz2': {
+        'name': 'python', 'version': '2.7.11', 'build': '0', 'build_number': 0,
+        'depends': [], 'md5': 'b' * 32, 'size': 200,
+        'fn': 'python-2.7.11-0.tar.bz2', 'url': URL + 'python-2.7.11-0.tar.bz2',
+    },
+}
+
+
+DOWNLOADED = ('Flask-0.10.1.tar.gz', 'itsdangerous-0.24.tar.gz',
+              'six-1.10.0-py2.py3-none-any.whl')
+
+
+def download(files, returncode=0, stderr=''):
+    """A Popen stand-in writing files into pip download's --dest"""
+    def popen(cmd, **kwargs):
+        directory = cmd[cmd.index('--dest') + 1]
+        for name in files:
+            with open(os.path.join(directory, name), 'wb') as fp:
+                fp.write(name.encode('utf-8'))
+        process = mock.Mock(returncode=returncode)
+        process.communicate.return_value = ('', stderr)
+        return process
+    return popen
+
+
+def sha256(name):
+    return hashlib.sha256(name.encode('utf-8')).hexdigest()
+
+
+class ResolveTestCase(unittest.TestCase):
+    def resolve(self, pip=('flask==0.10.1', 'six'), popen=download(DOWNLOADED), **kwargs):
+        env = Environment(name='stats', channels=['nodefaults', 'conda-forge'],
+                          dependencies=['numpy', {'pip': list(pip)}], **kwargs)
+        actions = {'LINK': ['python-2.7.11-0 1 False', 'numpy-1.9.2-py27_0 1 False']}
+        with mock.patch.object(lock, 'get_index', return_value=INDEX) as get_index:
+            with mock.patch.object(lock.plan, 'install_actions', return_value=actions) as plan:
+                with mock.patch.object(lock.subprocess, 'Popen',
+                                       side_effect=popen) as self.popen:
+                    result = lock.resolve(env)
+        return result, get_index, plan
+
+    def test_records_linked_packages_in_order(self):
+        result, get_index, plan = self.resolve()
+        get_index.assert_called_with(['nodefaults', 'conda-forge'])
+        self.assertEqual(plan.call_args[0][2], ['numpy'])
+        self.assertFalse(os.path.exists(plan.call_args[0][0]))
+        self.assertEqual([r['name'] for r in result.packages], ['python', 'numpy'])
+        self.assertNotIn('priority', result.packages[1])
+        self.assertEqual(result.channels, ['nodefaults', 'conda-forge'])
+        self.assertEqual(result.platform, subdir)
+
+    def test_pip_requirements_are_locked_with_their_dependencies(self):
+        result, _, _ = self.resolve()
+        self.assertEqual(result.pip, [
+            'flask==0.10.1 --hash=sha256:' + sha256('Flask-0.10.1.tar.gz'),
+            'itsdangerous==0.24 --hash=sha256:' + sha256('itsdangerous-0.24.tar.gz'),
+            'six==1.10.0 --hash=sha256:' + sha256('six-1.10.0-py2.py3-none-any.whl'),
+        ])
+
+    def test_pip_downloads_for_the_resolved_python(self):
+        self.resolve()
+        cmd = self.popen.call_args[0][0]
+        self.assertEqual(cmd[cmd.index('--python-version') + 1], '27')
+        self.assertIn('--only-binary=:all:', cmd)
+        self.assertEqual(cmd[-2:], ['flask==0.10.1', 'six'])
+
+    def test_no_pip_requirements(self):
+        result, _, _ = self.resolve(pip=())
+        self.assertEqual(result.pip, [])
+        self.assertFalse(self.popen.called)
+
+    def test_failed_download(self):
+        with self.assertRaises(UnresolvablePipRequirements) as e:
+            self.resolve(popen=download((), 1, 'Collecting six\nNo matching distribution\n'))
+        self.assertEqual(e.exception.requirements, ['flask==0.10.1', 'six'])
+        self.assertEqual(e.exception.reason, 'No matching distribution')
+
+    def test_editable_requirements_are_refused(self):
+        with self.assertRaises(UnresolvablePipRequirements) as e:
+            self.resolve(pip=['flask==0.10.1', '-e ./foo'])
+        self.assertEqual(e.exception.requirements, ['-e ./foo'])
+        self.assertFalse(self.popen.called)
+
+    def test_artifact_pin(self):
+        self.assertEqual(lock.artifact_pin('Flask_Login-0.3.2-py2-none-any.whl'),
+                         ('flask-login', '0.3.2'))
+        self.assertEqual(lock.artifact_pin('python-dateutil-2.5.3.tar.gz'),
+                         ('python-dateutil', '2.5.3'))
+        self.assertIsNone(lock.artifact_pin('README.txt'))
+
+
+class LockTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'environment.lock.yml')
+        self.lock = lock.Lock('stats', subdir, ['defaults'],
+                              [INDEX['python-2.7.11-0.tar.bz2'],
+                               INDEX['numpy-1.9.2-py27_0.tar.bz2']],
+                              ['flask==0.10.1'])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_default_filename(self):
+        self.assertEqual(lock.default_filename('/path/environment.yml'),
+                         '/path/environment.lock.yml')
+
+    def test_round_trip(self):
+        self.lock.save(self.filename)
+        loaded = lock.Lock.load(self.filename)
+        self.assertEqual(loaded.to_dict(), self.lock.to_dict())
+        self.assertEqual(loaded.filename, self.filename)
+
+    def test_urls(self):
+        self.assertEqual(self.lock.urls()[1], URL + 'numpy-1.9.2-py27_0.tar.bz2#' + 'a' * 32)
+
+    def test_index_uses_conda_keys(self):
+        index = self.lock.index()
+        self.assertEqual(sorted(index), sorted(INDEX))
+        self.assertEqual(index['numpy-1.9.2-py27_0.tar.bz2']['schannel'], 'defaults')
+
+    def test_install_does_not_solve(self):
+        args = mock.Mock(quiet=True)
+        with mock.patch.object(lock, 'explicit') as explicit:
+            with mock.patch.object(lock, 'get_installer') as get_installer:
+                with mock.patch.object(lock.plan, 'install_actions') as plan:
+                    self.lock.install('/some/prefix', args)
+        explicit.assert_called_with(self.lock.urls(), '/some/prefix', verbose=False,
+                                    index=self.lock.index())
+        get_installer.return_value.assert_called_with(
+            '/some/prefix', ['flask==0.10.1'], args, None)
+        self.assertTrue(get_installer.return_value.return_value.install.called)
+        self.assertFalse(plan.called)
+
+    def test_other_platform(self):
+        self.lock.platform = 'other-64'
+        self.assertRaises(InvalidLockFile, self.lock.install, '/some/prefix', mock.Mock())
+
+    def test_invalid_files(self):
+        self.assertRaises(InvalidLockFile, lock.Lock.load, self.filename)
+        for content in ('name: stats\n', 'version: 1\npackages:\n  - name: x\n', '{'):
+            with open(self.filename, 'w') as fp:
+                fp.write(content)
+            self.assertRaises(InvalidLockFile, lock.Lock.load, self.filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
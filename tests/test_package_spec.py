@@ -0,0 +1,60 @@
+import pickle
+import unittest
+
+from conda_env.package_spec import PackageSpec
+
+
+class PackageSpecTestCase(unittest.TestCase):
+    def assertRoundTrips(self, line, installer='conda'):
+        spec = PackageSpec.from_line(line, installer)
+        self.assertEqual(line, spec.to_yaml())
+        self.assertEqual(spec, PackageSpec.from_line(spec.to_yaml(), installer))
+
+    def test_conda_lines_round_trip(self):
+        for line in ('nltk', 'python=2.7', 'nltk=3.0.0=np18py27',
+                     'numpy>=1.9,<2', 'conda-forge::numpy=1.9'):
+            self.assertRoundTrips(line)
+
+    def test_pip_lines_round_trip(self):
+        for line in ('foo', 'foo==1.0', 'Flask-Testing>=0.4', 'foo[bar]==1.0',
+                     'Foo_Bar===1.0', 'foo~=1.0', 'foo!=1.0', 'foo~=1.0,!=1.0.1',
+                     '-e git+https://github.com/conda/conda-env#egg=conda-env'):
+            self.assertRoundTrips(line, installer='pip')
+
+    def test_pip_operators_are_kept(self):
+        self.assertEqual(PackageSpec.from_line('foo==1.0', 'pip').version, '1.0')
+        self.assertEqual(PackageSpec.from_line('foo===1.0', 'pip').version, '===1.0')
+        self.assertEqual(PackageSpec.from_line('foo~=1.0', 'pip').version, '~=1.0')
+
+    def test_parses_conda_fields(self):
+        spec = PackageSpec.from_line('conda-forge::nltk=3.0.0=np18py27')
+        self.assertEqual(spec.name, 'nltk')
+        self.assertEqual(spec.version, '3.0.0')
+        self.assertEqual(spec.build, 'np18py27')
+        self.assertEqual(spec.channel, 'conda-forge')
+        self.assertEqual(spec.installer, 'conda')
+
+    def test_parses_match_spec_form(self):
+        spec = PackageSpec.from_line('nltk 3.0.0 np18py27')
+        self.assertEqual(spec.to_yaml(), 'nltk=3.0.0=np18py27')
+
+    def test_from_dist(self):
+        spec = PackageSpec.from_dist('conda-forge::python-2.7.11-0')
+        self.assertEqual(spec.to_yaml(), 'conda-forge::python=2.7.11=0')
+        self.assertEqual(spec.without_build().to_yaml(), 'conda-forge::python=2.7.11')
+
+    def test_pip_key_is_normalized(self):
+        spec = PackageSpec.from_line('Flask_Testing>=0.4', installer='pip')
+        self.assertEqual(spec.key, 'flask-testing')
+
+    def test_names_are_interned(self):
+        a = PackageSpec.from_line(''.join(['num', 'py=1.9']))
+        b = PackageSpec.from_line('numpy=1.10')
+        self.assertIs(a.name, b.name)
+
+    def test_has_no_instance_dict(self):
+        self.assertFalse(hasattr(PackageSpec('numpy'), '__dict__'))
+
+    def test_pickles(self):
+        spec = PackageSpec.from_line('numpy=1.9=py27_0')
+        self.assertEqual(spec, pickle.loads(pickle.dumps(spec, pickle.HIGHEST_PROTOCOL)))
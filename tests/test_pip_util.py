@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env import pip_util
+
+
+def write(path, content=''):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, 'w') as fp:
+        fp.write(content)
+
+
+class InstalledFromMetadataTestCase(unittest.TestCase):
+    def setUp(self):
+        self.prefix = tempfile.mkdtemp()
+        self.project = tempfile.mkdtemp()
+        self.sp = os.path.join(self.prefix, 'lib', 'python3.5', 'site-packages')
+        write(os.path.join(self.prefix, 'bin', 'python'))
+        write(os.path.join(self.prefix, 'bin', 'pip'))
+        write(os.path.join(self.sp, 'Flask_Testing-0.4.dist-info', 'METADATA'),
+              'Metadata-Version: 2.0\nName: Flask-Testing\nVersion: 0.4\n\nVersion: 9\n')
+        write(os.path.join(self.sp, 'six-1.10.0-py3.5.egg-info'),
+              'Metadata-Version: 1.1\nName: six\nVersion: 1.10.0\n')
+        write(os.path.join(self.project, 'devel.egg-info', 'PKG-INFO'),
+              'Name: devel\nVersion: 0.1-dev\n')
+        write(os.path.join(self.sp, 'devel.egg-link'), self.project + '\n.')
+        write(os.path.join(self.sp, 'gone.egg-link'), '/path/does/not/exist\n.')
+
+    def tearDown(self):
+        shutil.rmtree(self.prefix)
+        shutil.rmtree(self.project)
+
+    def test_reads_metadata(self):
+        packages = dict((p['name'], p) for p in pip_util.installed_from_metadata(self.prefix))
+        self.assertEqual(sorted(packages), ['devel', 'flask-testing', 'six'])
+        self.assertEqual(packages['flask-testing']['version'], '0.4')
+        self.assertEqual(packages['six']['version'], '1.10.0')
+
+    def test_develop_installs_have_a_path(self):
+        packages = dict((p['name'], p) for p in pip_util.installed_from_metadata(self.prefix))
+        self.assertEqual(str(packages['devel']),
+                         'devel (%s)-0.1 dev-<pip>' % os.path.normpath(self.project))
+
+    def test_editable_dist_info(self):
+        dist_info = os.path.join(self.sp, 'editable-1.0.dist-info')
+        write(os.path.join(dist_info, 'METADATA'), 'Name: editable\nVersion: 1.0\n')
+        write(os.path.join(dist_info, 'direct_url.json'), json.dumps({
+            'url': 'file:///src/editable', 'dir_info': {'editable': True}}))
+        packages = dict((p['name'], p) for p in pip_util.installed_from_metadata(self.prefix))
+        self.assertEqual(packages['editable']['path'], '/src/editable')
+
+    def test_installed_does_not_run_pip(self):
+        with mock.patch.object(pip_util.subprocess, 'check_output') as check_output:
+            packages = list(pip_util.installed(self.prefix))
+        self.assertFalse(check_output.called)
+        self.assertEqual(3, len(packages))
+
+    def test_falls_back_to_pip_list(self):
+        shutil.rmtree(os.path.join(self.prefix, 'lib'))
+        with mock.patch.object(pip_util, 'installed_from_pip') as from_pip:
+            from_pip.return_value = iter([pip_util.PipPackage(name='foo', version='1.0')])
+            packages = list(pip_util.installed(self.prefix))
+        self.assertEqual(['foo'], [p['name'] for p in packages])
+
+    def test_nothing_without_pip(self):
+        os.remove(os.path.join(self.prefix, 'bin', 'pip'))
+        self.assertEqual([], list(pip_util.installed(self.prefix)))
+
+
+class PipCapabilitiesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.prefix = tempfile.mkdtemp()
+        write(os.path.join(self.prefix, 'bin', 'python'))
+        write(os.path.join(self.prefix, 'bin', 'pip'))
+        pip_util._capabilities.clear()
+        patcher = mock.patch.object(pip_util.subprocess, 'check_output')
+        self.check_output = patcher.start()
+        self.check_output.return_value = b'pip 8.1.2 from /some/prefix (python 3.5)'
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        pip_util._capabilities.clear()
+        shutil.rmtree(self.prefix)
+
+    def test_probes_features(self):
+        capabilities = pip_util.pip_capabilities(self.prefix)
+        self.assertEqual(capabilities['version'], '8.1.2')
+        self.assertTrue(capabilities['disable_version_check'])
+        self.assertFalse(capabilities['json_list'])
+        self.assertFalse(capabilities['progress_bar'])
+
+    def test_probes_only_once(self):
+        pip_util.pip_args(self.prefix)
+        args = pip_util.pip_args(self.prefix)
+        self.assertEqual(1, self.check_output.call_count)
+        self.assertEqual(args[-1], '--disable-pip-version-check')
+
+    def test_upgrading_pip_invalidates(self):
+        pip_util.pip_capabilities(self.prefix)
+        self.check_output.return_value = b'pip 10.0.1 from /some/prefix (python 3.5)'
+        pip = os.path.join(self.prefix, 'bin', 'pip')
+        os.utime(pip, (1, 1))
+        self.assertTrue(pip_util.pip_capabilities(self.prefix)['progress_bar'])
+        self.assertEqual(2, self.check_output.call_count)
+
+    def test_persists_when_caching_is_enabled(self):
+        cache_dir = os.path.join(self.prefix, 'cache')
+        with mock.patch.dict(os.environ, {'CONDA_ENV_CACHE_DIR': cache_dir}):
+            pip_util.pip_capabilities(self.prefix)
+            pip_util._capabilities.clear()
+            pip_util.pip_capabilities(self.prefix)
+        self.assertEqual(1, self.check_output.call_count)
+
+    def test_old_pip(self):
+        self.check_output.return_value = b'pip 1.5.6 from /some/prefix (python 2.7)'
+        self.assertEqual(2, len(pip_util.pip_args(self.prefix)))
@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env import requirements_file
+from conda_env.exceptions import InvalidRequirementsFile
+from conda_env.requirements_file import Requirement, compile_file, parse
+
+
+class RequirementTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        for line in ['flask', 'flask==0.10.1', 'flask>=0.10,<1.0', 'requests[security,socks]>=2',
+                     'pywin32; sys_platform == "win32"', 'numpy=1.9=py27_0',
+                     'numpy 1.9 py27_0', 'conda-forge::numpy', '-e ./local',
+                     'https://example.com/pkg.whl', 'pkg @ https://example.com/pkg.whl']:
+            self.assertEqual(Requirement.parse(line).to_line(), line)
+
+    def test_normalizes_spaces(self):
+        self.assertEqual(Requirement.parse('flask >= 0.10 , < 1.0').to_line(),
+                         'flask>=0.10,<1.0')
+
+    def test_key_is_canonical(self):
+        self.assertEqual(Requirement.parse('Django_Rest.Framework>=3').key,
+                         Requirement.parse('django-rest-framework').key)
+
+    def test_merge(self):
+        merged = Requirement.parse('requests[socks]>=2').merge(
+            Requirement.parse('requests[security]<3', hashes=['sha256:abc']))
+        self.assertEqual(merged.to_line(), 'requests[socks,security]>=2,<3 --hash=sha256:abc')
+
+    def test_pip_only(self):
+        self.assertFalse(Requirement.parse('flask==0.10.1').pip_only)
+        self.assertFalse(Requirement.parse('conda-forge::numpy').pip_only)
+        self.assertTrue(Requirement.parse('-e ./local').pip_only)
+        self.assertTrue(Requirement.parse('requests[security]').pip_only)
+        self.assertTrue(Requirement.parse('flask', hashes=['sha256:abc']).pip_only)
+
+
+class ParseTestCase(unittest.TestCase):
+    def test_comments_and_blank_lines(self):
+        entries = parse('# comment\n\nflask  # web\n  \nhttps://example.com/a.whl#egg=a\n')
+        self.assertEqual([entry[1].to_line() for entry in entries],
+                         ['flask', 'https://example.com/a.whl#egg=a'])
+
+    def test_continuation_and_hashes(self):
+        entries = parse('foo==1.0 \\\n    --hash=sha256:abc \\\n    --hash=sha256:def\n')
+        self.assertEqual(entries[0][1].hashes, ['sha256:abc', 'sha256:def'])
+
+    def test_options(self):
+        entries = parse('-i https://a/simple\n--extra-index-url=https://b/simple\n'
+                        '--pre\n-rbase.txt\n-c constraints.txt\n')
+        self.assertEqual(entries, (
+            ('option', '--index-url=https://a/simple'),
+            ('option', '--extra-index-url=https://b/simple'),
+            ('option', '--pre'),
+            ('include', 'base.txt', False),
+            ('include', 'constraints.txt', True),
+        ))
+
+    def test_unsupported_option(self):
+        self.assertRaises(InvalidRequirementsFile, parse, '--frobnicate\n')
+        self.assertRaises(InvalidRequirementsFile, parse, 'foo --install-option=bar\n')
+
+
+class CompileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as fp:
+            fp.write(content)
+        return path
+
+    def test_includes_are_followed_and_merged(self):
+        self.write('base.txt', 'flask>=0.10\nrequests\n')
+        self.write('deep/web.txt', '-r ../base.txt\nFlask<1.0\n')
+        top = self.write('requirements.txt', '-r base.txt\n-r deep/web.txt\nrequests\nsix\n')
+        compiled = compile_file(top)
+        self.assertEqual(compiled.lines(), ['flask>=0.10,<1.0', 'requests', 'six'])
+        self.assertEqual(len(compiled.files), 3)
+        self.assertFalse(compiled.pip_only)
+
+    def test_constraints_only_apply_to_requirements(self):
+        self.write('constraints.txt', 'flask==0.10.1\nnumpy==1.9\n')
+        top = self.write('requirements.txt', '-c constraints.txt\nflask\n')
+        self.assertEqual(compile_file(top).lines(), ['flask==0.10.1'])
+
+    def test_options_are_kept(self):
+        self.write('base.txt', '--index-url https://a/simple\nfoo==1.0 --hash=sha256:abc\n')
+        top = self.write('requirements.txt', '-r base.txt\n-i https://a/simple\n')
+        compiled = compile_file(top)
+        self.assertEqual(compiled.lines(), ['--index-url=https://a/simple',
+                                            'foo==1.0 --hash=sha256:abc'])
+        self.assertTrue(compiled.pip_only)
+
+    def test_cycles_are_detected(self):
+        self.write('a.txt', '-r b.txt\n')
+        self.write('b.txt', '-r a.txt\n')
+        with self.assertRaises(InvalidRequirementsFile) as e:
+            compile_file(os.path.join(self.directory, 'a.txt'))
+        self.assertIn('include cycle', str(e.exception))
+
+    def test_missing_include(self):
+        top = self.write('requirements.txt', '-r missing.txt\n')
+        self.assertRaises(InvalidRequirementsFile, compile_file, top)
+
+    def test_parses_are_memoized_by_content(self):
+        self.write('a.txt', 'flask\n')
+        self.write('b.txt', 'flask\n')
+        top = self.write('requirements.txt', '-r a.txt\n-r b.txt\n')
+        with mock.patch.object(requirements_file, '_parsed', {}):
+            with mock.patch.object(requirements_file, 'parse', wraps=parse) as parse_mock:
+                compile_file(top)
+                compile_file(top)
+        self.assertEqual(parse_mock.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
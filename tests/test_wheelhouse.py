@@ -0,0 +1,168 @@
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env import wheelhouse
+from conda_env.installers import pip
+
+
+def touch(path):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    open(path, 'w').close()
+
+
+class PinnedTestCase(unittest.TestCase):
+    def test_exact_versions(self):
+        self.assertEqual(wheelhouse.pinned('Foo_Bar==1.0'), ('foo-bar', '1.0'))
+        self.assertEqual(wheelhouse.pinned('foo == 1.0 --hash=sha256:abc'), ('foo', '1.0'))
+
+    def test_anything_else(self):
+        for line in ['foo', 'foo>=1.0', 'foo==1.*', 'foo==1.0,!=1.0.1', 'foo===1.0',
+                     'foo==1.0; python_version < "3"', 'requests[security]==2.11.1', '--pre',
+                     '-e ./foo', 'https://example.com/foo-1.0.tar.gz']:
+            self.assertIsNone(wheelhouse.pinned(line), line)
+
+
+class IndexArgsTestCase(unittest.TestCase):
+    def test_default_index(self):
+        with mock.patch.dict(os.environ, {}):
+            os.environ.pop(wheelhouse.INDEX_VAR, None)
+            self.assertEqual(wheelhouse.index_args(), [])
+
+    def test_url(self):
+        with mock.patch.dict(os.environ, {wheelhouse.INDEX_VAR: 'https://example.com/simple'}):
+            self.assertEqual(wheelhouse.index_args(),
+                             ['--index-url', 'https://example.com/simple'])
+
+    def test_local_directory(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with mock.patch.dict(os.environ, {wheelhouse.INDEX_VAR: directory}):
+            self.assertEqual(wheelhouse.index_args(), ['--no-index', '--find-links', directory])
+
+
+class WheelhouseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.wheelhouse = wheelhouse.Wheelhouse(os.path.join(self.directory, 'tag'), ['pip'])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_missing(self):
+        touch(os.path.join(self.wheelhouse.directory, 'Foo_Bar-1.0-py2.py3-none-any.whl'))
+        touch(os.path.join(self.wheelhouse.directory, 'baz-2.0-1-cp35-cp35m-linux_x86_64.whl'))
+        self.assertEqual(self.wheelhouse.missing(['foo-bar==1.0', 'baz==2.0', 'baz==2.1',
+                                                  'qux', 'quux==3.0']),
+                         ['baz==2.1', 'quux==3.0'])
+
+    @unittest.skipIf(wheelhouse.Version is None, 'needs packaging')
+    def test_versions_are_normalized(self):
+        touch(os.path.join(self.wheelhouse.directory, 'foo-1.0.0-py3-none-any.whl'))
+        touch(os.path.join(self.wheelhouse.directory, 'bar-2.0rc1-py3-none-any.whl'))
+        self.assertEqual(self.wheelhouse.missing(['foo==1.0', 'foo==1', 'bar==2.0.0-rc.1',
+                                                  'foo==1.0.1']),
+                         ['foo==1.0.1'])
+
+    def test_fill_builds_each_missing_wheel(self):
+        with mock.patch.object(wheelhouse.subprocess, 'Popen') as popen:
+            popen.return_value.returncode = 0
+            self.assertEqual(self.wheelhouse.fill(['foo==1.0', 'bar', 'baz==2.0'],
+                                                  find_links=['/staged'], workers=1),
+                             [True, True])
+
+        cmds = [call[0][0] for call in popen.call_args_list]
+        self.assertEqual([cmd[-1] for cmd in cmds], ['foo==1.0', 'baz==2.0'])
+        for cmd in cmds:
+            self.assertEqual(cmd[:4], ['pip', 'wheel', '--quiet', '--wheel-dir'])
+            self.assertEqual(os.path.dirname(cmd[4]), self.wheelhouse.directory)
+            self.assertEqual(cmd[5:7], ['--find-links', self.wheelhouse.directory])
+            self.assertIn('--no-deps', cmd)
+            self.assertIn('/staged', cmd)
+        self.assertEqual(os.listdir(self.wheelhouse.directory), [])
+
+    def test_finished_wheels_are_moved_in(self):
+        def build(cmd, **kwargs):
+            wheel_dir = cmd[cmd.index('--wheel-dir') + 1]
+            self.assertNotEqual(wheel_dir, self.wheelhouse.directory)
+            touch(os.path.join(wheel_dir, 'foo-1.0-py2.py3-none-any.whl'))
+            return mock.Mock(returncode=0)
+
+        with mock.patch.object(wheelhouse.subprocess, 'Popen', side_effect=build):
+            self.assertTrue(self.wheelhouse.build(['foo==1.0']))
+        self.assertEqual(os.listdir(self.wheelhouse.directory), ['foo-1.0-py2.py3-none-any.whl'])
+
+    def test_uses_the_configured_index(self):
+        with mock.patch.dict(os.environ, {wheelhouse.INDEX_VAR: 'https://example.com/simple'}):
+            cmd = self.wheelhouse.wheel_cmd(['foo==1.0'])
+        self.assertEqual(cmd[-3:], ['--index-url', 'https://example.com/simple', 'foo==1.0'])
+
+    def test_one_directory_per_interpreter(self):
+        prefix = os.path.join(self.directory, 'prefix')
+        touch(os.path.join(prefix, 'bin', 'python'))
+        touch(os.path.join(prefix, 'bin', 'pip'))
+        cache = os.path.join(self.directory, 'cache')
+        with mock.patch.dict(os.environ, {'CONDA_ENV_CACHE_DIR': cache}):
+            with mock.patch.object(wheelhouse.subprocess, 'check_output') as check_output:
+                check_output.return_value = b'cpython-3.5-cpython-35m-x86_64-linux-gnu-linux/x86_64\n'
+                with mock.patch.object(wheelhouse, 'pip_args', return_value=['pip']):
+                    found = wheelhouse.Wheelhouse.for_prefix(prefix)
+                    wheelhouse.Wheelhouse.for_prefix(prefix)
+        self.assertEqual(found.directory, os.path.join(
+            cache, 'wheelhouse', 'cpython-3.5-cpython-35m-x86_64-linux-gnu-linux_x86_64'))
+        self.assertEqual(1, check_output.call_count)
+
+    def test_disabled_without_cache(self):
+        with mock.patch.dict(os.environ, {}):
+            os.environ.pop('CONDA_ENV_CACHE_DIR', None)
+            self.assertIsNone(wheelhouse.Wheelhouse.for_prefix(self.directory))
+
+
+class InstallFromWheelhouseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.wheelhouse = mock.Mock(pip_cmd=['pip'], directory='/wheels')
+        self.wheelhouse.install_args.return_value = ['--no-index', '--find-links', '/wheels']
+
+    def test_warm_wheelhouse(self):
+        with mock.patch.object(pip.subprocess, 'Popen') as popen:
+            popen.return_value.returncode = 0
+            popen.return_value.communicate.return_value = ('', '')
+            self.assertTrue(pip.install_from_wheelhouse(self.wheelhouse, ['foo==1.0']))
+
+        self.assertEqual(popen.call_args[0][0],
+                         ['pip', 'install', '--no-index', '--find-links', '/wheels', 'foo==1.0'])
+        self.assertFalse(self.wheelhouse.build.called)
+
+    def test_builds_dependencies_then_retries(self):
+        first = mock.Mock(returncode=1)
+        first.communicate.return_value = ('', 'No matching distribution found for bar')
+        second = mock.Mock(returncode=0)
+        with mock.patch.object(pip.subprocess, 'Popen', side_effect=[first, second]) as popen:
+            self.assertTrue(pip.install_from_wheelhouse(self.wheelhouse, ['foo==1.0'],
+                                                        staged='/staged'))
+
+        self.wheelhouse.build.assert_called_with(['foo==1.0'], find_links=['/staged'])
+        self.assertEqual(2, popen.call_count)
+
+    def test_installer_falls_back_to_the_index(self):
+        with mock.patch.object(pip.Wheelhouse, 'for_prefix', return_value=self.wheelhouse):
+            with mock.patch.object(pip, 'install_from_wheelhouse', return_value=False):
+                with mock.patch.object(pip.subprocess, 'Popen') as popen:
+                    popen.return_value.returncode = 0
+                    with mock.patch.object(pip, 'pip_args', return_value=['pip']):
+                        pip.install('/some/prefix', ['foo==1.0'], None, None)
+        popen.assert_called_with(['pip', 'install', 'foo==1.0'], universal_newlines=True)
+
+    def test_editables_skip_the_wheelhouse(self):
+        with mock.patch.object(pip.Wheelhouse, 'for_prefix') as for_prefix:
+            with mock.patch.object(pip.subprocess, 'Popen') as popen:
+                popen.return_value.returncode = 0
+                with mock.patch.object(pip, 'pip_args', return_value=['pip']):
+                    pip.install('/some/prefix', ['-e ./foo'], None, None)
+        self.assertFalse(for_prefix.called)
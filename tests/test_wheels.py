@@ -0,0 +1,189 @@
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env import wheels
+
+
+def make_wheel(directory, name, version, files=None, requires=(), entry_points=None,
+               tag='py2.py3-none-any'):
+    """Write a minimal wheel and return its path"""
+    dist_info = '%s-%s.dist-info' % (name, version)
+    path = os.path.join(directory, '%s-%s-%s.whl' % (name, version, tag))
+    metadata = 'Metadata-Version: 2.0\nName: %s\nVersion: %s\n' % (name, version)
+    metadata += ''.join('Requires-Dist: %s\n' % r for r in requires) + '\nDescription\n'
+    with zipfile.ZipFile(path, 'w') as zf:
+        for member, content in (files or {}).items():
+            zf.writestr(member, content)
+        zf.writestr(dist_info + '/METADATA', metadata)
+        zf.writestr(dist_info + '/WHEEL', 'Wheel-Version: 1.0\nRoot-Is-Purelib: true\n')
+        if entry_points:
+            zf.writestr(dist_info + '/entry_points.txt', entry_points)
+        zf.writestr(dist_info + '/RECORD', '')
+    return path
+
+
+class HelpersTestCase(unittest.TestCase):
+    def test_requires(self):
+        metadata = ('Name: foo\nRequires-Dist: six (>=1.0)\nRequires-Dist: Bar_Baz[x]\n'
+                    'Requires-Dist: enum34; python_version < "3.4"\n\nRequires-Dist: body\n')
+        self.assertEqual(wheels.requires(metadata), [
+            ('six', False, None),
+            ('bar-baz', True, None),
+            ('enum34', False, 'python_version < "3.4"'),
+        ])
+
+    @unittest.skipIf(wheels.Marker is None, 'needs packaging')
+    def test_marker_applies(self):
+        environment = {'python_version': '2.7', 'sys_platform': 'linux'}
+        self.assertTrue(wheels.marker_applies(None, environment))
+        self.assertTrue(wheels.marker_applies('python_version < "3.4"', environment))
+        self.assertFalse(wheels.marker_applies('sys_platform == "win32"', environment))
+        self.assertFalse(wheels.marker_applies('extra == "security"', environment))
+        with self.assertRaises(wheels.Unsupported):
+            wheels.marker_applies('python_version <', environment)
+
+    def test_entry_points(self):
+        parsed = wheels.entry_points('[console_scripts]\nfoo = foo.cli:main [extra]\n\n'
+                                     '[other]\nbar=bar:run\n')
+        self.assertEqual(parsed, {'console_scripts': [('foo', 'foo.cli:main [extra]')],
+                                  'other': [('bar', 'bar:run')]})
+
+    def test_script(self):
+        text = wheels.script('/prefix/bin/python', 'foo.cli:App.main [extra]')
+        self.assertTrue(text.startswith('#!/prefix/bin/python\n'))
+        self.assertIn('from foo.cli import App\n', text)
+        self.assertIn('sys.exit(App.main())', text)
+
+
+class InstallPinnedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.directory, 'prefix')
+        self.wheels = os.path.join(self.directory, 'wheels')
+        os.makedirs(self.wheels)
+        self.site_packages = os.path.join(self.prefix, 'lib', 'site-packages')
+        self.bin = os.path.join(self.prefix, 'bin')
+        os.makedirs(self.site_packages)
+        os.makedirs(self.bin)
+        for name in ('python', 'pip'):
+            open(os.path.join(self.bin, name), 'w').close()
+        self.paths = {
+            'purelib': self.site_packages, 'platlib': self.site_packages,
+            'scripts': self.bin, 'data': self.prefix,
+            'include': os.path.join(self.prefix, 'include'),
+            'executable': sys.executable, 'version': '%d.%d' % sys.version_info[:2],
+            'markers': {'python_version': '2.7', 'sys_platform': 'linux', 'os_name': 'posix'},
+        }
+        patcher = mock.patch.object(wheels, 'interpreter_paths', return_value=self.paths)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(wheels, 'pip_paths', return_value=(
+            sys.executable, os.path.join(self.bin, 'pip')))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_installs_pinned_wheels(self):
+        make_wheel(self.wheels, 'foo', '1.0',
+                   files={'foo/__init__.py': 'VALUE = 1\n',
+                          'foo-1.0.data/scripts/foo-tool': '#!python\nprint("hi")\n'},
+                   requires=['bar'], entry_points='[console_scripts]\nfoo = foo:main\n')
+        make_wheel(self.wheels, 'bar', '2.0', files={'bar.py': 'VALUE = 2\n'})
+
+        self.assertTrue(wheels.install_pinned(self.prefix, ['foo==1.0', 'bar==2.0'],
+                                              [self.wheels]))
+
+        self.assertTrue(os.path.exists(os.path.join(self.site_packages, 'foo', '__init__.py')))
+        self.assertTrue(os.path.exists(os.path.join(self.site_packages, 'bar.py')))
+        dist_info = os.path.join(self.site_packages, 'foo-1.0.dist-info')
+        with open(os.path.join(dist_info, 'INSTALLER')) as fp:
+            self.assertEqual(fp.read(), 'conda-env\n')
+        with open(os.path.join(dist_info, 'RECORD')) as fp:
+            record = fp.read().splitlines()
+        paths = [line.split(',')[0] for line in record]
+        self.assertIn('foo/__init__.py', paths)
+        self.assertIn('../../bin/foo', paths)
+        self.assertEqual(record[-1], 'foo-1.0.dist-info/RECORD,,')
+        init = [line for line in record if line.startswith('foo/__init__.py,')][0]
+        self.assertEqual(init, 'foo/__init__.py,%s,10' % wheels.record_hash(b'VALUE = 1\n'))
+
+        with open(os.path.join(self.bin, 'foo-tool')) as fp:
+            self.assertEqual(fp.readline(), '#!%s\n' % sys.executable)
+        script = os.path.join(self.bin, 'foo')
+        self.assertTrue(os.access(script, os.X_OK))
+        with open(script) as fp:
+            self.assertIn('from foo import main', fp.read())
+
+        compiled = os.listdir(os.path.join(self.site_packages, 'foo', '__pycache__')) \
+            if sys.version_info[0] > 2 else os.listdir(os.path.join(self.site_packages, 'foo'))
+        self.assertTrue(any(name.endswith('.pyc') for name in compiled))
+
+    def test_checks_hashes(self):
+        path = make_wheel(self.wheels, 'foo', '1.0', files={'foo.py': ''})
+        with open(path, 'rb') as fp:
+            digest = hashlib.sha256(fp.read()).hexdigest()
+        self.assertFalse(wheels.install_pinned(self.prefix, ['foo==1.0 --hash=sha256:abc'],
+                                               [self.wheels]))
+        self.assertTrue(wheels.install_pinned(
+            self.prefix, ['foo==1.0 --hash=sha256:%s' % digest], [self.wheels]))
+
+    @unittest.skipIf(wheels.Marker is None, 'needs packaging')
+    def test_pins_match_any_spelling_of_the_version(self):
+        make_wheel(self.wheels, 'foo', '1.0.0', files={'foo.py': ''})
+        self.assertTrue(wheels.install_pinned(self.prefix, ['foo==1.0'], [self.wheels]))
+
+    def test_leaves_the_rest_to_pip(self):
+        make_wheel(self.wheels, 'foo', '1.0', files={'foo.py': ''}, requires=['bar'])
+        make_wheel(self.wheels, 'baz', '1.0', files={'baz.py': ''})
+        open(os.path.join(self.wheels, 'qux-1.0.tar.gz'), 'w').close()
+        for lines in (['baz'], ['baz>=1.0'], ['--pre', 'baz==1.0'], ['qux==1.0'],
+                      ['foo==1.0'], ['baz==2.0']):
+            self.assertFalse(wheels.install_pinned(self.prefix, lines, [self.wheels]), lines)
+        self.assertEqual(os.listdir(self.site_packages), [])
+
+    @unittest.skipIf(wheels.Marker is None, 'needs packaging')
+    def test_markers_are_evaluated_for_the_prefix(self):
+        make_wheel(self.wheels, 'foo', '1.0', files={'foo.py': ''},
+                   requires=['pywin32; sys_platform == "win32"', 'bar[security]; extra == "x"'])
+        self.assertTrue(wheels.install_pinned(self.prefix, ['foo==1.0'], [self.wheels]))
+
+        make_wheel(self.wheels, 'baz', '1.0', files={'baz.py': ''},
+                   requires=['enum34; python_version < "3.4"'])
+        self.assertFalse(wheels.install_pinned(self.prefix, ['baz==1.0'], [self.wheels]))
+
+    def test_extras_are_left_to_pip(self):
+        make_wheel(self.wheels, 'foo', '1.0', files={'foo.py': ''}, requires=['bar[x]'])
+        make_wheel(self.wheels, 'bar', '1.0', files={'bar.py': ''})
+        self.assertFalse(wheels.install_pinned(self.prefix, ['foo==1.0', 'bar==1.0'],
+                                               [self.wheels]))
+        self.assertFalse(wheels.install_pinned(self.prefix, ['bar[x]==1.0'], [self.wheels]))
+
+    def test_already_installed(self):
+        make_wheel(self.wheels, 'foo', '1.0', files={'foo.py': ''})
+        os.makedirs(os.path.join(self.site_packages, 'foo-0.9.dist-info'))
+        self.assertFalse(wheels.install_pinned(self.prefix, ['foo==1.0'], [self.wheels]))
+
+    def test_only_pure_wheels_from_pure_directories(self):
+        make_wheel(self.wheels, 'foo', '1.0', files={'foo.py': ''},
+                   tag='cp99-cp99m-linux_x86_64')
+        self.assertFalse(wheels.install_pinned(self.prefix, ['foo==1.0'], [], [self.wheels]))
+        make_wheel(self.wheels, 'bar', '1.0', files={'bar.py': ''})
+        self.assertTrue(wheels.install_pinned(self.prefix, ['bar==1.0'], [], [self.wheels]))
+
+    def test_unsafe_paths_roll_back(self):
+        make_wheel(self.wheels, 'foo', '1.0', files={'foo.py': '', '../evil.py': ''})
+        with mock.patch.object(wheels.sys, 'stderr'):
+            self.assertFalse(wheels.install_pinned(self.prefix, ['foo==1.0'], [self.wheels]))
+        self.assertFalse(os.path.exists(os.path.join(self.site_packages, 'foo.py')))
+        self.assertFalse(os.path.exists(os.path.join(self.prefix, 'lib', 'evil.py')))
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env import workspace
+
+
+def write(path, content):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(path, 'w') as fp:
+        fp.write(content)
+
+
+class ScanTestCase(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        write(os.path.join(self.root, 'a', 'environment.yml'), 'name: a\ndependencies:\n  - nltk\n')
+        write(os.path.join(self.root, 'b', 'c', 'environment.yaml'), 'name: b\n')
+        write(os.path.join(self.root, 'b', 'environment.yml'), 'name: b\n')
+        write(os.path.join(self.root, 'node_modules', 'environment.yml'), 'name: ignored\n')
+        write(os.path.join(self.root, 'build', 'environment.yml'), 'name: build\n')
+        write(os.path.join(self.root, 'broken', 'environment.yml'), '')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def test_finds_environment_files(self):
+        found = workspace.find_environment_files(self.root, workers=3)
+        self.assertEqual(found, sorted([
+            self.path('a', 'environment.yml'),
+            self.path('b', 'c', 'environment.yaml'),
+            self.path('b', 'environment.yml'),
+            self.path('broken', 'environment.yml'),
+            self.path('build', 'environment.yml'),
+        ]))
+
+    def test_honors_ignore_patterns(self):
+        found = workspace.find_environment_files(self.root, ignore=['build', 'b/*'])
+        self.assertNotIn(self.path('build', 'environment.yml'), found)
+        self.assertNotIn(self.path('b', 'environment.yml'), found)
+        self.assertIn(self.path('node_modules', 'environment.yml'), found)
+
+    def test_indexes_by_name(self):
+        index = workspace.scan(self.root)
+        by_name = index.by_name()
+        self.assertEqual(sorted(by_name), ['a', 'b', 'build'])
+        self.assertEqual(sorted(by_name['b']), [self.path('b', 'c', 'environment.yaml'),
+                                                self.path('b', 'environment.yml')])
+        self.assertEqual(list(index.errors), [self.path('broken', 'environment.yml')])
+
+    def test_saved_index_skips_unchanged_files(self):
+        filename = self.path('index.json')
+        workspace.scan(self.root).save(filename)
+        previous = workspace.WorkspaceIndex.load(filename)
+        with mock.patch.object(workspace.env, 'from_yaml', side_effect=TypeError) as from_yaml:
+            index = workspace.scan(self.root, index=previous)
+        # Only the file that failed to parse is read again
+        self.assertEqual(1, from_yaml.call_count)
+        self.assertEqual(sorted(index.by_name()), ['a', 'b', 'build'])
+
+    def test_changed_files_are_reindexed(self):
+        previous = workspace.scan(self.root)
+        write(self.path('a', 'environment.yml'), 'name: renamed\n')
+        os.utime(self.path('a', 'environment.yml'), (1, 1))
+        index = workspace.scan(self.root, index=previous)
+        self.assertIn('renamed', index.by_name())
+
+    def test_load_missing_index(self):
+        self.assertEqual({}, workspace.WorkspaceIndex.load(self.path('missing.json')).entries)
+
+    def test_scan_command_ignore_adds_to_the_defaults(self):
+        from conda_env.cli import main_scan
+
+        args = mock.Mock(directory=self.root, ignore=['build'], index=None, workers=1,
+                         json=True)
+        with mock.patch.object(main_scan.common, 'stdout_json') as stdout_json:
+            main_scan.execute(args, None)
+        self.assertEqual(sorted(stdout_json.call_args[0][0]['environments']), ['a', 'b'])
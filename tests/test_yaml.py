@@ -0,0 +1,56 @@
+import unittest
+
+import yaml
+
+from conda_env import yaml as env_yaml
+
+
+def get_ordered_data():
+    return env_yaml.dict([
+        ('name', 'ordered'),
+        ('channels', ['b', 'a']),
+        ('dependencies', ['zlib', 'python=3.5', {'pip': ['foo==1.0']}]),
+    ])
+
+
+class YamlTestCase(unittest.TestCase):
+    def test_dump_keeps_key_order(self):
+        expected = '\n'.join([
+            'name: ordered',
+            'channels:',
+            '- b',
+            '- a',
+            'dependencies:',
+            '- zlib',
+            '- python=3.5',
+            '- pip:',
+            '  - foo==1.0',
+            '',
+        ])
+        actual = env_yaml.dump(get_ordered_data(), default_flow_style=False)
+        self.assertEqual(expected, actual)
+
+    def test_engines_produce_identical_output(self):
+        data = get_ordered_data()
+        expected = env_yaml.dump(data, Dumper=yaml.Dumper, default_flow_style=False)
+        for dumper in (yaml.SafeDumper, env_yaml.Dumper):
+            actual = env_yaml.dump(data, Dumper=dumper, default_flow_style=False)
+            self.assertEqual(expected, actual)
+
+    def test_load_round_trips_dump(self):
+        data = get_ordered_data()
+        actual = env_yaml.load(env_yaml.dump(data, default_flow_style=False))
+        self.assertEqual(dict(data), actual)
+
+    def test_pure_python_loader_matches(self):
+        data = env_yaml.dump(get_ordered_data(), default_flow_style=False)
+        self.assertEqual(env_yaml.load(data),
+                         env_yaml.load(data, Loader=yaml.SafeLoader))
+
+    def test_iterdump_matches_dump(self):
+        data = get_ordered_data()
+        data['dependencies'] = ['package-%d' % i for i in range(10)] + [{'pip': ['foo']}]
+        expected = env_yaml.dump(data, default_flow_style=False)
+        chunks = list(env_yaml.iterdump(data, chunk_size=3))
+        self.assertEqual(expected, ''.join(chunks))
+        self.assertTrue(len(chunks) > 3)
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from conda_env.exceptions import EnvironmentNotCached
+from conda_env.utils.binstar_cache import CachingClient
+
+
+class FakeResponse(object):
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeBinstar(object):
+    """A local stand-in for the anaconda.org API"""
+
+    def __init__(self):
+        self.packages = {}
+        self.files = {}
+        self.calls = []
+
+    def upload(self, username, packagename, version, text, basename='environment.yml'):
+        package = self.packages.setdefault((username, packagename), {'files': []})
+        package['files'].append({'type': 'env', 'version': version, 'basename': basename,
+                                 'md5': str(hash(text))})
+        self.files[(username, packagename, version, basename)] = text
+
+    def package(self, username, packagename):
+        self.calls.append(('package', username, packagename))
+        return self.packages[(username, packagename)]
+
+    def download(self, username, packagename, version, basename):
+        self.calls.append(('download', username, packagename, version, basename))
+        text = self.files.get((username, packagename, version, basename))
+        return FakeResponse(text) if text is not None else None
+
+
+class CachingClientTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.now = 1000.0
+        self.server = FakeBinstar()
+        self.server.upload('darth', 'deathstar', '1.0', 'name: deathstar')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def client(self, **kwargs):
+        kwargs.setdefault('ttl', 60)
+        return CachingClient(self.server, self.directory, clock=lambda: self.now, **kwargs)
+
+    def calls(self, kind):
+        return [call for call in self.server.calls if call[0] == kind]
+
+    def test_package_is_served_from_cache_within_ttl(self):
+        self.client().package('darth', 'deathstar')
+        self.now += 30
+        package = self.client().package('darth', 'deathstar')
+        self.assertEqual(package['files'][0]['version'], '1.0')
+        self.assertEqual(len(self.calls('package')), 1)
+
+    def test_package_is_revalidated_after_ttl(self):
+        self.client().package('darth', 'deathstar')
+        self.server.upload('darth', 'deathstar', '2.0', 'name: deathstar2')
+        self.now += 61
+        package = self.client().package('darth', 'deathstar')
+        self.assertEqual(len(package['files']), 2)
+        self.assertEqual(len(self.calls('package')), 2)
+
+    def test_download_is_cached(self):
+        client = self.client()
+        client.package('darth', 'deathstar')
+        self.assertEqual(client.download('darth', 'deathstar', '1.0', 'environment.yml').text,
+                         'name: deathstar')
+        self.assertEqual(client.download('darth', 'deathstar', '1.0', 'environment.yml').text,
+                         'name: deathstar')
+        self.assertEqual(len(self.calls('download')), 1)
+
+    def test_changed_file_is_downloaded_again(self):
+        client = self.client()
+        client.package('darth', 'deathstar')
+        client.download('darth', 'deathstar', '1.0', 'environment.yml')
+
+        self.server.packages.clear()
+        self.server.upload('darth', 'deathstar', '1.0', 'name: rebuilt')
+        self.now += 61
+        client.package('darth', 'deathstar')
+        self.assertEqual(client.download('darth', 'deathstar', '1.0', 'environment.yml').text,
+                         'name: rebuilt')
+        self.assertEqual(len(self.calls('download')), 2)
+
+    def test_failed_download_is_not_cached(self):
+        client = self.client()
+        self.assertEqual(client.download('darth', 'deathstar', '9.9', 'environment.yml'), None)
+        self.assertEqual(client.download('darth', 'deathstar', '9.9', 'environment.yml'), None)
+        self.assertEqual(len(self.calls('download')), 2)
+
+    def test_offline_serves_stale_entries(self):
+        client = self.client()
+        client.package('darth', 'deathstar')
+        client.download('darth', 'deathstar', '1.0', 'environment.yml')
+        self.now += 3600
+
+        offline = CachingClient(None, self.directory, ttl=60, offline=True,
+                                clock=lambda: self.now)
+        offline.package('darth', 'deathstar')
+        self.assertEqual(offline.download('darth', 'deathstar', '1.0', 'environment.yml').text,
+                         'name: deathstar')
+        self.assertEqual(len(self.server.calls), 2)
+
+    def test_offline_miss_raises(self):
+        offline = self.client(offline=True)
+        with self.assertRaises(EnvironmentNotCached):
+            offline.package('darth', 'deathstar')
+        with self.assertRaises(EnvironmentNotCached):
+            offline.download('darth', 'deathstar', '1.0', 'environment.yml')
+        self.assertEqual(self.server.calls, [])
+
+    def test_entries_are_evicted(self):
+        client = self.client(max_size=1)
+        client.package('darth', 'deathstar')
+        self.assertEqual(client.cache.entries(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
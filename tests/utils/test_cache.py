@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env.utils import cache
+
+
+class CacheDirTestCase(unittest.TestCase):
+    def test_disabled_by_default(self):
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertEqual(cache.cache_dir('environments'), None)
+
+    def test_uses_environment_variable(self):
+        with mock.patch.dict(os.environ, {cache.CACHE_DIR_VAR: '/some/dir'}):
+            self.assertEqual(cache.cache_dir('environments'),
+                             os.path.join('/some/dir', 'environments'))
+
+
+class HashKeyTestCase(unittest.TestCase):
+    def test_is_stable(self):
+        self.assertEqual(cache.hash_key('a', 1), cache.hash_key('a', 1))
+
+    def test_parts_are_separated(self):
+        self.assertNotEqual(cache.hash_key('ab', 'c'), cache.hash_key('a', 'bc'))
+
+
+class DiskCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = cache.DiskCache(os.path.join(self.directory, 'cache'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_miss_returns_default(self):
+        self.assertEqual(self.cache.get('missing'), None)
+        self.assertEqual(self.cache.get('missing', 42), 42)
+
+    def test_round_trip(self):
+        self.cache.set('key', {'name': 'env'})
+        self.assertEqual(self.cache.get('key'), {'name': 'env'})
+
+    def test_corrupt_entry_is_dropped(self):
+        self.cache.set('key', 'value')
+        with open(self.cache.path('key'), 'wb') as fp:
+            fp.write(b'not a pickle')
+        self.assertEqual(self.cache.get('key'), None)
+        self.assertFalse(os.path.exists(self.cache.path('key')))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('old', 'x' * 100)
+        self.cache.set('new', 'x' * 100)
+        os.utime(self.cache.path('old'), (1, 1))
+        self.cache.max_size = os.path.getsize(self.cache.path('new')) + 1
+        self.cache.evict()
+        self.assertEqual(self.cache.get('old'), None)
+        self.assertEqual(self.cache.get('new'), 'x' * 100)
+
+    def test_clear(self):
+        self.cache.set('key', 'value')
+        self.cache.clear()
+        self.assertEqual(self.cache.entries(), [])
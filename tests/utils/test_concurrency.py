@@ -0,0 +1,46 @@
+import threading
+import unittest
+
+from conda_env.exceptions import TaskTimeout
+from conda_env.utils.concurrency import Task, parallel_map
+
+
+class TaskTestCase(unittest.TestCase):
+    def test_returns_result(self):
+        task = Task(sorted, [3, 1, 2])
+        self.assertEqual(task.result(), [1, 2, 3])
+        self.assertTrue(task.done())
+
+    def test_reraises_errors(self):
+        task = Task(int, 'not a number')
+        with self.assertRaises(ValueError):
+            task.result()
+
+    def test_times_out(self):
+        event = threading.Event()
+        task = Task(event.wait, 5)
+        with self.assertRaises(TaskTimeout):
+            task.result(timeout=0.01)
+        event.set()
+        task.result()
+
+
+class ParallelMapTestCase(unittest.TestCase):
+    def test_keeps_order(self):
+        self.assertEqual(parallel_map(lambda x: x * 2, range(50), workers=4),
+                         [x * 2 for x in range(50)])
+
+    def test_empty(self):
+        self.assertEqual(parallel_map(str, []), [])
+
+    def test_raises_after_finishing(self):
+        seen = []
+
+        def func(x):
+            seen.append(x)
+            if x == 3:
+                raise ValueError(x)
+
+        with self.assertRaises(ValueError):
+            parallel_map(func, range(10), workers=2)
+        self.assertEqual(sorted(seen), list(range(10)))
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env.utils import cache, entry_points
+
+
+class LoadTestCase(unittest.TestCase):
+    def test_loads_attribute(self):
+        self.assertIs(entry_points.load('conda_env.utils.cache:DiskCache'), cache.DiskCache)
+
+    def test_loads_dotted_attribute(self):
+        self.assertIs(entry_points.load('conda_env.utils.cache:DiskCache.get'),
+                      cache.DiskCache.get)
+
+    def test_loads_module(self):
+        self.assertIs(entry_points.load('conda_env.utils.cache'), cache)
+
+
+class LoadEntryPointsTestCase(unittest.TestCase):
+    def test_skips_broken_plugins(self):
+        found = [('broken', 'conda_env.does_not_exist:Spec'),
+                 ('cache', 'conda_env.utils.cache:DiskCache')]
+        with mock.patch.object(entry_points, 'scan_entry_points', return_value=found):
+            with mock.patch('sys.stderr') as stderr:
+                loaded = entry_points.load_entry_points('group')
+        self.assertEqual(loaded, [('cache', cache.DiskCache)])
+        self.assertIn('broken', stderr.write.call_args[0][0])
+
+
+class ScanEntryPointsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        entry_points._scanned.clear()
+
+    def tearDown(self):
+        entry_points._scanned.clear()
+        shutil.rmtree(self.directory)
+
+    def test_scans_once_per_process_without_cache(self):
+        with mock.patch.dict(os.environ, clear=True):
+            with mock.patch.object(entry_points, '_scan', return_value=[]) as scan:
+                entry_points.scan_entry_points('group')
+                entry_points.scan_entry_points('group')
+                with mock.patch.object(entry_points, '_path_fingerprint',
+                                       return_value=['changed']):
+                    entry_points.scan_entry_points('group')
+        self.assertEqual(scan.call_count, 2)
+
+    def test_cache_is_shared_between_processes(self):
+        found = [('name', 'module:attr')]
+        with mock.patch.dict(os.environ, {cache.CACHE_DIR_VAR: self.directory}):
+            with mock.patch.object(entry_points, '_scan', return_value=found) as scan:
+                entry_points.scan_entry_points('group')
+                # As if in a new process
+                entry_points._scanned.clear()
+                self.assertEqual(entry_points.scan_entry_points('group'), found)
+        self.assertEqual(scan.call_count, 1)
+
+    def test_cached_scan_is_reused(self):
+        found = [('name', 'module:attr')]
+        with mock.patch.dict(os.environ, {cache.CACHE_DIR_VAR: self.directory}):
+            with mock.patch.object(entry_points, '_scan', return_value=found) as scan:
+                self.assertEqual(entry_points.scan_entry_points('group'), found)
+                self.assertEqual(entry_points.scan_entry_points('group'), found)
+                entry_points.scan_entry_points('other')
+        self.assertEqual(scan.call_count, 2)
+
+    def test_changed_path_invalidates_cache(self):
+        with mock.patch.dict(os.environ, {cache.CACHE_DIR_VAR: self.directory}):
+            with mock.patch.object(entry_points, '_scan', return_value=[]) as scan:
+                entry_points.scan_entry_points('group')
+                with mock.patch.object(entry_points, '_path_fingerprint',
+                                       return_value=['changed']):
+                    entry_points.scan_entry_points('group')
+        self.assertEqual(scan.call_count, 2)
+
+    def test_finds_real_entry_points(self):
+        # Whatever is installed, the scan returns sorted pairs
+        found = entry_points._scan('console_scripts')
+        self.assertEqual(found, sorted(found))
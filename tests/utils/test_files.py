@@ -0,0 +1,84 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import unittest
+
+from conda_env.utils.files import atomic_open, file_lock, redirect_output
+
+
+class AtomicOpenTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'environment.yml')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self):
+        with open(self.filename, 'rb') as fp:
+            return fp.read()
+
+    def test_writes_file(self):
+        with atomic_open(self.filename) as fp:
+            fp.write(b'name: env\n')
+        self.assertEqual(b'name: env\n', self.read())
+        self.assertEqual(['environment.yml'], os.listdir(self.directory))
+
+    def test_original_is_kept_on_error(self):
+        with open(self.filename, 'wb') as fp:
+            fp.write(b'name: original\n')
+        with self.assertRaises(ValueError):
+            with atomic_open(self.filename) as fp:
+                fp.write(b'name: partial')
+                raise ValueError
+        self.assertEqual(b'name: original\n', self.read())
+        self.assertEqual(['environment.yml'], os.listdir(self.directory))
+
+    def test_keeps_permissions_of_replaced_file(self):
+        with open(self.filename, 'wb') as fp:
+            fp.write(b'name: original\n')
+        os.chmod(self.filename, 0o640)
+        with atomic_open(self.filename) as fp:
+            fp.write(b'name: env\n')
+        self.assertEqual(0o640, stat.S_IMODE(os.stat(self.filename).st_mode))
+
+
+class FileLockTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_excludes_other_holders(self):
+        filename = os.path.join(self.directory, 'locks', 'numpy.lock')
+        events = []
+
+        def hold(name):
+            with file_lock(filename):
+                events.append(name + ' start')
+                time.sleep(0.05)
+                events.append(name + ' end')
+
+        threads = [threading.Thread(target=hold, args=(name,)) for name in 'ab']
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([event.split()[1] for event in events],
+                         ['start', 'end', 'start', 'end'])
+        self.assertTrue(os.path.exists(filename))
+
+
+class RedirectOutputTestCase(unittest.TestCase):
+    def test_captures_child_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        log = os.path.join(directory, 'create.log')
+        with redirect_output(log):
+            os.system('echo from a child')
+        with open(log) as fp:
+            self.assertEqual(fp.read(), 'from a child\n')
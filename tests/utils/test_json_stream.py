@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from conda_env.utils.json_stream import find_member, replace_member
+
+NOTEBOOK = {
+    'cells': [{
+        'cell_type': 'code',
+        'outputs': [{'data': {'image/png': 'iVBORw0K' * 1000}},
+                    {'text': ['quotes \\" and \\\\ backslashes', '}] brackets [{']}],
+    }],
+    'metadata': {'environment': {'name': u'démo', 'dependencies': ['numpy']}},
+    'nbformat': 4,
+    'nbformat_minor': 0,
+    'trusted': True,
+    'signature': None,
+}
+
+
+def stream(data, indent=None):
+    return io.BytesIO(json.dumps(data, indent=indent).encode('utf-8'))
+
+
+class FindMemberTestCase(unittest.TestCase):
+    def test_finds_every_member(self):
+        for indent in (None, 1):
+            for key, value in NOTEBOOK.items():
+                self.assertEqual(find_member(stream(NOTEBOOK, indent), key).value, value)
+
+    def test_chunk_boundaries(self):
+        for chunk_size in (1, 2, 3, 7, 64):
+            member = find_member(stream(NOTEBOOK, 1), 'metadata', chunk_size=chunk_size)
+            self.assertEqual(member.value, NOTEBOOK['metadata'])
+
+    def test_offsets(self):
+        raw = json.dumps(NOTEBOOK, indent=1).encode('utf-8')
+        member = find_member(io.BytesIO(raw), 'metadata', chunk_size=16)
+        self.assertEqual(json.loads(raw[member.start:member.end].decode('utf-8')),
+                         NOTEBOOK['metadata'])
+
+    def test_missing_member(self):
+        self.assertEqual(find_member(stream(NOTEBOOK), 'missing'), None)
+        self.assertEqual(find_member(stream({}), 'missing'), None)
+
+    def test_stops_reading_once_found(self):
+        raw = b'{"metadata": {}, "cells": [' + b'1, ' * 1000 + b'1]}'
+        fp = io.BytesIO(raw)
+        find_member(fp, 'metadata', chunk_size=64)
+        self.assertEqual(fp.tell(), 64)
+
+    def test_not_an_object(self):
+        for raw in (b'name: env\n', b'[1, 2]', b'{"a": 1', b'{"a" 1}', b''):
+            self.assertRaises(ValueError, find_member, io.BytesIO(raw), 'metadata')
+
+
+class ReplaceMemberTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'notebook.ipynb')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, raw):
+        with open(self.filename, 'wb') as fp:
+            fp.write(raw)
+
+    def read(self):
+        with open(self.filename, 'rb') as fp:
+            return fp.read()
+
+    def add_environment(self, metadata):
+        metadata['environment'] = {'name': u'démo'}
+        return metadata
+
+    def test_keeps_nbformat_layout(self):
+        # nbformat writes with indent=1 and sorted keys
+        self.write(json.dumps(NOTEBOOK, indent=1, sort_keys=True).encode('utf-8'))
+        self.assertTrue(replace_member(self.filename, 'metadata', self.add_environment,
+                                       chunk_size=32))
+        expected = dict(NOTEBOOK, metadata=self.add_environment(dict(NOTEBOOK['metadata'])))
+        self.assertEqual(self.read().decode('utf-8'),
+                         json.dumps(expected, indent=1, sort_keys=True, ensure_ascii=False))
+
+    def test_other_bytes_are_untouched(self):
+        raw = b'{"cells":[1,  2,\t3],"metadata":{},  "nbformat" :4}'
+        self.write(raw)
+        replace_member(self.filename, 'metadata', self.add_environment)
+        self.assertEqual(self.read(), raw.replace(
+            b'{}', u'{"environment": {"name": "démo"}}'.encode('utf-8')))
+
+    def test_missing_member(self):
+        self.write(b'{"cells": []}')
+        self.assertFalse(replace_member(self.filename, 'metadata', self.add_environment))
+        self.assertEqual(self.read(), b'{"cells": []}')
+
+    def test_failed_update_leaves_file_alone(self):
+        self.write(b'{"metadata": {}}')
+
+        def fail(metadata):
+            raise RuntimeError
+
+        self.assertRaises(RuntimeError, replace_member, self.filename, 'metadata', fail)
+        self.assertEqual(self.read(), b'{"metadata": {}}')
+        self.assertEqual(os.listdir(self.directory), ['notebook.ipynb'])
@@ -1,5 +1,14 @@
 import json
+import os
+import shutil
+import tempfile
 import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from conda_env.exceptions import EnvironmentAlreadyInNotebook
 from conda_env.utils.notebooks import Notebook
 from ..utils import support_file
 
@@ -41,3 +50,32 @@ class NotebookTestCase(unittest.TestCase):
 
         with open(support_file('notebook.ipynb'), 'w') as fb:
             fb.write(json.dumps(notebook))
+
+
+class NotebookSpliceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'notebook.ipynb')
+        self.cells = json.dumps([{'outputs': ['x' * 10000]}], indent=1)
+        with open(self.filename, 'w') as fp:
+            fp.write('{\n "cells": %s,\n "metadata": {},\n "nbformat": 4\n}' % self.cells)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_only_metadata_is_rewritten(self):
+        with mock.patch('conda_env.utils.notebooks.nbformat', None):
+            self.assertTrue(Notebook(self.filename).inject({'remote': 'darth/deathstar'}))
+        with open(self.filename) as fp:
+            raw = fp.read()
+        self.assertIn(self.cells, raw)
+        self.assertEqual(json.loads(raw)['metadata'],
+                         {'environment': {'remote': 'darth/deathstar'}})
+
+    def test_existing_environment_needs_force(self):
+        nb = Notebook(self.filename)
+        nb.store_in_file('first')
+        self.assertRaises(EnvironmentAlreadyInNotebook, nb.store_in_file, 'second')
+        self.assertTrue(nb.store_in_file('second', force=True))
+        with open(self.filename) as fp:
+            self.assertEqual(json.load(fp)['metadata']['environment'], 'second')